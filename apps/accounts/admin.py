@@ -17,11 +17,11 @@ from django.contrib.admin import (
 from django.contrib.auth.admin import GroupAdmin, UserAdmin
 from django.contrib.auth.models import Group
 from django.db.models import Case, Count, F, Value, When
-from django.http import StreamingHttpResponse
 from django.utils.translation import gettext_lazy as _
 
 # external imports
 from import_export.admin import ImportExportMixin, ImportExportModelAdmin
+from util.http import SyncStreamingHttpResponse
 
 # app imports
 from .forms import UserAdminForm
@@ -247,7 +247,7 @@ class SectionAdmin(ImportExportModelAdmin):
                 )
                 yield read_and_flush()
 
-        response = StreamingHttpResponse(rows(queryset), content_type="text/csv")
+        response = SyncStreamingHttpResponse(rows(queryset), content_type="text/csv")
         response["Content-Disposition"] = f'attachment; filename="Minerva {self.model.__name__}s.csv"'
 
         return response
@@ -385,7 +385,7 @@ class AccountAdmin(ImportExportMixin, UserAdmin):
                 )
                 yield read_and_flush()
 
-        response = StreamingHttpResponse(rows(queryset), content_type="text/csv")
+        response = SyncStreamingHttpResponse(rows(queryset), content_type="text/csv")
         response["Content-Disposition"] = f"attachment; filename={self.model.__name__} Roster.csv"
 
         return response
@@ -420,7 +420,7 @@ class AccountAdmin(ImportExportMixin, UserAdmin):
                 )
                 yield read_and_flush()
 
-        response = StreamingHttpResponse(rows(queryset), content_type="text/csv")
+        response = SyncStreamingHttpResponse(rows(queryset), content_type="text/csv")
         response["Content-Disposition"] = f"attachment; filename={self.model.__name__} Groups.csv"
 
         return response
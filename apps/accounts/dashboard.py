@@ -0,0 +1,115 @@
+"""Build the content of a student's summary dashboard tab.
+
+Drawing the pie charts is by far the slowest part of the student summary page, so the charts and scores are built
+here by the account update pipeline and kept in a :class:`accounts.models.DashboardSnapshot` for the page to read.
+"""
+
+# Django imports
+from django.conf import settings
+
+# external imports
+import matplotlib.pyplot as plt
+import numpy as np
+from util.http import svg_data
+
+# app imports
+from .models import credit_weighted_scores
+
+
+def pie_chart(data, colours):
+    """Make a Pie chart for the student dashboard."""
+    if any([x > 0 for x in data.values()]):
+        fig, ax = plt.subplots()
+        fig.set_figwidth(4.5)
+        _, texts = ax.pie(list(data.values()), labels=list(data.keys()), colors=colours, labeldistance=0.3)
+        for text in texts:
+            text.set_bbox({"facecolor": (1, 1, 1, 0.75), "edgecolor": (1, 1, 1, 0.25)})
+        plt.tight_layout()
+    else:
+        fig = plt.figure()
+        fig.set_figwidth(4.5)
+    data = svg_data(fig, base64=True)
+    plt.close()
+    return data
+
+
+def tutorial_plot(account, summaries, category_name):
+    """Make piechart for a student's engagement scores."""
+    data = {}
+    colours = []
+    scores = account.engagement_scores()
+    for (score, label, _), col in zip(
+        settings.TUTORIAL_MARKS, ["silver", "tomato", "springgreen", "mediumseagreen", "forestgreen"]
+    ):
+        if count := scores[np.isclose(scores, score)].size:
+            data[label] = count
+            colours.append(col)
+    alt = "Tutproal attendance" + " ".join([f"{label}:{count}" for label, count in data.items()])
+    return [pie_chart(data, colours), alt]
+
+
+def category_plot(account, summaries, category_name):
+    """Make a pie chart plot from the summary_scores."""
+    data = {}
+    colours = {}
+    # Merge all the summary scores with the same category label - allows for multiple modules
+    # with the same category labels.
+    for ss in summaries:
+        for k, value in ss.data.get("data", {}).items():
+            data[k] = data.get(k, 0) + value
+            colours[k] = ss.data.get("colours", {}).get(k, "white")
+    colours = [colours.get(x, "white") for x in data]
+    alt = f"{category_name.title()} results" + " ".join([f"{label}:{count}" for label, count in data.items()])
+    try:
+        image = pie_chart(data, colours)
+    except ValueError:
+        image = ""
+    return [image, alt]
+
+
+# Categories whose dashboard chart is not drawn from their summary scores, keyed by category tag.
+PLOTTERS = {"tutorial": tutorial_plot}
+
+
+def category_score(summaries):
+    """Return the module credit weighted mean score of *summaries*, or None if none of them has a score.
+
+    The score is reduced with :func:`accounts.models.credit_weighted_scores`, as the category score properties are.
+    """
+    credits, scores = [ss.module.credits for ss in summaries], [ss.score for ss in summaries]
+    score = credit_weighted_scores([0] * len(summaries), credits, scores).get(0, np.nan)
+    return None if np.isnan(score) else float(score)
+
+
+def dashboard_data(account):
+    """Build the charts and scores for an account's dashboard tab from one summary score query.
+
+    Args:
+        account (Account):
+            The student whose dashboard is being built.
+
+    Returns:
+        (dict):
+            *categories* - a list of the tag and text of each plotted category in dashboard order, *plots* - the
+            base64 svg data and alt text of each category's pie chart and *scores* - each category's overall score,
+            the last two keyed by category tag.
+
+    Examples:
+        >>> dashboard_data(account)["scores"]
+        {'homework': 75.0, 'tutorial': 66.7}
+    """
+    summaries = list(account.summary_scores.select_related("category", "module"))
+    by_text = {}
+    for ss in summaries:
+        by_text.setdefault(ss.category.text, []).append(ss)
+    categories = {}
+    for category in sorted({ss.category for ss in summaries if ss.category.dashboard_plot}, key=lambda c: c.order):
+        categories[category.text] = category
+
+    data = {"categories": [], "plots": {}, "scores": {}}
+    for text, category in categories.items():
+        data["categories"].append({"tag": category.tag, "text": category.text})
+        plotter = PLOTTERS.get(category.tag, category_plot)
+        data["plots"][category.tag] = plotter(account, by_text[text], text)
+        data["scores"][category.tag] = category_score(by_text[text])
+    return data
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:25
+
+# Python imports
+from pathlib import Path
+
+# Django imports
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# external imports
+import pandas as pd
+
+METRICS = ["activity_score", "tests_score", "labs_score", "coding_score", "vitals_score", "engagement"]
+
+
+def import_time_series(apps, schema_editor):
+    """Copy the legacy time_series_{metric}.xlsx files into the progress snapshot table."""
+    ProgressSnapshot = apps.get_model("accounts", "ProgressSnapshot")
+    Account = apps.get_model("accounts", "Account")
+    students = dict(Account.objects.values_list("number", "pk"))
+    for metric in METRICS:
+        if not (xlsx := Path(settings.MEDIA_ROOT) / "data" / f"time_series_{metric}.xlsx").exists():
+            continue
+        data = pd.read_excel(xlsx).set_index("Date")
+        snapshots = [
+            ProgressSnapshot(date=date.date(), student_id=students[number], metric=metric, score=score)
+            for (date, number), score in data.stack().items()
+            if number in students
+        ]
+        ProgressSnapshot.objects.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0033_school_account_school_programme_school_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProgressSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                (
+                    "metric",
+                    models.CharField(
+                        choices=[
+                            ("activity_score", "Overall Activity"),
+                            ("tests_score", "Homework Assignments"),
+                            ("labs_score", "Lab Activities"),
+                            ("coding_score", "Code Tasks"),
+                            ("vitals_score", "VITALs Progress"),
+                            ("engagement", "Tutorial Engagement"),
+                        ],
+                        max_length=20,
+                    ),
+                ),
+                ("score", models.FloatField(blank=True, null=True)),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="progress_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["metric", "date"], name="progress_metric_date_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("date", "student", "metric"), name="Singleton progress snapshot per day"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(import_time_series, migrations.RunPython.noop),
+    ]
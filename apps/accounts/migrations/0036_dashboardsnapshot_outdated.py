@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0035_dashboardsnapshot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dashboardsnapshot",
+            name="outdated",
+            field=models.BooleanField(default=False, editable=False),
+        ),
+    ]
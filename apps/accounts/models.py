@@ -6,22 +6,27 @@ from __future__ import unicode_literals
 import logging
 import string
 from datetime import date, datetime, time, timedelta
+from time import time_ns
 from zoneinfo import ZoneInfo
 
 # Django imports
+from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import AbstractUser, Group, UserManager
+from django.core.cache import cache
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
-from django.db import DEFAULT_DB_ALIAS, models
+from django.db import DEFAULT_DB_ALIAS, models, transaction
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.functional import classproperty
 
 # external imports
 import numpy as np
+import pandas as pd
 from constance import config
 from dateutil.parser import parse
 from six import string_types
+from util.commit import CommitBatch
 from util.models import colour
 from util.validators import RangeValueValidator
 
@@ -39,6 +44,16 @@ logger = logging.getLogger(__name__)
 
 DEGREE_LEVEL = [("B", "Bachelors"), ("MB", "Integrated Masters"), ("PGT", "Taught Masters"), ("O", "Other")]
 
+# Account level scores plotted over time - the label and the SummaryScore category text (None for all categories).
+PROGRESS_METRICS = {
+    "activity_score": ("Overall Activity", None),
+    "tests_score": ("Homework Assignments", "Homework"),
+    "labs_score": ("Lab Activities", "Lab Experiment"),
+    "coding_score": ("Code Tasks", "Code Tasks"),
+    "vitals_score": ("VITALs Progress", "VITALs"),
+    "engagement": ("Tutorial Engagement", "Tutorial"),
+}
+
 LEVEL_OF_STUDY = [
     (-1, "Not a student"),
     (0, "Foundation Year"),
@@ -51,6 +66,93 @@ LEVEL_OF_STUDY = [
 
 TIMEZONE = ZoneInfo(settings.TIME_ZONE)
 
+SUMMARY_VERSION_PREFIX = "accounts:summary_version"
+DASHBOARD_REBUILD_PREFIX = "accounts:dashboard_rebuild"
+DASHBOARD_REBUILD_THROTTLE = 300  # Seconds before another rebuild of the same dashboard is queued
+
+
+def weighted_activity_scores(rows):
+    """Reduce (student, credits, weighting, score) rows to a credit and weighting weighted mean score per student.
+
+    Args:
+        rows (2D float array):
+            One row per summary score of student pk, module credits, category weighting and score. Rows with any
+            NaN values are ignored.
+
+    Returns:
+        (dict of int: float):
+            The weighted mean score for each student with at least one usable row, NaN if their weights sum to zero.
+
+    Examples:
+        >>> weighted_activity_scores(np.array([[1, 10, 1, 100.0], [1, 10, 3, 60.0], [2, 10, 1, np.nan]]))
+        {1: 70.0}
+    """
+    rows = rows[~np.any(np.isnan(rows), axis=1)]  # Drop summaries with no score
+    students, index = np.unique(rows[:, 0].astype(int), return_inverse=True)
+    weights = rows[:, 1] * rows[:, 2]
+    total_weight = np.bincount(index, weights=weights, minlength=students.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        scores = np.bincount(index, weights=weights * rows[:, 3], minlength=students.size) / total_weight
+    return dict(zip(students.tolist(), np.where(total_weight == 0, np.nan, scores).tolist()))
+
+
+def credit_weighted_scores(keys, credits, scores):
+    """Reduce summary scores to a module credit weighted mean score per key, as category scores are shown.
+
+    Unlike :func:`weighted_activity_scores`, a summary without a score keeps its credits in the weighting and counts
+    as zero, so work that hasn't been done pulls the category's score down rather than being left out.
+
+    Args:
+        keys (sequence of int or str):
+            What to group each summary under, e.g. the student or the category.
+        credits (sequence of float):
+            The credits of each summary's module.
+        scores (sequence of float or None):
+            Each summary's score, None or NaN if it has none.
+
+    Returns:
+        (dict):
+            The weighted mean score for each key, NaN if none of its summaries has a score or its credits sum to zero.
+
+    Examples:
+        >>> credit_weighted_scores([1, 1, 2, 3], [15, 15, 15, 15], [100.0, None, 60.0, None])
+        {1: 50.0, 2: 60.0, 3: nan}
+    """
+    keys, index = np.unique(np.asarray(keys), return_inverse=True)
+    credits = np.nan_to_num(np.asarray(credits, dtype=float))
+    scores = np.asarray(scores, dtype=float)
+    scored = np.bincount(index, weights=~np.isnan(scores), minlength=keys.size)
+    total = np.bincount(index, weights=credits, minlength=keys.size)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.bincount(index, weights=credits * np.nan_to_num(scores), minlength=keys.size) / total
+    return dict(zip(keys.tolist(), np.where((scored == 0) | (total == 0), np.nan, means).tolist()))
+
+
+def summary_version(student):
+    """Return the version number of a student's summary pages, which changes whenever anything on them changes.
+
+    Cached copies of a student's pages are keyed on this number, so bumping it with :func:`bump_summary_version`
+    invalidates them all at once. A new version is based on the clock, so one lost from the cache can never be
+    reused for older content.
+
+    Args:
+        student (int):
+            The student's primary key.
+
+    Returns:
+        (int):
+            The current version.
+    """
+    return cache.get_or_set(f"{SUMMARY_VERSION_PREFIX}:{student}", time_ns, timeout=None)
+
+
+def bump_summary_version(*students):
+    """Give the students with primary keys *students* a new summary version, invalidating their cached pages."""
+    if students:
+        version = time_ns()
+        cache.set_many({f"{SUMMARY_VERSION_PREFIX}:{student}": version for student in students}, timeout=None)
+
+
 # ### Model Classes #####################################################################################
 
 
@@ -350,6 +452,42 @@ class Account(AbstractUser):
         """Monkeypatch a routine to convert engagement scaore into a hex colour."""
         return colour(self.activity_score)
 
+    @classmethod
+    def update_activity_scores(cls, accounts=None):
+        """Recalculate the activity scores of many accounts from their summary scores in one pass.
+
+        The activity score is the mean of the summary scores weighted by module credits times category weighting,
+        ignoring any summaries without a score. All the (student, credits, weighting, score) rows are read with one
+        query, reduced per student with NumPy and only the changed scores are written with ``bulk_update``.
+
+        Keyword Arguments:
+            accounts (iterable of Account or int, None):
+                The accounts (or their primary keys) to update. Defaults to every account enrolled on a module.
+
+        Returns:
+            (int):
+                The number of accounts whose activity score changed.
+        """
+        SummaryScore = apps.get_model("minerva", "summaryscore")
+        if accounts is None:
+            current = cls.objects.filter(modules__isnull=False).distinct()
+        else:
+            current = cls.objects.filter(pk__in=[getattr(account, "pk", account) for account in accounts])
+        current = dict(current.order_by().values_list("pk", "activity_score"))
+        rows = SummaryScore.objects.filter(student__in=current.keys()).values_list(
+            "student", "module__credits", "category__weighting", "score"
+        )
+        scores = weighted_activity_scores(np.array(list(rows), dtype=float).reshape(-1, 4))
+
+        changed = []
+        for pk, old in current.items():
+            new = scores.get(pk, np.nan)
+            if old == new or ((old is None or np.isnan(old)) and np.isnan(new)):
+                continue
+            changed.append(cls(pk=pk, activity_score=new))
+        cls.objects.bulk_update(changed, ["activity_score"], batch_size=500)
+        return len(changed)
+
     def save(
         self, force_insert=False, force_update=False, using=DEFAULT_DB_ALIAS, update_fields=None
     ):  #  pylint: disable=arguments-differ
@@ -359,6 +497,217 @@ class Account(AbstractUser):
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
 
 
+class ProgressSnapshot(models.Model):
+    """A dated copy of one of a student's overall scores for plotting cohort progression.
+
+    The scores named in PROGRESS_METRICS are taken for every active student at once with :meth:`take` and are read
+    back either as percentile bands across the cohort with :meth:`bands` or as individual students' lines with
+    :meth:`series`.
+    """
+
+    date = models.DateField()
+    student = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="progress_snapshots")
+    metric = models.CharField(max_length=20, choices=[(key, label) for key, (label, _) in PROGRESS_METRICS.items()])
+    score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "student", "metric"], name="Singleton progress snapshot per day"),
+        ]
+        indexes = [models.Index(fields=["metric", "date"], name="progress_metric_date_idx")]
+
+    def __str__(self):
+        """Describe the snapshot."""
+        return f"{self.date} {self.student} {self.metric}: {self.score}"
+
+    @classmethod
+    def take(cls, date=None):
+        """Snapshot every active student's PROGRESS_METRICS scores from their summary scores.
+
+        All the summary scores are read in one query. The overall activity score is reduced with
+        :func:`weighted_activity_scores` and the category scores with :func:`credit_weighted_scores`, exactly as
+        :attr:`activity_score` and the category score properties are, so a snapshot matches what the student was shown.
+        Any snapshot already taken for the same date is replaced.
+
+        Keyword Arguments:
+            date (date, None):
+                The date to record the snapshot against - defaults to today.
+
+        Returns:
+            (int):
+                The number of snapshot rows written.
+        """
+        SummaryScore = apps.get_model("minerva", "summaryscore")
+        date = date or timezone.now().date()
+        rows = list(
+            SummaryScore.objects.filter(student__is_active=True).values_list(
+                "student", "module__credits", "category__weighting", "score", "category__text"
+            )
+        )
+        values = np.array([row[:4] for row in rows], dtype=float).reshape(-1, 4)
+        texts = np.array([row[4] for row in rows])
+        snapshots = []
+        for metric, (_, text) in PROGRESS_METRICS.items():
+            if text is None:
+                scores = weighted_activity_scores(values)
+            else:
+                selected = values[texts == text]
+                scores = credit_weighted_scores(selected[:, 0].astype(int), selected[:, 1], selected[:, 3])
+            for pk, score in scores.items():
+                snapshots.append(
+                    cls(date=date, student_id=pk, metric=metric, score=None if np.isnan(score) else score)
+                )
+        with transaction.atomic():
+            cls.objects.filter(date=date).delete()
+            cls.objects.bulk_create(snapshots, batch_size=1000)
+        return len(snapshots)
+
+    @classmethod
+    def bands(cls, metric, percentiles=(10, 25, 50, 75, 90)):
+        """Return the percentiles of a metric across the active students for each snapshot date.
+
+        Args:
+            metric (str):
+                The PROGRESS_METRICS key to read.
+
+        Keyword Arguments:
+            percentiles (tuple of int):
+                The percentiles to calculate.
+
+        Returns:
+            (pandas.DataFrame):
+                A Date index and a column per percentile.
+        """
+        rows = cls.objects.filter(metric=metric, student__is_active=True, score__isnull=False).values_list(
+            "date", "score"
+        )
+        data = pd.DataFrame.from_records(list(rows), columns=["Date", "score"])
+        if data.empty:
+            return pd.DataFrame(columns=list(percentiles), dtype=float)
+        data = data.groupby("Date")["score"].quantile([percentile / 100 for percentile in percentiles]).unstack()
+        data.columns = list(percentiles)
+        return data
+
+    @classmethod
+    def series(cls, metric, numbers):
+        """Return the scores of a few students for a metric as a DataFrame with a column per student number.
+
+        Args:
+            metric (str):
+                The PROGRESS_METRICS key to read.
+            numbers (iterable of int):
+                The student numbers to read.
+
+        Returns:
+            (pandas.DataFrame):
+                A Date index and a column per student, NaN where a student has no score.
+        """
+        rows = cls.objects.filter(metric=metric, student__number__in=numbers).values_list(
+            "date", "student__number", "score"
+        )
+        data = pd.DataFrame.from_records(list(rows), columns=["Date", "number", "score"])
+        return data.pivot(index="Date", columns="number", values="score").sort_index().astype(float)
+
+
+class DashboardSnapshot(models.Model):
+    """The pre-built charts and scores of a student's summary dashboard tab.
+
+    Snapshots are rebuilt by the account update pipeline so that showing the dashboard is a single read. A snapshot
+    older than the last gradebook import, or marked :attr:`outdated` because one of the student's results has changed
+    since, is :attr:`stale` and shown with a note while it is rebuilt.
+    """
+
+    student = models.OneToOneField(
+        Account, on_delete=models.CASCADE, primary_key=True, related_name="dashboard_snapshot"
+    )
+    updated = models.DateTimeField(auto_now=True)
+    outdated = models.BooleanField(default=False, editable=False)
+    data = models.JSONField(default=dict, blank=True, editable=False)
+
+    def __str__(self):
+        """Describe the snapshot."""
+        return f"{self.student} dashboard at {self.updated}"
+
+    @property
+    def stale(self):
+        """Whether the student's results have changed, or the gradebook been imported, since this snapshot was built."""
+        return self.outdated or self.updated < config.LAST_MINERVA_UPDATE
+
+    @classmethod
+    def rebuild(cls, accounts):
+        """Build and save the dashboard snapshots of *accounts*.
+
+        Accounts with nothing to show on their dashboard have any old snapshot removed instead.
+
+        Args:
+            accounts (iterable of Account):
+                The accounts to rebuild.
+
+        Returns:
+            (list of DashboardSnapshot):
+                The snapshots saved.
+        """
+        # app imports
+        from .dashboard import dashboard_data
+
+        snapshots, empty = [], []
+        for account in accounts:
+            if (data := dashboard_data(account))["categories"]:
+                snapshots.append(cls(student=account, data=data))
+            else:
+                empty.append(account.pk)
+        cls.objects.filter(student__in=empty).delete()
+        snapshots = cls.objects.bulk_create(
+            snapshots, update_conflicts=True, unique_fields=["student"], update_fields=["updated", "outdated", "data"]
+        )
+        bump_summary_version(*empty, *(snapshot.student_id for snapshot in snapshots))
+        return snapshots
+
+    @classmethod
+    def queue_rebuild(cls, students):
+        """Queue the snapshots of the students with primary keys *students* to be rebuilt.
+
+        A student whose rebuild was queued within the last ``DASHBOARD_REBUILD_THROTTLE`` seconds is skipped, so a
+        burst of changes to their results queues one rebuild rather than one per change.
+
+        Args:
+            students (iterable of int):
+                Primary keys of the students to rebuild.
+
+        Returns:
+            (list of int):
+                The students actually queued.
+        """
+        # app imports
+        from .tasks import update_dashboard_snapshots
+
+        students = [
+            student
+            for student in sorted(students)
+            if cache.add(f"{DASHBOARD_REBUILD_PREFIX}:{student}", True, timeout=DASHBOARD_REBUILD_THROTTLE)
+        ]
+        if students:
+            update_dashboard_snapshots.delay(students)
+        return students
+
+    @classmethod
+    def outdate(cls, students):
+        """Mark the snapshots of the students with primary keys *students* stale and queue them to be rebuilt.
+
+        Args:
+            students (iterable of int):
+                Primary keys of the students whose results have changed.
+        """
+        students = list(cls.objects.filter(student__in=students).values_list("student", flat=True))
+        if students:
+            cls.objects.filter(student__in=students).update(outdated=True)
+            cls.queue_rebuild(students)
+
+
+# Marks the dashboard snapshots of students whose results were saved or deleted stale, once the change commits.
+DASHBOARD_BATCH = CommitBatch(DashboardSnapshot.outdate)
+
+
 class Section(models.Model):
     """Represent a student's lab groups for managing Gradescope."""
 
@@ -13,3 +13,23 @@ ACTIVITY_LABELS = {
     "Essential to Improve": (20.0, 40.0),
     "Unsatisfactory": (0, 20.0),
 }
+
+# Number of accounts update_all_users processes in each chunk (and database transaction).
+UPDATE_USERS_CHUNK_SIZE = 200
+# How long, in seconds, an interrupted update_all_users run's checkpoint is kept for resuming.
+UPDATE_USERS_CHECKPOINT_TIMEOUT = 12 * 60 * 60
+# Number of update_specified_users subtasks update_all_users splits the accounts between.
+UPDATE_USERS_SHARDS = 4
+# How long, in seconds, the cohort progression percentile bands are cached for.
+PROGRESS_BANDS_TIMEOUT = 24 * 60 * 60
+# How long, in seconds, a rendered student summary tab is cached for - it is also dropped as soon as the student's
+# results change, so this only bounds how late a test's status follows its dates.
+STUDENT_FRAGMENT_TIMEOUT = 15 * 60
+
+# Query budgets (see util.profiling) for the student summary page and its tabs, which must not grow with the number
+# of tests and VITALs shown. The page itself was measured at 4 queries and its tabs, rendered with an empty fragment
+# cache, at 4 to 6, none of them duplicated.
+QUERY_BUDGETS = {
+    "accounts:student_detail": {"queries": 6, "duplicates": 2},
+    "accounts:student_detail_category": {"queries": 8, "duplicates": 2},
+}
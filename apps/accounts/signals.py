@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
-"""Ensure dnb operations happen on post-migrate."""
+"""Ensure dnb operations happen on post-migrate and keep cached student pages up to date."""
 # Django imports
 from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
 # app imports
-from .models import Account
+from .models import DASHBOARD_BATCH, Account, bump_summary_version
 
 
 @receiver(post_migrate)
@@ -24,3 +24,14 @@ def create_custom_permission(sender, **kwargs):
         name="Can Review Whole Cohort",
         content_type=content_type,
     )
+
+
+@receiver([post_save, post_delete], sender="minerva.Test_Score")
+@receiver([post_save, post_delete], sender="minerva.SummaryScore")
+@receiver([post_save, post_delete], sender="vitals.VITAL_Result")
+@receiver([post_save, post_delete], sender="tutorial.Attendance")
+def student_results_changed(sender, instance, **kwargs):
+    """Invalidate the cached summary pages and dashboard snapshot of the student whose results have changed."""
+    student = getattr(instance, "student_id", None) or instance.user_id
+    bump_summary_version(student)
+    DASHBOARD_BATCH.add(student)
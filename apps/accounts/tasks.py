@@ -1,106 +1,284 @@
 # -*- coding: utf-8 -*-
 """Celery tasks for the accounts app."""
+
 # Python imports
 import logging
+from math import ceil
 from pathlib import Path
+from time import perf_counter
 
 # Django imports
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist, PermissionDenied
 from django.db import transaction
-from django.db.models import Count, Q
+from django.db.models import OuterRef, Q, Subquery
 
 # external imports
-import numpy as np
 import pandas as pd
-from celery import shared_task
+from celery import chord, group, shared_task
+from constance import config
+from dateutil.parser import parse
 from django_auth_adfs.config import provider_config
 
 # app imports
 from phas_vitals import celery_app
 
 # app imports
-from .models import Account
+from .models import DASHBOARD_BATCH, Account, DashboardSnapshot, Programme, ProgressSnapshot
 
 logger = logging.getLogger("celery_tasks")
 
+UPDATE_USERS_CHECKPOINT = "accounts:update_all_users:checkpoint"
+
 
 @shared_task()
-def update_specified_users(accounts):
+def update_specified_users(accounts, refresh_stats=True, checkpoint=False):
     """Rebuild the VITALs for the specified user accounts.
 
     Find all users with Account.update_vitals==True and:
         1. For each passed test, check that the associated VITALs are marked passed.
         2. recalculate the scores for that user.
         3. save the user record.
+
+    Keyword Arguments:
+        refresh_stats (bool):
+            Refresh the Test_Stats and VITAL_Stats of the accounts' modules afterwards - update_all_users turns this
+            off for its shards and refreshes them once when they have all finished.
+        checkpoint (bool):
+            Checkpoint progress under a key for this range of accounts, so that re-running a killed update of the
+            same accounts resumes from where it got to - update_all_users turns this on for its shards.
+
+    Returns:
+        (dict):
+            Totals of accounts and summaries updated, chunks processed and seconds spent.
     """
-    logger.debug("Running update all users task")
-    accounts = Account.objects.filter(pk__in=accounts)
-    _update_engine(accounts)
+    logger.debug("Running update specified users task")
+    key = f"{UPDATE_USERS_CHECKPOINT}:{min(accounts)}-{max(accounts)}" if checkpoint and accounts else None
+    stats = _update_in_chunks(Account.objects.filter(pk__in=accounts).order_by("pk").values_list("pk", flat=True), key)
+    if refresh_stats:
+        _refresh_module_stats(Account.objects.filter(pk__in=accounts).values("modules"))
+    return stats
+
+
+@celery_app.task
+def update_activity_scores():
+    """Recalculate the activity scores of every enrolled account from their existing summary scores."""
+    changed = Account.update_activity_scores()
+    logger.info(f"Updated {changed} activity scores")
+    return changed
+
+
+@shared_task()
+def update_dashboard_snapshots(accounts):
+    """Rebuild the dashboard snapshots of the accounts with primary keys *accounts*."""
+    return len(DashboardSnapshot.rebuild(Account.objects.filter(pk__in=accounts)))
+
+
+@celery_app.task
+def take_progress_snapshot():
+    """Snapshot today's overall scores of every active student for the cohort progression plots."""
+    count = ProgressSnapshot.take()
+    logger.info(f"Took {count} progress snapshots")
+    return count
 
 
 @celery_app.task
-def update_all_users():
+def update_all_users(last_update=None):
     """Update all users marked as needing records updated.
 
     Find all users with Account.update_vitals==True and:
         1. For each passed test, check that the associated VITALs are marked passed.
         2. recalculate the scores for that user.
         3. save the user record.
+
+    The accounts are split into ``UPDATE_USERS_SHARDS`` contiguous pk ranges which are dispatched as a group of
+    :func:`update_specified_users` subtasks so that they run concurrently on different workers. A chord callback,
+    :func:`finish_update_all_users`, merges their statistics and only then records *last_update*. With a single
+    shard the accounts are updated within this task. Either way progress is checkpointed, per shard, so that a killed
+    run resumes from where it got to.
+
+    Keyword Arguments:
+        last_update (datetime, str, None):
+            The time of the gradebook data being processed, stored as config.LAST_MINERVA_UPDATE once all the
+            accounts have been updated.
+
+    Returns:
+        (dict):
+            The merged statistics when run in a single shard, otherwise the number of shards and accounts dispatched.
     """
-    accounts = (
-        Account.objects.prefetch_related("module_enrollments", "summary_scores", "VITALS")
-        .annotate(cnt=Count("modules"))
-        .filter(cnt__gt=0)
-    )
     logger.debug("Running update all users task")
-    _update_engine(accounts)
+    candidates = Account.objects.filter(modules__isnull=False).order_by("pk").values_list("pk", flat=True).distinct()
+    shards = getattr(settings, "UPDATE_USERS_SHARDS", 1)
+    if shards <= 1:
+        return finish_update_all_users([_update_in_chunks(candidates, UPDATE_USERS_CHECKPOINT)], last_update)
+    pks = list(candidates)
+    if not pks:
+        return finish_update_all_users([], last_update)
+    size = ceil(len(pks) / shards)
+    subtasks = [
+        update_specified_users.s(pks[ix : ix + size], refresh_stats=False, checkpoint=True)
+        for ix in range(0, len(pks), size)
+    ]
+    logger.info(f"Dispatching {len(pks)} accounts to {len(subtasks)} update shards")
+    chord(group(subtasks))(finish_update_all_users.s(last_update=last_update))
+    return {"shards": len(subtasks), "accounts": len(pks)}
+
+
+@shared_task()
+def finish_update_all_users(results, last_update=None):
+    """Merge the statistics from the update shards, refresh the module statistics and record the time of the update.
+
+    Args:
+        results (list of dict):
+            The statistics returned by each shard.
+
+    Keyword Arguments:
+        last_update (datetime, str, None):
+            If given, stored as config.LAST_MINERVA_UPDATE.
+
+    Returns:
+        (dict):
+            Totals of accounts and summaries updated, chunks processed and seconds spent across all shards.
+    """
+    stats = {"shards": len(results), "accounts": 0, "summaries": 0, "chunks": 0, "seconds": 0.0}
+    for result in results:
+        for key, value in result.items():
+            stats[key] += value
+    # Refreshed here, once, rather than by each shard - the shards share modules and would upsert the same rows.
+    _refresh_module_stats(apps.get_model("minerva", "module").objects.filter(student_enrollments__isnull=False))
+    if last_update is not None:
+        config.LAST_MINERVA_UPDATE = parse(last_update) if isinstance(last_update, str) else last_update
+        logger.debug("Updated constance.config")
+    logger.info(f"Update all users finished {stats}")
+    return stats
+
+
+def _update_in_chunks(candidates, checkpoint=None):
+    """Update accounts in pk order, ``UPDATE_USERS_CHUNK_SIZE`` at a time.
+
+    Each chunk is fetched with its own prefetches and updated in its own transaction.
+
+    Args:
+        candidates (QuerySet):
+            The pks of the accounts to update, ordered by pk.
+
+    Keyword Arguments:
+        checkpoint (str, None):
+            If given, a cache key under which the last pk of each completed chunk is stored, and from which a
+            previously interrupted run is resumed.
+
+    Returns:
+        (dict):
+            Totals of accounts and summaries updated, chunks processed and seconds spent.
+    """
+    chunk_size = getattr(settings, "UPDATE_USERS_CHUNK_SIZE", 200)
+    timeout = getattr(settings, "UPDATE_USERS_CHECKPOINT_TIMEOUT", None)
+    last_pk = cache.get(checkpoint, 0) if checkpoint else 0
+    if last_pk:
+        logger.info(f"Resuming update after account {last_pk}")
+    stats = {"accounts": 0, "summaries": 0, "chunks": 0, "seconds": 0.0}
+    while chunk := list(candidates.filter(pk__gt=last_pk)[:chunk_size]):
+        start = perf_counter()
+        with transaction.atomic():
+            chunk_stats = _update_engine(_accounts_for_update(chunk))
+        elapsed = perf_counter() - start
+        last_pk = chunk[-1]
+        if checkpoint:
+            cache.set(checkpoint, last_pk, timeout)
+        for key, value in chunk_stats.items():
+            stats[key] += value
+        stats["chunks"] += 1
+        stats["seconds"] += elapsed
+        logger.info(
+            f"Updated {chunk_stats['accounts']} accounts to pk {last_pk} in {elapsed:.2f}s "
+            + f"({chunk_stats['accounts'] / max(elapsed, 1e-6):.1f} accounts/s)"
+        )
+    if checkpoint:
+        cache.delete(checkpoint)
+    return stats
+
+
+def _refresh_module_stats(modules):
+    """Refresh the materialised Test_Stats and VITAL_Stats of every test and VITAL on *modules*."""
+    # external imports
+    from minerva.models import Test, Test_Stats
+    from vitals.models import VITAL, VITAL_Stats
+
+    Test_Stats.refresh(Test.objects.filter(module__in=modules))
+    VITAL_Stats.refresh(VITAL.objects.filter(module__in=modules))
+
+
+def _accounts_for_update(pks):
+    """Return the accounts with primary keys *pks* with the prefetches that _update_engine uses."""
+    return Account.objects.filter(pk__in=pks).prefetch_related("modules", "module_enrollments")
 
 
 def _update_engine(accounts):
-    """Do the actual updating of user accounts"""
+    """Do the actual updating of user accounts.
+
+    Returns:
+        (dict):
+            The number of accounts and summary scores updated.
+    """
+    # external imports
+    from minerva.models import TEST_STATS_BATCH
+    from vitals.models import VITAL_PROGRESS_BATCH, VITAL_Completion
+
     TestCategory = apps.get_model("minerva", "testcategory")
     SummaryScore = apps.get_model("minerva", "summaryscore")
     VITAL = apps.get_model("vitals", "vital")
+    touched_modules = set()
+    touched_students = []
 
     # RFemnove summary scores for categories that we no longer track
     summaries = SummaryScore.objects.filter(student__in=accounts)
     valid_categories = TestCategory.objects.filter(Q(in_dashboard=True) | Q(dashboard_plot=True))
     summaries.exclude(category__in=valid_categories).distinct().delete()
 
-    for account in accounts.all():
-        vital_list = VITAL.objects.filter(module__in=account.modules.all())
-        logger.debug(f"Updating for {account=} total of {vital_list.count()=} VITALs")
-        for vital in vital_list:
-            if vital.check_vital(account):
-                logger.debug(f"{account} updated")
-        # Drop summaries that relate to modules we're not enrolled in now.
-        account.summary_scores.exclude(module__in=account.modules.all()).delete()
-        summaries = account.summary_scores.filter(module__in=account.modules.all())
-        valid_summary_pk = [x[0] for x in summaries.values_list("category")]
-        for cat in (
-            valid_categories.filter(module__in=account.modules.all()).exclude(pk__in=valid_summary_pk).distinct()
-        ):  # Only the categories for modules account is enrolled in, minus ones where a summary already exists.
-            summary, _ = SummaryScore.objects.get_or_create(
-                enrollment=account.module_enrollments.get(module=cat.module), category=cat
-            )
-        summaries = account.summary_scores.filter(module__in=account.modules.all())
-        for summary in summaries:
-            summary.save()
-        try:
-            summary = np.array(summaries.values_list("module__credits", "category__weighting", "score")).astype(float)
-            if summary.size == 0:  # No results must be a zero score
-                account.activity_score = np.nan
-            else:
-                summary = summary[~np.any(np.isnan(summary), axis=1)]  # remove NaNs
-                account.activity_score = float(
-                    np.nansum(np.nanprod(summary, axis=1)) / np.nansum(np.nanprod(summary[:, :2], axis=1))
-                )
-        except (ValueError, ZeroDivisionError):
-            account.activity_score = np.nan
-        logger.debug(f"Setting account {account} activity_score {account.activity_score}")
-        account.save()
+    account_list = list(accounts.all())
+    pending = []  # Summaries to be recalculated in bulk once every account has been checked
+    # The progress tables and dashboards are refreshed for the whole batch below.
+    with TEST_STATS_BATCH.suspended(), VITAL_PROGRESS_BATCH.suspended(), DASHBOARD_BATCH.suspended():
+        for account in account_list:
+            module_ids = [module.pk for module in account.modules.all()]  # Uses the prefetch
+            enrollments = {enrollment.module_id: enrollment for enrollment in account.module_enrollments.all()}
+            vital_list = VITAL.objects.filter(module__in=module_ids)
+            logger.debug(f"Updating for {account=} total of {vital_list.count()=} VITALs")
+            for vital in vital_list:
+                if vital.check_vital(account):
+                    logger.debug(f"{account} updated")
+            # Drop summaries that relate to modules we're not enrolled in now.
+            account.summary_scores.exclude(module__in=module_ids).delete()
+            summaries = account.summary_scores.filter(module__in=module_ids)
+            valid_summary_pk = [x[0] for x in summaries.values_list("category")]
+            for cat in (
+                valid_categories.filter(module__in=module_ids).exclude(pk__in=valid_summary_pk).distinct()
+            ):  # Only the categories for modules account is enrolled in, minus ones where a summary already exists.
+                summary, _ = SummaryScore.objects.get_or_create(enrollment=enrollments[cat.module_id], category=cat)
+            touched_modules.update(module_ids)
+            touched_students.append(account.pk)
+            pending.extend(summaries.select_related("category"))
+
+    # Recalculate every summary a category at a time and write them back together.
+    SummaryScore.bulk_calculate(pending)
+
+    # Recalculate the activity scores of the whole batch together.
+    Account.update_activity_scores(account_list)
+
+    # That is written with bulk_update, which skips Account.save, so fill in missing schools from programmes here.
+    Account.objects.filter(pk__in=touched_students, school=None, programme__school__isnull=False).update(
+        school=Subquery(Programme.objects.filter(pk=OuterRef("programme")).values("school")[:1])
+    )
+
+    # Rebuild the dashboard charts now that the scores are up to date.
+    DashboardSnapshot.rebuild(account_list)
+
+    # Refresh the VITAL completion of just the students in this batch - the module wide Test_Stats and VITAL_Stats
+    # are refreshed once the whole run has finished.
+    VITAL_Completion.refresh(touched_modules, students=Account.objects.filter(pk__in=touched_students))
+    return {"accounts": len(account_list), "summaries": len(pending)}
 
 
 @shared_task()
@@ -2,9 +2,11 @@
 
 # Django imports
 from django.contrib.auth import get_user_model
+from django.db import connection
 from django.db.utils import IntegrityError
 
 # external imports
+import numpy as np
 import pytest
 
 
@@ -309,3 +311,479 @@ class TestAccount:
         users = list(User.objects.all())
         assert users[0].last_name == "Apple"
         assert users[1].last_name == "Zebra"
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestUpdateAllUsers:
+    """Test the chunked update_all_users task."""
+
+    def test_chunks_and_resume(self, sample_module, sample_status_code, settings):
+        """Test that accounts are processed in chunks and that a checkpoint resumes a run part way through.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            settings: The pytest-django settings fixture.
+
+        Examples:
+            >>> settings.UPDATE_USERS_CHUNK_SIZE = 2
+            >>> update_all_users()["chunks"]
+            2
+        """
+        # Django imports
+        from django.core.cache import cache
+
+        # app imports
+        from .tasks import UPDATE_USERS_CHECKPOINT, update_all_users
+
+        settings.UPDATE_USERS_CHUNK_SIZE = 2
+        settings.UPDATE_USERS_SHARDS = 1
+        User = get_user_model()
+        users = [User.objects.create(username=f"user{ix}", number=ix, last_name=f"User{ix}") for ix in range(1, 4)]
+        User.objects.create(username="unenrolled", number=99)
+        sample_module.students.add(*users)
+
+        stats = update_all_users()
+        assert (stats["accounts"], stats["chunks"]) == (3, 2)
+        assert cache.get(UPDATE_USERS_CHECKPOINT) is None
+
+        cache.set(UPDATE_USERS_CHECKPOINT, users[0].pk)
+        stats = update_all_users()
+        assert (stats["accounts"], stats["chunks"]) == (2, 1)
+        assert cache.get(UPDATE_USERS_CHECKPOINT) is None
+
+    def test_sharded_update(self, sample_module, sample_status_code, settings):
+        """Test that the accounts are split between shards and the update time is only recorded at the end.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            settings: The pytest-django settings fixture.
+
+        Examples:
+            >>> settings.UPDATE_USERS_SHARDS = 2
+            >>> update_all_users(last_update=now)
+            {'shards': 2, 'accounts': 3}
+        """
+        # Django imports
+        from django.utils import timezone as tz
+
+        # external imports
+        from constance import config
+
+        # app imports
+        from .tasks import finish_update_all_users, update_all_users
+
+        settings.UPDATE_USERS_SHARDS = 2
+        User = get_user_model()
+        users = [User.objects.create(username=f"user{ix}", number=ix, last_name=f"User{ix}") for ix in range(1, 4)]
+        sample_module.students.add(*users)
+        now = tz.now().replace(microsecond=0)
+
+        assert update_all_users(last_update=now.isoformat()) == {"shards": 2, "accounts": 3}
+        assert config.LAST_MINERVA_UPDATE == now
+
+        stats = finish_update_all_users(
+            [{"accounts": 2, "summaries": 4, "chunks": 1, "seconds": 0.5}, {"accounts": 1, "summaries": 2}]
+        )
+        assert stats == {"shards": 2, "accounts": 3, "summaries": 6, "chunks": 1, "seconds": 0.5}
+
+    def test_shard_resumes_from_checkpoint(self, sample_module, sample_status_code, settings):
+        """Test that a re-dispatched shard resumes from its own checkpoint and clears it when it finishes.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            settings: The pytest-django settings fixture.
+
+        Examples:
+            >>> cache.set(f"{UPDATE_USERS_CHECKPOINT}:{first}-{last}", first)
+            >>> update_specified_users(pks, checkpoint=True)["accounts"]
+            2
+        """
+        # Django imports
+        from django.core.cache import cache
+
+        # app imports
+        from .tasks import UPDATE_USERS_CHECKPOINT, update_specified_users
+
+        settings.UPDATE_USERS_CHUNK_SIZE = 1
+        User = get_user_model()
+        users = [User.objects.create(username=f"user{ix}", number=ix, last_name=f"User{ix}") for ix in range(1, 4)]
+        sample_module.students.add(*users)
+        pks = [user.pk for user in users]
+        key = f"{UPDATE_USERS_CHECKPOINT}:{pks[0]}-{pks[-1]}"
+
+        cache.set(key, pks[0])
+        stats = update_specified_users(pks, refresh_stats=False, checkpoint=True)
+        assert (stats["accounts"], stats["chunks"]) == (2, 2)
+        assert cache.get(key) is None
+
+        cache.set(key, pks[0])  # Without checkpointing, a run of the same accounts ignores the checkpoint
+        assert update_specified_users(pks, refresh_stats=False)["accounts"] == 3
+        cache.delete(key)
+
+    def test_update_sets_school_from_programme(self, sample_module, sample_user, sample_status_code, sample_programme):
+        """Test that updating an account without a school sets it from the account's programme, as saving it does.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_status_code (StatusCode): The registered status code.
+            sample_programme (Programme): The sample user's programme.
+
+        Examples:
+            >>> update_specified_users([account.pk])
+            >>> Account.objects.get(pk=account.pk).school == account.programme.school
+            True
+        """
+        # app imports
+        from .models import Account, School
+        from .tasks import update_specified_users
+
+        school = School.objects.create(name="Physics", code="PHAS")
+        sample_programme.school = school
+        sample_programme.save()
+        sample_module.students.add(sample_user)
+        Account.objects.filter(pk=sample_user.pk).update(school=None)
+
+        update_specified_users([sample_user.pk], refresh_stats=False)
+        assert Account.objects.get(pk=sample_user.pk).school == school
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestActivityScores:
+    """Test the cohort wide activity score calculation."""
+
+    def test_weighted_activity_scores(self):
+        """Test that activity scores are credit and category weighted means that ignore missing scores.
+
+        Examples:
+            >>> weighted_activity_scores(np.array([[1, 10, 1, 100.0], [1, 10, 3, 60.0]]))
+            {1: 70.0}
+        """
+        # app imports
+        from .models import weighted_activity_scores
+
+        rows = np.array(
+            [
+                [1, 10, 1, 100.0],
+                [1, 10, 3, 60.0],
+                [1, 20, 1, np.nan],
+                [2, 20, 1, 50.0],
+                [3, 10, 1, np.nan],
+                [4, 0, 1, 5],
+            ]
+        )
+        scores = weighted_activity_scores(rows)
+        assert scores.keys() == {1, 2, 4}
+        assert scores[1] == pytest.approx(70.0)
+        assert scores[2] == pytest.approx(50.0)
+        assert np.isnan(scores[4])
+
+    def test_credit_weighted_scores(self):
+        """Test that category scores count summaries without a score as zero and keys without any as NaN.
+
+        Examples:
+            >>> credit_weighted_scores([1, 1], [15, 15], [100.0, None])
+            {1: 50.0}
+        """
+        # app imports
+        from .models import credit_weighted_scores
+
+        scores = credit_weighted_scores(
+            ["hw", "hw", "hw", "lab", "vitals"], [15, 15, 30, 15, 0], [90, 50, None, None, 5]
+        )
+        assert scores.keys() == {"hw", "lab", "vitals"}
+        assert scores["hw"] == pytest.approx(35.0)
+        assert np.isnan(scores["lab"]) and np.isnan(scores["vitals"])
+        assert credit_weighted_scores([], [], []) == {}
+
+    def test_update_activity_scores(self, sample_module, sample_user, sample_status_code):
+        """Test that only changed activity scores are written back.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> Account.update_activity_scores([account])
+            1
+        """
+        # app imports
+        from .models import Account
+
+        sample_module.students.add(sample_user)
+        Account.objects.filter(pk=sample_user.pk).update(activity_score=50.0)
+
+        assert Account.update_activity_scores([sample_user]) == 1
+        assert Account.objects.get(pk=sample_user.pk).activity_score is None
+        assert Account.update_activity_scores() == 0
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestProgressSnapshot:
+    """Test the account level progress snapshots behind the cohort progression plots."""
+
+    def test_take_bands_and_series(self, sample_module, sample_user, sample_status_code):
+        """Test that snapshots are taken from the summary scores and read back as bands and student lines.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> ProgressSnapshot.take()
+            2
+        """
+        # external imports
+        from django.utils import timezone as tz
+        from minerva.models import ModuleEnrollment, SummaryScore, TestCategory
+
+        # app imports
+        from .models import ProgressSnapshot
+
+        category = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw", weighting=2)
+        sample_module.students.add(sample_user)
+        enrollment = ModuleEnrollment.objects.get(module=sample_module, student=sample_user)
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {SummaryScore._meta.db_table} "
+                + "(module_id, student_id, enrollment_id, category_id, score, data) VALUES (%s, %s, %s, %s, %s, '{}')",
+                [sample_module.pk, sample_user.pk, enrollment.pk, category.pk, 80.0],
+            )
+
+        yesterday = tz.now().date() - tz.timedelta(days=1)
+        assert ProgressSnapshot.take(date=yesterday) == 2
+        assert ProgressSnapshot.take(date=yesterday) == 2
+        assert set(ProgressSnapshot.objects.values_list("metric", "score")) == {
+            ("activity_score", 80.0),
+            ("tests_score", 80.0),
+        }
+
+        SummaryScore.objects.update(score=60.0)
+        ProgressSnapshot.take()
+        bands = ProgressSnapshot.bands("tests_score")
+        assert list(bands.columns) == [10, 25, 50, 75, 90]
+        assert bands[50].tolist() == [80.0, 60.0]
+        assert ProgressSnapshot.bands("engagement").empty
+        series = ProgressSnapshot.series("tests_score", [sample_user.number])
+        assert series[sample_user.number].tolist() == [80.0, 60.0]
+
+    def test_take_matches_shown_scores(self, sample_module, sample_user, sample_status_code):
+        """Test that a snapshot of a category with an unscored summary matches the score the student is shown.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> ProgressSnapshot.objects.get(metric="tests_score").score == account.tests_score
+            True
+        """
+        # external imports
+        from minerva.models import ModuleEnrollment, SummaryScore, TestCategory
+
+        # app imports
+        from .dashboard import category_score
+        from .models import Account, ProgressSnapshot
+
+        sample_module.students.add(sample_user)
+        enrollment = ModuleEnrollment.objects.get(module=sample_module, student=sample_user)
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            for category_id, score in (("hw1", 80.0), ("hw2", None)):
+                category = TestCategory.objects.create(module=sample_module, text="Homework", category_id=category_id)
+                cursor.execute(
+                    f"INSERT INTO {SummaryScore._meta.db_table} (module_id, student_id, enrollment_id, category_id, "
+                    + "score, data) VALUES (%s, %s, %s, %s, %s, '{}')",
+                    [sample_module.pk, sample_user.pk, enrollment.pk, category.pk, score],
+                )
+
+        ProgressSnapshot.take()
+        snapshots = dict(ProgressSnapshot.objects.values_list("metric", "score"))
+        account = Account.objects.get(pk=sample_user.pk)
+        assert snapshots["tests_score"] == account.tests_score == pytest.approx(40.0)
+        assert category_score(account.summary_scores.select_related("module")) == pytest.approx(40.0)
+        assert snapshots["activity_score"] == pytest.approx(80.0)  # The overall score leaves unscored summaries out
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestDashboardSnapshot:
+    """Test building the pre-rendered student dashboard."""
+
+    def test_dashboard_data_and_staleness(self, sample_module, sample_user, sample_status_code):
+        """Test that the dashboard is built from the summary scores and goes stale after a gradebook import.
+
+        Args:
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> dashboard_data(account)["scores"]
+            {'homework': 80.0}
+        """
+        # external imports
+        from constance.test import override_config
+        from django.utils import timezone as tz
+        from minerva.models import ModuleEnrollment, SummaryScore, TestCategory
+
+        # app imports
+        from .dashboard import dashboard_data
+        from .models import DashboardSnapshot
+
+        assert DashboardSnapshot.rebuild([sample_user]) == []
+
+        category = TestCategory.objects.create(
+            module=sample_module, text="Homework", category_id="hw", dashboard_plot=True
+        )
+        sample_module.students.add(sample_user)
+        enrollment = ModuleEnrollment.objects.get(module=sample_module, student=sample_user)
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {SummaryScore._meta.db_table} "
+                + "(module_id, student_id, enrollment_id, category_id, score, data) VALUES (%s, %s, %s, %s, %s, %s)",
+                [
+                    sample_module.pk,
+                    sample_user.pk,
+                    enrollment.pk,
+                    category.pk,
+                    80.0,
+                    '{"data": {"Passed": 4, "Not attempted": 1}, "colours": {"Passed": "green"}}',
+                ],
+            )
+
+        data = dashboard_data(sample_user)
+        assert data["categories"] == [{"tag": "homework", "text": "Homework"}]
+        assert data["scores"] == {"homework": 80.0}
+        image, alt = data["plots"]["homework"]
+        assert image.startswith("data:image/svg")
+        assert alt == "Homework resultsPassed:4 Not attempted:1"
+
+        snapshot = DashboardSnapshot(student=sample_user, updated=tz.now(), data=data)
+        with override_config(LAST_MINERVA_UPDATE=tz.now() - tz.timedelta(hours=1)):
+            assert not snapshot.stale
+        with override_config(LAST_MINERVA_UPDATE=tz.now() + tz.timedelta(hours=1)):
+            assert snapshot.stale
+
+    def test_result_change_outdates_snapshot(self, sample_vital, sample_user, django_capture_on_commit_callbacks):
+        """Test that saving one of a student's results marks their snapshot stale and queues it to be rebuilt.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            django_capture_on_commit_callbacks (callable): Runs the transaction's on-commit callbacks.
+
+        Examples:
+            >>> VITAL_Result.objects.create(vital=vital, user=account, passed=True)
+            >>> DashboardSnapshot.objects.get(student=account).stale
+            True
+        """
+        # external imports
+        from constance.test import override_config
+        from django.utils import timezone as tz
+        from vitals.models import VITAL_Result
+
+        # app imports
+        from .models import DASHBOARD_BATCH, DashboardSnapshot
+
+        with override_config(LAST_MINERVA_UPDATE=tz.now() - tz.timedelta(hours=1)):
+            snapshot = DashboardSnapshot(student=sample_user, updated=tz.now(), outdated=True)
+            assert snapshot.stale
+            snapshot.outdated = False
+            assert not snapshot.stale
+
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {DashboardSnapshot._meta.db_table} (student_id, updated, outdated, data) "
+                + "VALUES (%s, %s, %s, %s)",
+                [sample_user.pk, tz.now(), False, '{"categories": []}'],
+            )
+        with django_capture_on_commit_callbacks():
+            VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
+        assert DASHBOARD_BATCH.pending == {sample_user.pk}
+        DASHBOARD_BATCH.pending.clear()
+
+        with django_capture_on_commit_callbacks(execute=True):
+            VITAL_Result.objects.filter(vital=sample_vital, user=sample_user).delete()
+        assert not DASHBOARD_BATCH.pending
+        # The queued rebuild runs eagerly and drops the snapshot, since the student has nothing to plot.
+        assert not DashboardSnapshot.objects.filter(student=sample_user).exists()
+
+    def test_outdate_throttles_rebuilds(self, sample_user, monkeypatch):
+        """Test that outdating a snapshot repeatedly marks it stale each time but queues one rebuild.
+
+        Args:
+            sample_user (Account): A test user instance.
+            monkeypatch (pytest.MonkeyPatch): Records the queued rebuilds instead of running them.
+
+        Examples:
+            >>> DashboardSnapshot.outdate([account.pk])
+            >>> DashboardSnapshot.outdate([account.pk])
+            >>> assert queued == [[account.pk]]
+        """
+        # Django imports
+        from django.core.cache import cache
+        from django.utils import timezone as tz
+
+        # app imports
+        from . import tasks
+        from .models import DASHBOARD_REBUILD_PREFIX, DashboardSnapshot
+
+        queued = []
+        monkeypatch.setattr(tasks.update_dashboard_snapshots, "delay", queued.append)
+        cache.delete(f"{DASHBOARD_REBUILD_PREFIX}:{sample_user.pk}")
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {DashboardSnapshot._meta.db_table} (student_id, updated, outdated, data) "
+                + "VALUES (%s, %s, %s, %s)",
+                [sample_user.pk, tz.now(), False, '{"categories": []}'],
+            )
+
+        for _ in range(3):
+            DashboardSnapshot.outdate([sample_user.pk])
+            assert DashboardSnapshot.objects.get(student=sample_user).outdated
+            DashboardSnapshot.objects.filter(student=sample_user).update(outdated=False)
+        assert queued == [[sample_user.pk]]
+        assert DashboardSnapshot.queue_rebuild([sample_user.pk]) == []
+        cache.delete(f"{DASHBOARD_REBUILD_PREFIX}:{sample_user.pk}")
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSummaryVersion:
+    """Test the per-student version number that keys cached summary pages."""
+
+    def test_version_bumped_by_results(self, sample_vital, sample_user):
+        """Test that the version is stable until one of the student's results changes.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+
+        Examples:
+            >>> bump_summary_version(account.pk)
+            >>> summary_version(account.pk) != old_version
+            True
+        """
+        # external imports
+        from vitals.models import VITAL_Result
+
+        # app imports
+        from .models import bump_summary_version, summary_version
+
+        version = summary_version(sample_user.pk)
+        assert summary_version(sample_user.pk) == version
+
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
+        assert (bumped := summary_version(sample_user.pk)) != version
+
+        bump_summary_version()
+        assert summary_version(sample_user.pk) == bumped
@@ -1,19 +1,21 @@
 """View classes for the accounts app."""
 
 # Python imports
+import hashlib
 from collections import namedtuple
 from functools import partial
-from pathlib import Path
 
 # Django imports
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth.views import PasswordChangeView
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.mail import EmailMessage
-from django.db.models import FloatField, Min, OuterRef, Q, Subquery
+from django.db.models import FloatField, Max, Min, OuterRef, Q, Subquery
 from django.http import HttpResponse, HttpResponseRedirect
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.template import loader
 from django.urls import reverse_lazy
 from django.utils import timezone as tz
@@ -38,6 +40,7 @@ from util.views import (
 )
 
 # app imports
+from .dashboard import dashboard_data
 from .forms import (
     AllStudentSelectForm,
     CohortFilterActivityScoresForm,
@@ -46,30 +49,13 @@ from .forms import (
     ToggleVITALForm,
     TutorSelectForm,
 )
-from .models import Account
+from .models import PROGRESS_METRICS, Account, DashboardSnapshot, ProgressSnapshot, summary_version
 
 TEMPLATE_PATH = settings.PROJECT_ROOT_PATH / "run" / "templates" / "Tutor_Report.xlsx"
 
 ImageData = namedtuple("ImageData", ["data", "alt"], defaults=["", ""])
 
 
-def pie_chart(data, colours):
-    """Make a Pie chart for the student dashboard."""
-    if any([x > 0 for x in data.values()]):
-        fig, ax = plt.subplots()
-        fig.set_figwidth(4.5)
-        _, texts = ax.pie(list(data.values()), labels=list(data.keys()), colors=colours, labeldistance=0.3)
-        for text in texts:
-            text.set_bbox({"facecolor": (1, 1, 1, 0.75), "edgecolor": (1, 1, 1, 0.25)})
-        plt.tight_layout()
-    else:
-        fig = plt.figure()
-        fig.set_figwidth(4.5)
-    data = svg_data(fig, base64=True)
-    plt.close()
-    return data
-
-
 class ChangePasswordView(PasswordChangeView):
     """Implement a minimal change password for admin user accounts."""
 
@@ -103,7 +89,46 @@ class TutorGroupEmailsView(IsSuperuserViewMixin, FormView):
         return super().form_valid(form)
 
 
-class StudentSummaryPageView(IsStudentViewixin, HTMXProcessMixin, TemplateView):
+class StudentFragmentCacheMixin:
+    """Serve a rendered part of a student's summary from the cache until the student's summary version changes.
+
+    The cache key includes the student's :func:`accounts.models.summary_version`, which the score, VITAL and
+    attendance pipelines bump whenever the student's results change, so nothing needs to be deleted explicitly.
+    Responses carry an ETag of the content, so a repeated HTMX poll for an unchanged tab gets a 304.
+    """
+
+    def get_fragment_key(self):
+        """Return the cache key for this request's fragment, or None if the student doesn't exist."""
+        field = "username" if "username" in self.kwargs else "number"
+        students = Account.objects.filter(**{field: self.kwargs[field]}).values_list("pk", flat=True)
+        if (student := students.first()) is None:
+            return None
+        elements = list(self.htmx_elements()) if getattr(self.request, "htmx", False) else []
+        variant = repr((type(self).__name__, sorted(self.kwargs.items()), elements)).encode()
+        return f"accounts:fragment:{student}:{summary_version(student)}:{hashlib.md5(variant).hexdigest()}"
+
+    def get(self, request, *args, **kwargs):
+        """Send the cached fragment, rendering and caching it first if needed."""
+        if (key := self.get_fragment_key()) is None:
+            return super().get(request, *args, **kwargs)
+        if (cached := cache.get(key)) is None:
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            response.render()
+            etag = f'"{hashlib.md5(response.content).hexdigest()}"'
+            cached = (etag, response.content, response["Content-Type"])
+            cache.set(key, cached, timeout=getattr(settings, "STUDENT_FRAGMENT_TIMEOUT", 15 * 60))
+        etag, content, content_type = cached
+        if (response := get_conditional_response(request, etag=etag)) is None:
+            response = HttpResponse(content, content_type=content_type)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        patch_vary_headers(response, ["HX-Request", "HX-Target", "HX-Trigger", "HX-Trigger-Name"])
+        return response
+
+
+class StudentSummaryPageView(IsStudentViewixin, StudentFragmentCacheMixin, HTMXProcessMixin, TemplateView):
     """View class to provide one page of the student summary."""
 
     def get_template_names(self):
@@ -131,17 +156,9 @@ class StudentSummaryPageView(IsStudentViewixin, HTMXProcessMixin, TemplateView):
     def get_context_data(self, **kwargs):
         """Get data for the student view."""
         if "username" in self.kwargs:
-            self.user = (
-                Account.objects.filter(username=self.kwargs["username"])
-                .prefetch_related("test_results", "vital_results")
-                .first()
-            )
+            self.user = Account.objects.filter(username=self.kwargs["username"]).first()
         else:
-            self.user = (
-                Account.objects.filter(number=self.kwargs["number"])
-                .prefetch_related("test_results", "vital_results")
-                .first()
-            )
+            self.user = Account.objects.filter(number=self.kwargs["number"]).first()
         self.modules = self.user.modules.all()
         # TODO - make this work for multiple modules and update template
         categories = []
@@ -162,43 +179,26 @@ class StudentSummaryPageView(IsStudentViewixin, HTMXProcessMixin, TemplateView):
 
     def get_context_data_vitals(self, **kwargs):
         """Get the context data for the tests page only."""
+        # external imports
+        from vitals.models import VITAL_Result
+
         context = super().get_context_data(**kwargs)
-        VITALS = self.user.VITALS.model.objects.filter(module__in=self.modules).order_by(
-            "module", "start_date", "VITAL_ID"
-        )
-        vitals_results = {}
-        for vital in VITALS:
-            try:
-                vitals_results[vital.module] = vitals_results.get(vital.module, []) + [
-                    self.user.vital_results.get(vital=vital)
-                ]
-            except ObjectDoesNotExist:
-                new_vr = self.user.vital_results.model(user=self.user, vital=vital, passed=False)
-                vitals_results[vital.module] = vitals_results.get(vital.module, []) + [new_vr]
         context |= {
-            "VITALS": VITALS,
-            "vitals_results": vitals_results,
+            "vitals_results": VITAL_Result.for_student(self.user, self.modules),
             "tab": self.kwargs.get("selected_tab", "#vitals"),
         }
         return context
 
     def get_context_data_required_work(self, **kwargs):
         """Get the context data for the tests page only."""
+        # external imports
+        from minerva.models import Test_Score, vitals_tooltips
+
         context = super().get_context_data(**kwargs)
-        required = {}
-        # Convert to list to avoid evaluating the queryset multiple times
-        required_tests = list(self.user.required_tests.all())
-        # Build a dict of test results for faster lookup
-        test_results_dict = {tr.test: tr for tr in self.user.test_results.filter(test__in=required_tests)}
-
-        for test in required_tests:
-            if test in test_results_dict:
-                required[test] = test_results_dict[test]
-            else:
-                new_tr = self.user.test_results.model(user=self.user, test=test, passed=False, score=None)
-                new_tr.test_status = new_tr.manual_test_satus
-                new_tr.standing = "Missing"
-                required[test] = new_tr
+        required = Test_Score.objects.for_student(
+            self.user, self.user.required_tests.select_related("module", "category")
+        )
+        vitals_tooltips(required.values())
         context |= {
             "required": required,
             "tab": self.kwargs.get("selected_tab", "#required"),
@@ -206,87 +206,46 @@ class StudentSummaryPageView(IsStudentViewixin, HTMXProcessMixin, TemplateView):
         return context
 
     def get_context_data_dashboard(self, **kwargs):
-        """Get data for the student view."""
+        """Get data for the student view from their dashboard snapshot, building it if there isn't one."""
         context = super().get_context_data(**kwargs)
-        # get my categories for pie charts.
-        TestCategory = apps.get_model("minerva", "testcategory")
-        cat_ids = set(
-            [x[0] for x in self.user.summary_scores.filter(category__dashboard_plot=True).values_list("category")]
-        )
-        categories = {
-            x.text: x for x in TestCategory.objects.filter(pk__in=cat_ids, dashboard_plot=True).order_by("order")
-        }
-        context["plot_categories"] = list(categories.values())
-        context["plots"] = {}
-        context["scores"] = {}
-        for category in categories.values():
-            if category.tag != "test":
-                plotter = getattr(self, f"{category.tag}_plot", partial(self.test_plot, category.text))
-            else:
-                plotter = partial(self.test_plot, category.text)
-            context["plots"][category.tag] = plotter()
-            context["scores"][category.tag] = self.user.category_score(category.text)
+        snapshot = DashboardSnapshot.objects.filter(student=self.user).first()
+        if snapshot is None:
+            snapshot = DashboardSnapshot(student=self.user, updated=tz.now(), data=dashboard_data(self.user))
+            if snapshot.data["categories"]:
+                snapshot.save()
+        elif snapshot.stale:
+            DashboardSnapshot.queue_rebuild([self.user.pk])
+        context["plot_categories"] = snapshot.data["categories"]
+        context["plots"] = {tag: ImageData(*plot) for tag, plot in snapshot.data["plots"].items()}
+        context["scores"] = snapshot.data["scores"]
 
         context |= {
             "user": self.user,
+            "snapshot": snapshot,
             "tab": self.kwargs.get("selected_tab", "#tests"),
         }
         return context
 
     def get_context_data_category(self, **kwargs):
         """Get the context data for the tests page only."""
+        # external imports
+        from minerva.models import Test_Score, vitals_tooltips
+
         context = super().get_context_data(**kwargs)
-        Tests = self.user.tests.model.objects.filter(
-            module__in=self.modules, category__text=self.category.text
-        ).order_by("release_date", "name")
-        test_scores = {}
-        for test in Tests:
-            try:
-                test_scores[test] = self.user.test_results.get(test=test)
-            except ObjectDoesNotExist:
-                new_tr = self.user.test_results.model(user=self.user, test=test, passed=False, score=None)
-                new_tr.test_status = new_tr.manual_test_satus
-                new_tr.standing = "Missing"
-                test_scores[test] = new_tr
+        Tests = (
+            self.user.tests.model.objects.filter(module__in=self.modules, category__text=self.category.text)
+            .select_related("module", "category")
+            .order_by("release_date", "name")
+        )
+        test_scores = Test_Score.objects.for_student(self.user, Tests)
+        vitals_tooltips(test_scores.values())
         context |= {
-            "tests": Tests,
+            "tests": list(test_scores),
             "scores": test_scores,
             "tab": self.kwargs.get("selected_tab", f"{self.category.hashtag}"),
         }
         return context
 
-    def tutorial_plot(self):
-        """Make piechart for a student's engagement scores."""
-        data = {}
-        colours = []
-        scores = self.user.engagement_scores()
-        for (score, label, _), col in zip(
-            settings.TUTORIAL_MARKS, ["silver", "tomato", "springgreen", "mediumseagreen", "forestgreen"]
-        ):
-            if count := scores[np.isclose(scores, score)].size:
-                data[label] = count
-                colours.append(col)
-        alt = "Tutproal attendance" + " ".join([f"{label}:{count}" for label, count in data.items()])
-        return ImageData(pie_chart(data, colours), alt)
-
-    def test_plot(self, category_name):
-        """Make a pie chart plot from the summary_scores."""
-        data = {}
-        colours = {}
-        # Get all summary scores with the same category label and merge them 0 allows for multiple modules
-        # with the same category labels.
-        for ss in self.user.summary_scores.filter(category__text=category_name):
-            for k, value in ss.data.get("data", {}).items():
-                data[k] = data.get(k, 0) + value
-                colours[k] = ss.data.get("colours", {}).get(k, "white")
-        colours = [colours.get(x, "white") for x in data]
-        alt = f"{category_name.title()} results" + " ".join([f"{label}:{count}" for label, count in data.items()])
-        try:
-            image = pie_chart(data, colours)
-        except ValueError:
-            image = bytes([])
-        return ImageData(image, alt)
-
 
 class StudentSummaryView(IsStudentViewixin, TemplateView):
     """View class to provide students with summary."""
@@ -377,6 +336,13 @@ class CohortFilterActivityScoresView(IsSuperuserViewMixin, FormListView):
     context_object_name = "students"
 
     def get_queryset(self):
+        """Return the filtered students with their summary scores prefetched for the score columns."""
+        # external imports
+        from minerva.models import SCORE_VECTOR_PREFETCH
+
+        return self._filter_students().prefetch_related(SCORE_VECTOR_PREFETCH)
+
+    def _filter_students(self):
         """Return either a filtered queryset, or empty queryset depending on form."""
         if not self.form.is_valid():
             return self.model.objects.none()
@@ -436,11 +402,9 @@ class CohortFilterActivityScoresExportView(CohortFilterActivityScoresView):
         fields["_activity_score"] = "Overall Activity"
         data = context["students"].values(*list([x for x in fields if not x.startswith("_")]))
         for student, row in zip(context["students"], data):
+            scores = {summary.category_id: summary.score for summary in student.summary_scores.all()}  # Prefetched
             for category in dashboard_categories:
-                try:
-                    row[f"_{category.text}"] = student.summary_scores.get(category=category).score
-                except ObjectDoesNotExist:
-                    row[f"_{category.text}"] = np.nan
+                row[f"_{category.text}"] = scores.get(category.pk, np.nan)
                 row["_activity_score"] = student.activity_score
         df = pd.DataFrame(data)[list(fields.keys())]
         df.rename(columns=fields, inplace=True)
@@ -504,11 +468,15 @@ class CohortScoresOverview(IsStaffViewMixin, TemplateView):
         if text := self.kwargs.get("text", None):
             cats = cats.filter(text__contains=text)
 
+        # The latest snapshot of each category in one query.
+        ScoreSnapshot = apps.get_model("minerva", "scoresnapshot")
+        latest = ScoreSnapshot.objects.filter(category=OuterRef("category")).order_by("-date").values("date")[:1]
         data = {}
-        for cat in cats.all():
-            if cat.xlsx.exists():
-                data[f"{cat.module.code}:{cat.label}"] = pd.read_excel(cat.xlsx).set_index("Date").iloc[-1]
-        data = pd.DataFrame(data).sort_index()
+        for code, label, number, score in ScoreSnapshot.objects.filter(
+            category__in=cats, date=Subquery(latest)
+        ).values_list("category__module__code", "category__label", "student__number", "score"):
+            data.setdefault(f"{code}:{label}", {})[number] = score
+        data = pd.DataFrame(data, dtype=float).sort_index()
         activity = {
             x[0]: x[1]
             for x in (
@@ -541,41 +509,39 @@ class CohortProgressionOverview(IsStaffViewMixin, TemplateView):
 
     def get_context_data(self, **kwargs):
         """Get data for the student view."""
-        sids = [x.number for x in Account.students.filter(tutorial_group__tutor=self.request.user)]
+        sids = list(Account.students.filter(tutorial_group__tutor=self.request.user).values_list("number", flat=True))
         return self._load_gif_data(super().get_context_data(**kwargs), sids)
 
     def _load_gif_data(self, context, sids=None):
-        """Load pre-prepared gif data."""
-        attrs = {
-            "activity_score": "Overall Activity",
-            "tests_score": "Homework Assignments",
-            "labs_score": "Lab Activities",
-            "coding_score": "Code Tasks",
-            "vitals_score": "VITALs Progress",
-            "engagement": "Tutorial Enghagement",
-        }
-
-        for attr, label in attrs.items():
-            if (data := (Path(settings.MEDIA_ROOT) / "data" / f"time_series_{attr}.xlsx")).exists():
-                df = pd.read_excel(data).set_index("Date")
-                inactive = set([x[0] for x in Account.objects.filter(is_active=False).values_list("number")])
-                ignore = list(set(df.columns) & inactive)
-                df = df.drop(labels=ignore, axis="columns")
-                ax = df.plot(kind="line", c=(0, 0, 0, 0.05), linewidth=10)
-                ax.set_title(f"{label} Progression")
-                ax.set_ylabel("% score")
-                ax.set_xlabel("Date")
-                ax.get_legend().remove()
-                ax.set_ylim(-5, 105)
-                if sids:  # Highlight my students
-                    for line in ax.lines:
-                        if int(line.get_label()) in sids:
-                            line.set_color((1.0, 0, 0, 0.25))
-                            line.set_zorder(len(ax.lines) + 1)
-                context[f"{attr}_plot"] = ImageData(data=svg_data(None, base64=True), alt=f"{label} Scores")
-                plt.close()
-            else:
-                context[f"{attr}_plot"] = data
+        """Plot the cohort percentile bands of each progress metric with the tutor's own students overlaid."""
+        latest = ProgressSnapshot.objects.aggregate(latest=Max("date"))["latest"]
+        for attr, (label, _) in PROGRESS_METRICS.items():
+            # The bands only change when a new snapshot is taken, so cache them against the latest date.
+            bands = cache.get_or_set(
+                f"accounts:progress_bands:{attr}:{latest}",
+                partial(ProgressSnapshot.bands, attr),
+                timeout=getattr(settings, "PROGRESS_BANDS_TIMEOUT", 24 * 60 * 60),
+            )
+            if bands.empty:
+                context[f"{attr}_plot"] = ImageData(alt=f"No {label} Scores yet")
+                continue
+            fig, ax = plt.subplots()
+            ax.fill_between(bands.index, bands[10], bands[90], color=(0, 0, 0, 0.1), label="10-90%")
+            ax.fill_between(bands.index, bands[25], bands[75], color=(0, 0, 0, 0.2), label="25-75%")
+            ax.plot(bands.index, bands[50], color="black", label="Median")
+            if sids:  # Highlight my students
+                mine = ProgressSnapshot.series(attr, sids)
+                if not mine.empty:
+                    ax.plot(mine.index, mine.to_numpy(), color=(1.0, 0, 0, 0.5))
+                    ax.lines[-1].set_label("My students")
+            ax.set_title(f"{label} Progression")
+            ax.set_ylabel("% score")
+            ax.set_xlabel("Date")
+            ax.set_ylim(-5, 105)
+            ax.legend(loc="lower left")
+            fig.autofmt_xdate()
+            context[f"{attr}_plot"] = ImageData(data=svg_data(fig, base64=True), alt=f"{label} Scores")
+            plt.close(fig)
         return context
 
 
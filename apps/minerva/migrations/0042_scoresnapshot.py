@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:21
+
+# Python imports
+from pathlib import Path
+
+# Django imports
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# external imports
+import pandas as pd
+
+
+def import_time_series(apps, schema_editor):
+    """Copy the per-category xlsx time series files written by take_time_series into the snapshot table."""
+    TestCategory = apps.get_model("minerva", "TestCategory")
+    ScoreSnapshot = apps.get_model("minerva", "ScoreSnapshot")
+    Account = apps.get_model("accounts", "Account")
+    students = dict(Account.objects.values_list("number", "pk"))
+    for category in TestCategory.objects.filter(dashboard_plot=True).select_related("module"):
+        tag = category.text.lower().strip().replace(" ", "_")
+        xlsx = Path(settings.MEDIA_ROOT) / "data" / category.module.code / f"{tag}_time_series.xlsx"
+        if not xlsx.exists():
+            continue
+        data = pd.read_excel(xlsx).set_index("Date")
+        snapshots = [
+            ScoreSnapshot(date=date.date(), category=category, student_id=students[number], score=score)
+            for (date, number), score in data.stack().items()
+            if number in students
+        ]
+        ScoreSnapshot.objects.bulk_create(snapshots, batch_size=1000, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("minerva", "0041_test_stats"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScoreSnapshot",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField()),
+                ("score", models.FloatField(blank=True, null=True)),
+                (
+                    "category",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="snapshots",
+                        to="minerva.testcategory",
+                    ),
+                ),
+                (
+                    "student",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="score_snapshots",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["category", "date"], name="snapshot_category_date_idx")],
+                "constraints": [
+                    models.UniqueConstraint(fields=("date", "category", "student"), name="Singleton snapshot per day")
+                ],
+            },
+        ),
+        migrations.RunPython(import_time_series, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,10 @@
 # Python imports
 """Models for integration with minerva."""
+
 # Python imports
 import logging
 import re
+from collections import defaultdict
 from datetime import datetime, timedelta
 from functools import cached_property
 from os import path
@@ -10,23 +12,35 @@ from pathlib import Path
 from zoneinfo import ZoneInfo
 
 # Django imports
+from django.apps import apps
 from django.conf import settings
-from django.core.exceptions import ObjectDoesNotExist
-from django.db import DEFAULT_DB_ALIAS, models, transaction
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ObjectDoesNotExist
+from django.db import DEFAULT_DB_ALIAS, connection, models, transaction
 from django.db.models import F, Prefetch, Q
 from django.forms import ValidationError
 from django.utils import timezone as tz
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 
 # external imports
 import numpy as np
+import pandas as pd
 import pytz
-from accounts.models import Account, School
+from accounts.models import Account, School, bump_summary_version, credit_weighted_scores, summary_version
 from constance import config
 from smart_selects.db_fields import ChainedForeignKey
+from util.clock import now as request_now
+from util.commit import CommitBatch
 from util.models import patch_model
 from util.spreadsheet import Spreadsheet
 
+try:
+    # external imports
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
 # app imports
 from . import json
 
@@ -85,22 +99,134 @@ def locate_named_group(pattern_str, group_name, sub=None):
     return pattern_str[: start + 1] + sub + pattern_str[i:]
 
 
-def vital_qs_to_html(queryset, user):
-    """Produce an html list from a queryset."""
-    if queryset.count() == 0:
-        return ""
-    ret = "<ul>\n"
-    for vital in queryset.all():
-        if vital in user.passed_vitals:
+def _vital_list_html(vital_ids, vitals, results, user_id, now):
+    """Produce an html list of VITALs, classed by whether the student has passed or failed each of them.
+
+    Args:
+        vital_ids (list of int):
+            The VITALs to list.
+        vitals (dict of int: tuple):
+            The name, module code, start and end dates of each VITAL.
+        results (dict of (int, int): bool):
+            Whether each (student, VITAL) result is passed.
+        user_id (int):
+            The student the list is for.
+        now (datetime):
+            The time to judge whether VITALs have started or finished at.
+
+    Returns:
+        (str):
+            The safe html for the list.
+    """
+    detail_url = apps.get_model("vitals", "VITAL").detail_url
+    items = []
+    for vital_id in vital_ids:
+        name, code, start, end = vitals[vital_id]
+        passed = results.get((user_id, vital_id))
+        if passed and start is not None and start <= now:
             klass = "vital_passed"
-        elif vital in user.failed_vitals:
+        elif passed is False and end is not None and end <= now:
             klass = "vital_failed"
         else:
             klass = "vital_unknown"
-        ret += f"""<li class="{klass}"><a class="vital_link" href="{vital.url}">
-            {vital.name} ({vital.module.code})</a></li>\n"""
-    ret += "</ul>\n"
-    return format_html(ret)
+        items.append(
+            format_html(
+                '<li class="{}"><a class="vital_link" href="{}">\n            {} ({})</a></li>\n',
+                klass,
+                detail_url(vital_id),
+                name,
+                code,
+            )
+        )
+    return mark_safe(f"<ul>\n{''.join(items)}</ul>\n")  # nosec - the items are escaped by format_html
+
+
+# The tooltip headings for the VITALs a test is sufficient for and necessary for, by the result's standing.
+VITALS_TEXT_HEADINGS = {
+    "Ok": ("You passed:", "Contributed to passing:"),
+    "Overdue": ("You would still pass:", "Would contribute to passing:"),
+    "Missing": ("You would still pass:", "Would contribute to passing:"),
+    "Finished": ("You would have passed:", "Would have contributed to passing:"),
+    "Released": ("You will pass:", "Will contribute to passing:"),
+    "Not Started": ("You will pass:", "Will contribute to passing:"),
+    "Waiting for Mark": ("This will let you pass:", "This will contribute to you passing:"),
+}
+VITALS_TEXT_CACHE_PREFIX = "minerva:vitals_text"
+
+
+def vitals_tooltips(test_scores):
+    """Build the VITALs tooltip of every result in *test_scores* from one mapping query and one VITAL_Result query.
+
+    Each tooltip is cached against the test, the student's :func:`accounts.models.summary_version` and the result's
+    standing, so it is rebuilt as soon as anything about the student changes. The html is also stored on each result
+    for :attr:`Test_Score.vitals_text` to return.
+
+    Args:
+        test_scores (iterable of Test_Score):
+            The results - saved or not - to build tooltips for.
+
+    Returns:
+        (list of str):
+            The tooltip html of each result, in order.
+
+    Examples:
+        >>> vitals_tooltips(student.test_results.all())[0]
+        'You passed:\n<ul>\n<li class="vital_passed">...</li>\n</ul>\n'
+    """
+    test_scores = list(test_scores)
+    versions = {user_id: summary_version(user_id) for user_id in {result.user_id for result in test_scores}}
+    keys = [
+        f"{VITALS_TEXT_CACHE_PREFIX}:{result.test_id}:{result.user_id}:{versions[result.user_id]}:"
+        + result.manual_standing.replace(" ", "_")
+        for result in test_scores
+    ]
+    found = cache.get_many(keys)
+    missing = [(key, result) for key, result in zip(keys, test_scores) if key not in found]
+    if missing:
+        VITAL_Test_Map = apps.get_model("vitals", "VITAL_Test_Map")
+        VITAL_Result = apps.get_model("vitals", "VITAL_Result")
+        mapped, sufficient, necessary, vitals = set(), defaultdict(list), defaultdict(list), {}
+        mappings = (
+            VITAL_Test_Map.objects.filter(test__in={result.test_id for _, result in missing})
+            .order_by("vital__module__code", "vital__VITAL_ID")
+            .values_list(
+                "test_id",
+                "vital_id",
+                "condition",
+                "sufficient",
+                "necessary",
+                "vital__name",
+                "vital__module__code",
+                "vital__start_date",
+                "vital__end_date",
+            )
+        )
+        for test_id, vital_id, condition, is_sufficient, is_necessary, *vital in mappings:
+            mapped.add(test_id)
+            vitals[vital_id] = vital
+            if is_sufficient and condition == "pass" and vital_id not in sufficient[test_id]:
+                sufficient[test_id].append(vital_id)
+            if is_necessary and condition == "attempt" and vital_id not in necessary[test_id]:
+                necessary[test_id].append(vital_id)
+        rows = VITAL_Result.objects.filter(user__in=versions, vital__in=vitals)
+        results = {(user, vital): passed for user, vital, passed in rows.values_list("user_id", "vital_id", "passed")}
+        now = request_now()
+        for key, result in missing:
+            if result.test_id not in mapped:
+                found[key] = "Possible VITALs to be confirmed:"
+                continue
+            headings = VITALS_TEXT_HEADINGS.get(result.manual_standing)
+            text = ""
+            for heading, vital_ids in zip(headings or (), (sufficient[result.test_id], necessary[result.test_id])):
+                if vital_ids:
+                    text += f"{heading}\n{_vital_list_html(vital_ids, vitals, results, result.user_id, now)}"
+            found[key] = text
+        cache.set_many(
+            {key: found[key] for key, _ in missing}, timeout=getattr(settings, "VITALS_TEXT_CACHE_TIMEOUT", 15 * 60)
+        )
+    for key, result in zip(keys, test_scores):
+        result._vitals_text = mark_safe(found[key])  # nosec - built from escaped fragments above
+    return [result._vitals_text for result in test_scores]
 
 
 def match_column_to_test(column, module):
@@ -281,6 +407,62 @@ class Module(models.Model):
         else:
             return spreadsheet.as_file(dirname)
 
+    def active_student_chunks(self, chunk_size=500):
+        """Yield the module's active students in name order, a list of up to *chunk_size* at a time.
+
+        The students are read through a server-side cursor (where the database supports it), so memory use does not
+        grow with the size of the module.
+
+        Keyword Arguments:
+            chunk_size (int):
+                The number of students in each chunk.
+
+        Yields:
+            (list of tuple):
+                (pk, number, last name, first name) of each student in the chunk.
+        """
+        students = (
+            Account.objects.filter(module_enrollments__module=self, is_active=True)
+            .order_by("last_name", "first_name", "pk")
+            .values_list("pk", "number", "last_name", "first_name")
+        )
+        chunk = []
+        for student in students.iterator(chunk_size=chunk_size):
+            chunk.append(student)
+            if len(chunk) == chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def test_results_rows(self, tests=None, chunk_size=500):
+        """Yield a header and then a row of score, attempts and standing per test for each active student.
+
+        Keyword Arguments:
+            tests (QuerySet of Test, None):
+                The tests to include - defaults to all of the module's tests.
+            chunk_size (int):
+                The number of students whose results are loaded in each query.
+
+        Yields:
+            (list):
+                The header row, followed by one row per student.
+        """
+        tests = list(tests if tests is not None else self.tests.order_by("release_date", "name"))
+        yield ["SID", "Last Name", "First Name"] + [
+            f"{test.name} {part}" for test in tests for part in ("Score", "Attempts", "Standing")
+        ]
+        for chunk in self.active_student_chunks(chunk_size):
+            results = Test_Score.objects.pivot([pk for pk, *_ in chunk], [test.pk for test in tests])
+            for pk, *student in chunk:
+                row = list(student)
+                for test in tests:
+                    if (result := results.get(pk, {}).get(test.pk)) is None:
+                        row.extend([None, 0, ""])
+                    else:
+                        row.extend([result.score, result.attempt_count, result.standing])
+                yield row
+
     def get_member_id_map(self, only_valid=True):
         """Create a dictionary that maps Blocakboard Ultra IDs to SIDs."""
         if (json_data := json.get_blob_by_name(self.memberships_json, False)) is None:
@@ -425,6 +607,11 @@ class Module(models.Model):
             with transaction.atomic():
                 logger.debug("Adding {len(enrollemnts)} enrollments to {self}")
                 ModuleEnrollment.objects.bulk_create(enrollemnts)
+        if drop or add:  # Students' modules have changed, so their required tests may have too
+            # external imports
+            from vitals.cover import invalidate_required_tests
+
+            invalidate_required_tests()
 
     def update_from_json(self, categories=False, tests=False, enrollments=False, columns=False, grades=True):
         """Update the module from json data."""
@@ -521,6 +708,11 @@ class TestCategory(models.Model):
         """Return a pathlib.Path to a spreadsheet file for this category."""
         return self.datadir / f"{self.tag}_time_series.xlsx"
 
+    @property
+    def parquet(self):
+        """Return a pathlib.Path to a Parquet export of this category's score snapshots."""
+        return self.datadir / f"{self.tag}_time_series.parquet"
+
     @property
     def gif(self):
         """Return a path to a gif file of the data from this category."""
@@ -627,6 +819,14 @@ class ModuleEnrollment(models.Model):
         return f"{self.module.code}:{self.student.display_name}"
 
 
+def _attempts_label(standing, attempted):
+    """Return the TESTS_ATTEMPTS_PROFILE label for a result's standing and number of attempts."""
+    for label, (attempts, _) in settings.TESTS_ATTEMPTS_PROFILE[standing].items():
+        if attempts < 0 or attempts >= attempted:
+            return label
+    return None
+
+
 class SummaryScore(models.Model):
     """Store a summary score and related data."""
 
@@ -663,46 +863,138 @@ class SummaryScore(models.Model):
     def calculate(self):
         """Calculate the score for the category.
 
-        First check to see whether we've got any custom methods injected for calculating virtual categories
-        like VITALs or tutorial attendance. Otherwise do a simple calculation of Tests passed/total Tests.
+        The work is done by the :class:`SummaryCalculator` registered for the category - e.g. for virtual
+        categories like VITALs or tutorial attendance - or otherwise by a simple calculation of Tests passed/total
+        Tests.
 
-        Calculate methods should also update the JSONField data with the data for constructing plots.
+        Calculators should also update the JSONField data with the data for constructing plots.
         """
-        if hasattr(self, f"calculate_{self.category.text.lower().split()[0]}"):
-            self.score = getattr(self, f"calculate_{self.category.text.lower()}")()
-            return
-        tests = Test.objects.filter(category=self.category).distinct().exclude(status="Not Started")
-        if tests.count() == 0:
-            self.score = np.nan
-            self.data = {}
+        get_calculator(self.category).calculate_one(self)
+
+    @classmethod
+    def calculate_tests_many(cls, category, summaries):
+        """Calculate the scores and pie chart data for many summaries of one test category at once.
+
+        The tests in the category and all the students' results for them are each read with a single query, so the
+        number of queries does not depend on the number of summaries or tests.
+
+        Args:
+            category (TestCategory):
+                The (non-virtual) category that all the *summaries* belong to.
+            summaries (list of SummaryScore):
+                The summaries to calculate. They are updated in place but not saved.
+        """
+        tests = dict(Test.objects.filter(category=category).exclude(status="Not Started").values_list("pk", "status"))
+        results = defaultdict(dict)
+        for user_id, test_id, passed, standing, attempts in Test_Score.objects.filter(
+            test__in=tests.keys(), user__in=[summary.student_id for summary in summaries]
+        ).values_list("user", "test", "passed", "standing", "attempt_count"):
+            results[user_id][str(test_id)] = [passed, _attempts_label(standing, attempts), tests[test_id] == "Overdue"]
+
+        overdue = sorted(str(pk) for pk, status in tests.items() if status == "Overdue")
+        for summary in summaries:
+            if not tests:
+                summary.score = np.nan
+                summary.data = {}
+                continue
+            summary.data = {
+                "overdue": len(overdue),
+                "overdue_tests": overdue,
+                "results": results.get(summary.student_id, {}),
+            }
+            summary._summarise()
+
+    def _summarise(self):
+        """Set the score and pie chart data from the per-test entries kept in ``data["results"]``.
+
+        Each entry is keyed by test pk and holds whether the test was passed, its TESTS_ATTEMPTS_PROFILE label and
+        whether the test is overdue. ``data["overdue"]`` is the number of overdue tests in the category, so overdue
+        tests without an entry are the ones not taken.
+        """
+        results = self.data["results"]
+        taken = len(results)
+        not_taken = max(self.data["overdue"] - sum(1 for _, _, overdue in results.values() if overdue), 0)
+        passed = sum(1 for result_passed, _, _ in results.values() if result_passed)
+        self.score = np.nan if taken + not_taken == 0 else (100 * passed) / (taken + not_taken)
+        data = {}
+        colours = {}
+        for label, (attempts, colour) in settings.TESTS_ATTEMPTS_PROFILE.get("Missing", {}).items():
+            colours[label] = colour
+            data[label] = not_taken
+        profile_colours = {
+            label: colour
+            for labels in settings.TESTS_ATTEMPTS_PROFILE.values()
+            for label, (_, colour) in labels.items()
+        }
+        for _, label, _ in results.values():
+            if label is not None:
+                colours[label] = profile_colours[label]
+                data[label] = data.get(label, 0) + 1
+        self.data["data"] = data
+        self.data["colours"] = colours
+
+    def update_from_result(self, result):
+        """Update the score for a change to one of the student's Test_Scores without recounting the category.
+
+        Only the entry for *result*'s test is replaced, so this is independent of the number of tests. If the test
+        has become (or stopped being) overdue since the summary was fully calculated, the overdue count is out of
+        date, so a full calculation is needed instead. Other tests' changes of status over time are picked up by
+        the periodic full rebuild (:func:`minerva.tasks.rebuild_summary_scores`).
+
+        Args:
+            result (Test_Score):
+                The saved result for a test in this summary's category.
+
+        Returns:
+            (bool):
+                False if the summary has no per-test entries to update (e.g. it was last calculated before they were
+                kept, or is for a virtual category) or the test's overdue status has changed, and so must be
+                calculated in full instead.
+        """
+        if "overdue_tests" not in self.data or get_calculator(self.category) is not GRADEBOOK_CALCULATOR:
+            return False
+        status = result.test.manual_satus
+        key = str(result.test_id)
+        if (status == "Overdue") != (key in self.data["overdue_tests"]):
+            return False
+        if status == "Not Started":
+            self.data["results"].pop(key, None)
         else:
-            taken = tests.filter(results__user=self.student).distinct().order_by("id")
-            not_taken = tests.exclude(results__user=self.student).distinct().filter(status="Overdue").order_by("id")
-            passed = taken.filter(results__passed=True, results__user=self.student).count()
-            if taken.count() + not_taken.count() == 0:
-                self.score = np.nan
+            if result.passed:
+                standing = "Ok"
+            elif result.score is None:
+                standing = "Waiting for Mark"
             else:
-                self.score = (100 * passed) / (taken.count() + not_taken.count())
-            data = {}
-            colours = {}
-
-            for label, (attempts, colour) in settings.TESTS_ATTEMPTS_PROFILE.get("Missing", {}).items():
-                colours[label] = colour
-                data[label] = not_taken.count()
-            results = Test_Score.objects.filter(user=self.student, test__in=tests).order_by("test__id")
-            for test, test_score in zip(tests, results):
-                if test.status == "Not Started" and test_score.standing == "Missing":
-                    continue
-                try:
-                    attempted = test_score.attempts.count()
-                except ValueError:  # New test_score
-                    attempted = 0
-                for label, (attempts, colour) in settings.TESTS_ATTEMPTS_PROFILE[test_score.standing].items():
-                    if attempts < 0 or attempts >= attempted:
-                        colours[label] = colour
-                        data[label] = data.get(label, 0) + 1
-                        break
-            self.data = {"data": data, "colours": colours}
+                standing = status
+            label = _attempts_label(standing, result.attempts.count())
+            self.data["results"][key] = [result.passed, label, status == "Overdue"]
+        self._summarise()
+        return True
+
+    @classmethod
+    def bulk_calculate(cls, summaries):
+        """Recalculate and store many summary scores.
+
+        The summaries are grouped by their category's :class:`SummaryCalculator` and each group is calculated
+        together. The results are written with a single ``bulk_update``.
+
+        Args:
+            summaries (iterable of SummaryScore):
+                The summaries to recalculate.
+
+        Returns:
+            (list of SummaryScore):
+                The recalculated summaries.
+        """
+        summaries = list(summaries)
+        by_calculator = defaultdict(list)
+        for summary in summaries:
+            by_calculator[get_calculator(summary.category)].append(summary)
+        for calculator, calculator_summaries in by_calculator.items():
+            calculator.calculate_many(calculator_summaries)
+        cls.objects.bulk_update(summaries, ["score", "data"], batch_size=500)
+        bump_summary_version(*{summary.student_id for summary in summaries})
+        return summaries
 
     def save(self, force_insert=False, force_update=False, using=DEFAULT_DB_ALIAS, update_fields=None):
         """Set the module and account based on the enrollment and calculate the score."""
@@ -711,6 +1003,180 @@ class SummaryScore(models.Model):
         super().save(force_insert=force_insert, force_update=force_update, using=using, update_fields=update_fields)
 
 
+class ScoreSnapshot(models.Model):
+    """A dated copy of a student's SummaryScore for building time-series plots of a category.
+
+    A day's snapshot is taken for whole categories at once with :meth:`take` and read back as a date x student
+    table with :meth:`frame`.
+    """
+
+    date = models.DateField()
+    category = models.ForeignKey(TestCategory, on_delete=models.CASCADE, related_name="snapshots")
+    student = models.ForeignKey(Account, on_delete=models.CASCADE, related_name="score_snapshots")
+    score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["date", "category", "student"], name="Singleton snapshot per day"),
+        ]
+        indexes = [models.Index(fields=["category", "date"], name="snapshot_category_date_idx")]
+
+    def __str__(self):
+        """Describe the snapshot."""
+        return f"{self.date} {self.category}: {self.student} {self.score}"
+
+    @classmethod
+    def take(cls, categories, date=None):
+        """Copy the current summary scores of *categories* into the snapshot table.
+
+        The copy is a single ``INSERT ... SELECT`` in the database. Any snapshot already taken for the same date is
+        replaced, so running this twice in a day is harmless.
+
+        Args:
+            categories (QuerySet of TestCategory):
+                The categories to snapshot.
+
+        Keyword Arguments:
+            date (date, None):
+                The date to record the snapshot against - defaults to today.
+
+        Returns:
+            (int):
+                The number of snapshot rows written.
+        """
+        date = date or tz.now().date()
+        category_ids = list(categories.values_list("pk", flat=True))
+        if not category_ids:
+            return 0
+        quote = connection.ops.quote_name
+        placeholders = ", ".join(["%s"] * len(category_ids))
+        sql = (
+            f"INSERT INTO {quote(cls._meta.db_table)} (date, category_id, student_id, score) "
+            + f"SELECT %s, category_id, student_id, score FROM {quote(SummaryScore._meta.db_table)} "
+            + f"WHERE category_id IN ({placeholders})"
+        )
+        with transaction.atomic():
+            cls.objects.filter(date=date, category__in=category_ids).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [date, *category_ids])
+                return cursor.rowcount
+
+    @classmethod
+    def frame(cls, category, active_only=True):
+        """Return a category's snapshots as a DataFrame with a Date index and a column per student number.
+
+        Args:
+            category (TestCategory):
+                The category to read.
+
+        Keyword Arguments:
+            active_only (bool):
+                Leave out students whose accounts are no longer active.
+
+        Returns:
+            (pandas.DataFrame):
+                The scores, with NaN where a student has no snapshot for a date.
+        """
+        rows = cls.objects.filter(category=category)
+        if active_only:
+            rows = rows.filter(student__is_active=True)
+        rows = pd.DataFrame.from_records(
+            list(rows.values_list("date", "student__number", "score")), columns=["Date", "number", "score"]
+        )
+        return rows.pivot(index="Date", columns="number", values="score").sort_index().astype(float)
+
+    @classmethod
+    def export(cls, category, filename=None):
+        """Write a category's snapshots to a Parquet or Feather file for offline analysis.
+
+        Args:
+            category (TestCategory):
+                The category to export.
+
+        Keyword Arguments:
+            filename (str, Path, None):
+                Where to write the data, the format being chosen from the suffix. Defaults to
+                :attr:`TestCategory.parquet`.
+
+        Returns:
+            (Path):
+                The file written.
+
+        Raises:
+            ImproperlyConfigured:
+                If pyarrow is not installed.
+        """
+        if pyarrow is None:
+            raise ImproperlyConfigured("pyarrow must be installed to export score snapshots.")
+        filename = Path(filename or category.parquet)
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        data = cls.frame(category, active_only=False)
+        data.columns = data.columns.astype(str)
+        if filename.suffix == ".feather":
+            data.reset_index().to_feather(filename)
+        else:
+            data.to_parquet(filename)
+        return filename
+
+
+SUMMARY_CALCULATORS = {}
+
+
+class SummaryCalculator:
+    """Strategy for calculating the SummaryScores of one kind of TestCategory.
+
+    Subclasses implement :meth:`calculate_many`, which sets ``score`` and ``data`` on every summary passed to it
+    without saving them, so that saving a single SummaryScore and the batch update engine share the same code.
+    Calculators for virtual categories are registered with :func:`register_calculator`.
+    """
+
+    def calculate_one(self, summary):
+        """Calculate a single summary score and return the score."""
+        self.calculate_many([summary])
+        return summary.score
+
+    def calculate_many(self, summaries):
+        """Calculate a list of summary scores in place."""
+        raise NotImplementedError
+
+
+class GradebookCalculator(SummaryCalculator):
+    """Score ordinary categories of gradebook tests as the percentage of tests taken or overdue that were passed."""
+
+    def calculate_many(self, summaries):
+        """Calculate the summaries a category at a time with :meth:`SummaryScore.calculate_tests_many`."""
+        by_category = defaultdict(list)
+        for summary in summaries:
+            by_category[summary.category].append(summary)
+        for category, category_summaries in by_category.items():
+            SummaryScore.calculate_tests_many(category, category_summaries)
+
+
+def register_calculator(name):
+    """Class decorator to register a SummaryCalculator for the categories whose text starts with *name*.
+
+    Examples:
+        >>> @register_calculator("vitals")
+        ... class VITALsCalculator(SummaryCalculator):
+        ...     def calculate_many(self, summaries): ...
+    """
+
+    def decorator(cls):
+        SUMMARY_CALCULATORS[name.lower()] = cls()
+        return cls
+
+    return decorator
+
+
+def get_calculator(category):
+    """Return the SummaryCalculator for a TestCategory, keyed on the first word of its text."""
+    name = next(iter(category.text.lower().split()), "")
+    return SUMMARY_CALCULATORS.get(name, GRADEBOOK_CALCULATOR)
+
+
+GRADEBOOK_CALCULATOR = GradebookCalculator()
+
+
 class Test_Manager(models.Manager):
     """Manager class for Test objects to support natural keys."""
 
@@ -728,9 +1194,9 @@ class Test_Manager(models.Manager):
         if self.category_text:
             qs = qs.filter(category__text=self.category_text)
         qs = qs.annotate(
-            from_release=tz.now() - models.F("release_date"),
-            from_recommended=tz.now() - models.F("recommended_date"),
-            from_due=tz.now() - models.F("grading_due"),
+            from_release=request_now() - models.F("release_date"),
+            from_recommended=request_now() - models.F("recommended_date"),
+            from_due=request_now() - models.F("grading_due"),
         ).annotate(
             status=models.Case(
                 models.When(from_due__gte=zerotime, then=models.Value("Finished")),
@@ -827,29 +1293,37 @@ class Test(models.Model):
 
     @property
     def manual_satus(self):
-        """Do the same as the annotation test_status from the model manager, but in Python."""
-        zerotime = timedelta(0)
-        if self.release_date is None:
-            return "Not Started"
-        from_release = tz.now() - self.release_date
-        if self.recommended_date is None:
-            return "Not Started"
-        from_recommended = tz.now() - self.recommended_date
-        if self.grading_due is None:
-            return "Not Started"
-        from_due = tz.now() - self.grading_due
-        if from_due >= zerotime:
-            return "Finished"
-        if from_recommended >= zerotime:
-            return "Overdue"
-        if from_release >= zerotime:
-            return "Released"
-        return "Not Started"
+        """Do the same as the annotation test_status from the model manager, but in Python.
+
+        The status is remembered until the request time (see :func:`util.clock.now`) or any of the test's dates
+        change, so a table can ask for it for every cell without recalculating it.
+        """
+        now = request_now()
+        key = (now, self.release_date, self.recommended_date, self.grading_due)
+        if (memo := self.__dict__.get("_manual_satus")) is not None and memo[0] == key:
+            return memo[1]
+        if None in key[1:]:
+            status = "Not Started"
+        elif self.grading_due <= now:
+            status = "Finished"
+        elif self.recommended_date <= now:
+            status = "Overdue"
+        elif self.release_date <= now:
+            status = "Released"
+        else:
+            status = "Not Started"
+        self._manual_satus = (key, status)
+        return status
+
+    @staticmethod
+    def detail_url(pk):
+        """Return the url of the detail page for the test with primary key *pk*, without loading the test."""
+        return f"/minerva/detail/{pk}/"
 
     @property
     def url(self):
         """Return a url for the detail page for this vital."""
-        return f"/minerva/detail/{self.pk}/"
+        return self.detail_url(self.pk)
 
     @cached_property
     def attempts_json(self):
@@ -892,35 +1366,50 @@ class Test(models.Model):
         self.full_clean()
         if self.passing_score is None and self.score_possible:
             self.passing_score = 0.8 * self.score_possible
-        if self.pk and self.results.count() > 0:
-            orig = Test.objects.get(pk=self.pk)
-            update_results = orig.passing_score != self.passing_score
-        else:
-            update_results = False
+        orig = Test.objects.filter(pk=self.pk).first() if self.pk else None
+        update_results = orig is not None and orig.passing_score != self.passing_score and self.results.exists()
+        update_vitals = orig is not None and (orig.release_date, orig.recommended_date) != (
+            self.release_date,
+            self.recommended_date,
+        )
         super().save(using=using, update_fields=update_fields)
         if update_results:  # Propagate change in pass mark to test scores
-            for test_score in self.results.all():  # Update all test_scores for both passes and fails
-                test_score.save()
+            with TEST_STATS_BATCH.suspended():  # Refreshed once below rather than for every result
+                for test_score in self.results.all():  # Update all test_scores for both passes and fails
+                    test_score.save()
+            Test_Stats.refresh(Test.objects.filter(pk=self.pk))
+        if update_vitals:  # Propagate change in dates to the VITALs' stored start and end dates
+            self.VITALS.model.objects.refresh_dates(self.VITALS.all())
 
     def attempts_from_columns(self, columns=None):
-        """Create a test attempts and test scores from the individual column hjson files."""
+        """Create a test attempts and test scores from the individual column hjson files.
+
+        The columns are imported in one transaction, so the results' Test_Stats are refreshed once when it commits.
+        """
         if columns is None:
             columns = self.columns.all().order_by("priority")
-        for column in columns:
-            column.update_grades()
-            logger.debug(f"Updated grades for column {column}")
-            column.update_attempts()
-            logger.debug(f"Updated attempts for column {column}")
+        with transaction.atomic():
+            for column in columns:
+                column.update_grades()
+                logger.debug(f"Updated grades for column {column}")
+                column.update_attempts()
+                logger.debug(f"Updated attempts for column {column}")
 
     def grades_from_columns(self, columns=None):
-        """Create test scores from each columns json files."""
+        """Create test scores from each columns json files, in one transaction like :meth:`attempts_from_columns`."""
         if columns is None:
             columns = self.columns.all().order_by("priority")
-        for column in columns:
-            column.update_grades()
+        with transaction.atomic():
+            for column in columns:
+                column.update_grades()
 
+    @transaction.atomic
     def add_attempt(self, student, mark, date=None, text=None):
-        """Add a Test_Attempt, including Test_Score as necessary."""
+        """Add a Test_Attempt, including Test_Score as necessary.
+
+        Runs in a transaction, so the score's several saves refresh its Test_Stats once - callers importing many
+        attempts should wrap the whole import in a transaction to refresh it once for all of them.
+        """
         score, _ = self.results.get_or_create(user=student)
         if not score.score or score.score < mark:
             score.score = mark
@@ -947,18 +1436,12 @@ class Test(models.Model):
 
     @property
     def stats(self):
-        """Return a dictionary of numbers who have attempted or not and passed or not."""
-        potential = self.module.student_enrollments.filter(student__is_active=True).distinct().count()
-        passed = self.results.filter(user__is_active=True, passed=True).exclude(score=None).count()
-        waiting = self.results.filter(user__is_active=True, score=None).count()
-        failed = self.results.filter(user__is_active=True, passed=False).exclude(score=None).count()
-        ret = {
-            "Passed": passed,
-            "Failed": failed,
-            "Waiting": waiting,
-            "Not Attempted": potential - passed - waiting - failed,
-        }
-        return {k if v > 0 else "": v for k, v in ret.items()}
+        """Return a dictionary of numbers who have attempted or not and passed or not from the Test_Stats table."""
+        try:
+            progress = self.progress
+        except ObjectDoesNotExist:
+            [progress] = Test_Stats.refresh(Test.objects.filter(pk=self.pk))
+        return {k if v > 0 else "": v for k, v in progress.stats.items()}
 
     @property
     def stats_legend(self):
@@ -1254,9 +1737,9 @@ class TestScoreManager(models.Manager):
         qs = (
             qs.annotate(attempt_count=models.Count("attempts"))
             .annotate(
-                from_release=tz.now() - models.F("test__release_date"),
-                from_recommended=tz.now() - models.F("test__recommended_date"),
-                from_due=tz.now() - models.F("test__grading_due"),
+                from_release=request_now() - models.F("test__release_date"),
+                from_recommended=request_now() - models.F("test__recommended_date"),
+                from_due=request_now() - models.F("test__grading_due"),
             )
             .annotate(
                 test_status=models.Case(
@@ -1277,6 +1760,59 @@ class TestScoreManager(models.Manager):
 
         return qs
 
+    def for_student(self, student, tests):
+        """Return a student's results for *tests* from one query, with unsaved "Missing" results for any gaps.
+
+        Args:
+            student (Account):
+                The student to load results for.
+            tests (iterable of Test):
+                The tests in display order - their module and category should already be loaded.
+
+        Returns:
+            (dict of Test: Test_Score):
+                The annotated result for each test with its test attached, in the order of *tests*.
+
+        Examples:
+            >>> Test_Score.objects.for_student(student, module.tests.all())[test].standing
+            'Missing'
+        """
+        tests = list(tests)
+        found = {result.test_id: result for result in self.get_queryset().filter(user=student, test__in=tests)}
+        results = {}
+        for test in tests:
+            if (result := found.get(test.pk)) is None:
+                result = self.model(user=student, test=test, passed=False, score=None)
+                result.test_status = result.manual_test_satus
+                result.standing = "Missing"
+                result.attempt_count = 0
+            else:
+                result.test = test
+            results[test] = result
+        return results
+
+    def pivot(self, students, tests):
+        """Load the results of many students on many tests with one query, pivoted by student and test.
+
+        Args:
+            students (QuerySet of Account, iterable of int):
+                The students (or their primary keys) to load results for.
+            tests (QuerySet of Test, iterable of int):
+                The tests (or their primary keys) to load results for.
+
+        Returns:
+            (dict of int: dict of int: Test_Score):
+                The annotated results keyed by student pk and then test pk. Students with no results are missing.
+
+        Examples:
+            >>> Test_Score.objects.pivot(module.students.all(), module.tests.all())[student.pk][test.pk].standing
+            'Ok'
+        """
+        results = {}
+        for result in self.get_queryset().filter(user__in=students, test__in=tests).order_by():
+            results.setdefault(result.user_id, {})[result.test_id] = result
+        return results
+
 
 class Test_Score(models.Model):
     """The model that links a particular student to a particular test."""
@@ -1302,15 +1838,32 @@ class Test_Score(models.Model):
 
     @property
     def manual_standing(self):
-        """Do the same thing as the annotation, but in python code."""
+        """Do the same thing as the annotation, but in python code.
+
+        The number of attempts comes from the *attempt_count* annotation of :class:`TestScoreManager` when the
+        result was loaded through it, and the standing is remembered until the test status or the result changes.
+        """
         status = self.manual_test_satus
+        key = (status, self.pk, self.passed, self.score)
+        if (memo := self.__dict__.get("_manual_standing")) is not None and memo[0] == key:
+            return memo[1]
         if self.passed:
-            status = "Ok"  # A pass is always ok
+            standing = "Ok"  # A pass is always ok
         elif self.score is None and self.pk is not None:
-            status = "Waiting for Mark"
-        elif status in ["Finished", "Overdue"] and (not self.pk or self.attempts.count() == 0):
-            status = "Missing"
-        return status
+            standing = "Waiting for Mark"
+        elif status in ["Finished", "Overdue"] and (not self.pk or self.attempts_made == 0):
+            standing = "Missing"
+        else:
+            standing = status
+        self._manual_standing = (key, standing)
+        return standing
+
+    @property
+    def attempts_made(self):
+        """Return the number of attempts, from the manager's annotation if it is there."""
+        if (count := self.__dict__.get("attempt_count")) is None:
+            count = self.attempts.count()
+        return count
 
     @property
     def bootstrap5_class(self):
@@ -1341,46 +1894,13 @@ class Test_Score(models.Model):
 
     @property
     def vitals_text(self):
-        """Get a Label for whether we pass VITALS or not."""
-        vitals_count = self.test.vitals_mappings.count()
-        if vitals_count == 0:
-            return "Possible VITALs to be confirmed:"
-        sufficient = self.test.VITALS.model.objects.filter(
-            tests_mappings__in=self.test.vitals_mappings.filter(sufficient=True, condition="pass")
-        )
-        necessary = self.test.VITALS.model.objects.filter(
-            tests_mappings__in=self.test.vitals_mappings.filter(necessary=True, condition="attempt")
-        )
-        ret = ""
-        match self.manual_standing:
-            case "Ok":
-                if sufficient.count() > 0:
-                    ret += f"You passed:\n{vital_qs_to_html(sufficient, self.user)}"
-                if necessary.count() > 0:
-                    ret += f"Contributed to passing:\n{vital_qs_to_html(necessary, self.user)}"
-            case "Overdue" | "Missing":
-                if sufficient.count() > 0:
-                    ret += f"You would still pass:\n{vital_qs_to_html(sufficient, self.user)}"
-                if necessary.count() > 0:
-                    ret += f"Would contribute to passing:\n{vital_qs_to_html(necessary, self.user)}"
-            case "Finished":
-                if sufficient.count() > 0:
-                    ret += f"You would have passed:\n{vital_qs_to_html(sufficient, self.user)}"
-                if necessary.count() > 0:
-                    ret += f"Would have contributed to passing:\n{vital_qs_to_html(necessary, self.user)}"
-            case "Released" | "Not Started":
-                if sufficient.count() > 0:
-                    ret += f"You will pass:\n{vital_qs_to_html(sufficient, self.user)}"
-                if necessary.count() > 0:
-                    ret += f"Will contribute to passing:\n{vital_qs_to_html(necessary, self.user)}"
-            case "Waiting for Mark":
-                if sufficient.count() > 0:
-                    ret += f"This will let you pass:\n{vital_qs_to_html(sufficient, self.user)}"
-                if necessary.count() > 0:
-                    ret += f"This will contribute to you passing:\n{vital_qs_to_html(necessary, self.user)}"
-            case _:
-                ret = ""
-        return format_html(ret)
+        """Get a Label for whether we pass VITALS or not.
+
+        Pages showing many results should build all their tooltips at once with :func:`vitals_tooltips` first.
+        """
+        if (text := self.__dict__.get("_vitals_text")) is None:
+            (text,) = vitals_tooltips([self])
+        return text
 
     @property
     def best_score(self):
@@ -1448,14 +1968,20 @@ class Test_Score(models.Model):
             using=using,
             update_fields=update_fields,
         )  # Save to ensure pk is set
+        TEST_STATS_BATCH.add(self.test_id)
 
         if self.test.category:  # Update the summary score if we have a category
             try:
                 enrollment = ModuleEnrollment.objects.get(student=self.user, module=self.test.module)
-                ss, _ = SummaryScore.objects.get_or_create(
-                    enrollment=enrollment, category=self.test.category, student=self.user
-                )
-                ss.save()
+                with transaction.atomic():
+                    ss, created = SummaryScore.objects.select_for_update().get_or_create(
+                        enrollment=enrollment, category=self.test.category, student=self.user
+                    )
+                    if not created:  # A new summary has already been fully calculated
+                        if ss.update_from_result(self):
+                            SummaryScore.objects.filter(pk=ss.pk).update(score=ss.score, data=ss.data)
+                        else:
+                            ss.save()
             except ModuleEnrollment.DoesNotExist:  # Student de-registered from module!
                 self.delete()
                 return
@@ -1493,6 +2019,95 @@ class Test_Attempt(models.Model):
             self.test_entry.save()
 
 
+class Test_Stats(models.Model):
+    """Materialised counts of the active students' results for a Test.
+
+    Rows are refreshed for just the affected tests by the score pipelines (see :meth:`refresh`) so that dashboards
+    read one small table instead of counting results on every render.
+    """
+
+    test = models.OneToOneField(Test, on_delete=models.CASCADE, primary_key=True, related_name="progress")
+    passed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    waiting = models.PositiveIntegerField(default=0)
+    not_attempted = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Test statistics"
+        verbose_name_plural = "Test statistics"
+
+    def __str__(self):
+        """Summarise the counts."""
+        return f"{self.test}: {self.passed} passed, {self.failed} failed, {self.waiting} waiting"
+
+    @property
+    def stats(self):
+        """Return the counts in the form used by Test.stats."""
+        return {
+            "Passed": self.passed,
+            "Failed": self.failed,
+            "Waiting": self.waiting,
+            "Not Attempted": self.not_attempted,
+        }
+
+    @classmethod
+    def refresh(cls, tests):
+        """Recalculate and store the statistics for a queryset of tests.
+
+        Args:
+            tests (QuerySet):
+                The tests to refresh.
+
+        Returns:
+            (list of Test_Stats):
+                The refreshed rows.
+        """
+        active = Q(results__user__is_active=True)
+        rows = list(
+            Test.objects.filter(pk__in=tests.values("pk"))
+            .order_by()
+            .values("pk", "module")
+            .annotate(
+                n_passed=models.Count(
+                    "results", filter=active & Q(results__passed=True, results__score__isnull=False)
+                ),
+                n_failed=models.Count(
+                    "results", filter=active & Q(results__passed=False, results__score__isnull=False)
+                ),
+                n_waiting=models.Count("results", filter=active & Q(results__score__isnull=True)),
+            )
+        )
+        potential = dict(
+            ModuleEnrollment.objects.filter(module__in={row["module"] for row in rows}, student__is_active=True)
+            .order_by()
+            .values_list("module")
+            .annotate(n=models.Count("student", distinct=True))
+        )
+        stats = [
+            cls(
+                test_id=row["pk"],
+                passed=row["n_passed"],
+                failed=row["n_failed"],
+                waiting=row["n_waiting"],
+                not_attempted=max(
+                    potential.get(row["module"], 0) - row["n_passed"] - row["n_failed"] - row["n_waiting"], 0
+                ),
+            )
+            for row in rows
+        ]
+        return cls.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["test"],
+            update_fields=["passed", "failed", "waiting", "not_attempted", "updated"],
+        )
+
+
+# Refreshes the Test_Stats of tests whose results were saved, once the transaction saving them commits.
+TEST_STATS_BATCH = CommitBatch(lambda pks: Test_Stats.refresh(Test.objects.filter(pk__in=pks)))
+
+
 @patch_model(Account, prep=property)
 def passed_tests(self):
     """Return the set of vitals passed by the current user, but not counting this that haven't started yet."""
@@ -1553,6 +2168,30 @@ def untested_coding(self):
     return Test.code_tasks.exclude(results__user=self).exclude(status__in=["Released", "Not Started"])
 
 
+# Prefetch for querysets of accounts whose category scores will be read, e.g. several per student in a listing.
+SCORE_VECTOR_PREFETCH = Prefetch("summary_scores", queryset=SummaryScore.objects.select_related("category", "module"))
+
+
+@patch_model(Account, prep=property)
+def score_vector(self):
+    """Return the credit weighted average summary score of every category the account has summary scores for.
+
+    The scores are reduced with :func:`accounts.models.credit_weighted_scores` and keyed by both category pk and
+    category text - the latter merging same named categories on different modules. They are worked out with one query the first time they are needed and then kept on the
+    instance, or from summary scores prefetched with SCORE_VECTOR_PREFETCH without a further query.
+    """
+    if (vector := self.__dict__.get("_score_vector")) is not None:
+        return vector
+    if "summary_scores" in getattr(self, "_prefetched_objects_cache", {}):
+        rows = [(ss.category_id, ss.category.text, ss.module.credits, ss.score) for ss in self.summary_scores.all()]
+    else:
+        rows = self.summary_scores.values_list("category_id", "category__text", "module__credits", "score")
+    category_ids, texts, credits, scores = zip(*rows) if (rows := list(rows)) else ((), (), (), ())
+    by_category = credit_weighted_scores(category_ids, credits, scores)
+    self._score_vector = by_category | credit_weighted_scores(texts, credits, scores)
+    return self._score_vector
+
+
 @patch_model(Account)
 def category_score(self, category):
     """Calculate the test summary from summary scores.
@@ -1563,17 +2202,11 @@ def category_score(self, category):
 
     Returns:
         (float):
-            credit weighted average of the summary scores for the categories with the matching names.
+            credit weighted average of the summary scores for the categories with the matching names, read from
+            :attr:`score_vector`.
     """
-    if isinstance(category, TestCategory):
-        summaries = self.summary_scores.filter(category=category)
-    else:
-        summaries = self.summary_scores.filter(category__text=category)
-    summary = np.array(summaries.values_list("module__credits", "score"))
-    if summary.size == 0:  # No results must be a zero score
-        return np.nan
-    summary = summary.astype(float)
-    return float(np.nansum(np.nanprod(summary, axis=1)) / np.nansum(summary[:, 0]))
+    key = category.pk if isinstance(category, TestCategory) else category
+    return self.score_vector.get(key, np.nan)  # No results must be a NaN score
 
 
 @patch_model(Account, prep=property)
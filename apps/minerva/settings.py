@@ -5,6 +5,7 @@
 from datetime import datetime
 
 # external imports
+from celery.schedules import crontab
 from pytz import UTC
 
 CONSTANCE_CONFIG = {
@@ -40,3 +41,20 @@ TESTS_ATTEMPTS_PROFILE = {
         "In progress\nmore than 3 attempts": (999, "blue"),
     },
 }
+
+# How long, in seconds, a student's VITALs tooltip for a test is cached - it is rebuilt as soon as their results change.
+VITALS_TEXT_CACHE_TIMEOUT = 15 * 60
+
+# Query budgets (see util.profiling) for the test results tables - a batch of rows must not cost queries per student.
+# Measured at 5 queries and no duplicates, whatever the number of rows.
+QUERY_BUDGETS = {"minerva:test_results": {"queries": 8, "duplicates": 2}}
+
+# Periodic tasks, installed into django_celery_beat's schedule when beat starts.
+CELERY_BEAT_SCHEDULE = {
+    # Single Test_Score saves only update their own test's entry in a SummaryScore, so recount them all nightly to
+    # pick up tests that have since become overdue or finished.
+    "minerva.rebuild_summary_scores": {
+        "task": "minerva.tasks.rebuild_summary_scores",
+        "schedule": crontab(hour=2, minute=30),
+    },
+}
@@ -2,20 +2,18 @@
 """Celery taks for the minerva app."""
 # Python imports
 import logging
-from datetime import datetime, time
 from functools import partial
 from traceback import format_exc
 
 # Django imports
+from django.core.exceptions import ImproperlyConfigured
 from django.db.models import F, Prefetch, Q
-from django.utils import timezone as tz
 
 # external imports
 import matplotlib.animation as animation
 import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
-from accounts.models import Account, Cohort, School
+from accounts.models import Cohort, School
 from celery import shared_task
 from constance import config
 from minerva.models import Module
@@ -25,11 +23,12 @@ from phas_vitals import celery_app
 
 # app imports
 from . import json
-from .models import GradebookColumn, SummaryScore, Test, TestCategory
+from .models import GradebookColumn, ScoreSnapshot, SummaryScore, Test, TestCategory
 
 logger = logging.getLogger("celery_tasks")
 
 update_all_users = celery_app.signature("accounts.tasks.update_all_users")
+take_progress_snapshot = celery_app.signature("accounts.tasks.take_progress_snapshot")
 
 
 @shared_task
@@ -78,19 +77,20 @@ def import_gradebook():
             bad_modules.append(f"Issues processing json for {module=} - {format_exc()}")
             logger.debug(bad_modules[-1])
 
-    update_all_users.delay()
     if bad_modules:
+        update_all_users.delay()
         return bad_modules
-    logger.debug("Updated constance.config")
+    last_update = None
     for module in Module.objects.select_related("year", "school").all():
         try:
-            config.LAST_MINERVA_UPDATE = module.json_updated
-            logger.debug("Updated constance.config")
+            last_update = module.json_updated
             break
         except Exception:
-            logger.debug("Failed to update constance.config from %s", module.key, exc_info=True)
+            logger.debug("Failed to read update time from %s", module.key, exc_info=True)
     else:
-        logger.debug("Failed to updated constance.config")
+        logger.debug("Failed to find a module update time for constance.config")
+    # config.LAST_MINERVA_UPDATE is set once all the accounts have been updated.
+    update_all_users.delay(last_update=last_update)
     return imported_modules
 
 
@@ -141,26 +141,35 @@ def rebuild_one_test(test_pk):
     return f"Updated test results for {test.name}"
 
 
+@shared_task()
+def rebuild_summary_scores():
+    """Recalculate every dashboard SummaryScore from scratch.
+
+    Test_Score saves only update the entry for their own test in a SummaryScore, so this is run nightly (see
+    CELERY_BEAT_SCHEDULE in minerva.settings) to pick up tests that have become overdue or finished and to correct
+    any drift.
+    """
+    count = 0
+    for category in TestCategory.objects.filter(Q(in_dashboard=True) | Q(dashboard_plot=True)):
+        summaries = SummaryScore.objects.filter(category=category).select_related("category")
+        count += len(SummaryScore.bulk_calculate(summaries))
+    logger.info(f"Rebuilt {count} summary scores")
+    return count
+
+
 @shared_task()
 def take_time_series():
-    """Load DataFrames and add new row for the current date."""
-    date = datetime.combine(tz.now().date(), time(0, 0, 0))
-    for category in TestCategory.objects.filter(dashboard_plot=True):
-        data = SummaryScore.objects.filter(category=category)
-        if category.xlsx.exists():
-            df = pd.read_excel(category.xlsx).set_index("Date")
-        else:
-            category.datadir.mkdir(parents=True, exist_ok=True)
-            df = pd.DataFrame(columns=["Date"]).set_index("Date")
-        row = {entry.student.number: entry.score for entry in data}
-        if date in df.index:  # Check for double running on the same day!
-            for k, v in row.items():
-                df.loc[date, k] = v
-        else:
-            row["Date"] = date
-            row_df = pd.DataFrame([row]).set_index("Date")
-            df = pd.concat((df, row_df))
-        df.to_excel(category.xlsx)
+    """Snapshot today's category and overall scores and export the category scores for analysis."""
+    categories = TestCategory.objects.filter(dashboard_plot=True).select_related("module")
+    count = ScoreSnapshot.take(categories)
+    logger.debug(f"Took {count} score snapshots")
+    for category in categories:
+        try:
+            ScoreSnapshot.export(category)
+        except ImproperlyConfigured:
+            logger.debug("pyarrow is not installed so not exporting score snapshots")
+            break
+    take_progress_snapshot.delay()
     make_gifs.delay()
 
 
@@ -190,13 +199,10 @@ def _animate(frame, axes, data, legend):
 @shared_task()
 def make_gifs():
     """Create an animated gif from the activity data."""
-    for category in TestCategory.objects.filter(dashboard_plot=True):
-        if not (category.xlsx).exists():
+    for category in TestCategory.objects.filter(dashboard_plot=True).select_related("module"):
+        data = ScoreSnapshot.frame(category)
+        if data.empty:
             continue
-        data = pd.read_excel(category.xlsx).set_index("Date")
-        inactive = set([x[0] for x in Account.objects.filter(is_active=False).values_list("number")])
-        ignore = list(set(data.columns) & inactive)
-        data = data.drop(labels=ignore, axis="columns")
 
         plt.close("all")
         anim, fig = _prepare(data, f"{category.module.code}:{category.label}")
@@ -2,9 +2,11 @@
 
 # Django imports
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.utils import timezone as tz
 
 # external imports
+import numpy as np
 import pytest
 
 # app imports
@@ -246,6 +248,244 @@ class TestTest:
         assert test.score_possible == 100.0
 
 
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestTestStats:
+    """Test the materialised Test_Stats table behind Test.stats."""
+
+    def test_stats_counts_results(self, sample_test, sample_user, sample_module, sample_status_code, user_model):
+        """Test that Test.stats reads passed, waiting and not attempted counts from Test_Stats.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            user_model (type): The Account model.
+
+        Examples:
+            >>> Test_Stats.refresh(Test.objects.filter(pk=test.pk))
+            >>> assert test.stats == {"Passed": 1, "": 0, "Not Attempted": 1}
+        """
+        # app imports
+        from .models import Test, Test_Score, Test_Stats
+
+        other = user_model.objects.create(username="other", number=2, first_name="Other", last_name="User")
+        sample_module.students.add(sample_user, other)
+        score = Test_Score.objects.create(test=sample_test, user=sample_user)
+        Test_Score.objects.filter(pk=score.pk).update(score=80.0, passed=True)
+
+        assert sample_test.stats == {"Passed": 1, "": 0, "Not Attempted": 1}
+        assert Test_Stats.objects.get(test=sample_test).waiting == 0
+
+        Test_Score.objects.create(test=sample_test, user=other)  # No score yet, so waiting for a mark
+        Test_Stats.refresh(Test.objects.filter(pk=sample_test.pk))
+
+        stats = Test.objects.select_related("progress").get(pk=sample_test.pk).progress
+        assert (stats.passed, stats.failed, stats.waiting, stats.not_attempted) == (1, 0, 1, 0)
+
+    def test_stats_refreshed_on_save(
+        self, sample_test, sample_user, sample_module, sample_status_code, django_capture_on_commit_callbacks
+    ):
+        """Test that saving a student's result refreshes the test's Test_Stats once the save commits.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            django_capture_on_commit_callbacks (callable): pytest-django on_commit capture.
+
+        Examples:
+            >>> Test_Score.objects.create(test=test, user=user)
+            >>> assert test.progress.waiting == 1
+        """
+        # app imports
+        from .models import Test_Score, Test_Stats
+
+        sample_module.students.add(sample_user)
+        assert sample_test.stats == {"": 0, "Not Attempted": 1}
+
+        with django_capture_on_commit_callbacks(execute=True) as callbacks:
+            Test_Score.objects.create(test=sample_test, user=sample_user)
+
+        assert callbacks
+        stats = Test_Stats.objects.get(test=sample_test)
+        assert (stats.waiting, stats.not_attempted) == (1, 0)
+
+    @pytest.mark.django_db(transaction=True)  # Outside a test transaction, so only the import can batch the saves
+    @pytest.mark.parametrize("n_students", [3, 6])
+    def test_stats_refreshed_once_per_import(
+        self, n_students, sample_test, sample_module, sample_status_code, user_model, monkeypatch
+    ):
+        """Test that importing a column of results refreshes the test's Test_Stats once, however many are saved.
+
+        Args:
+            n_students (int): The number of results in the imported column.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            user_model (type): The Account model.
+            monkeypatch (pytest.MonkeyPatch): Supplies the column's JSON in place of blob storage.
+
+        Examples:
+            >>> test.grades_from_columns()
+            >>> assert refreshes == 1
+        """
+        # Django imports
+        from django.test.utils import CaptureQueriesContext
+
+        # app imports
+        from . import json
+        from .models import GradebookColumn, ModuleEnrollment, Test_Stats
+
+        for ix in range(n_students):
+            student = user_model.objects.create(username=f"student{ix}", number=100 + ix)
+            sample_module.students.add(student)
+            ModuleEnrollment.objects.filter(module=sample_module, student=student).update(user_id=f"_{ix}_1")
+        GradebookColumn.objects.create(gradebook_id="_1_1", test=sample_test, module=sample_module, name="Column")
+        blob = [{"userId": f"_{ix}_1", "score": 75.0} for ix in range(n_students)]
+        monkeypatch.setattr(json, "get_blob_by_name", lambda name: blob)
+
+        with CaptureQueriesContext(connection) as ctx:
+            sample_test.grades_from_columns()
+
+        table = Test_Stats._meta.db_table
+        refreshes = [q for q in ctx.captured_queries if q["sql"].startswith(f'INSERT INTO "{table}"')]
+        assert len(refreshes) == 1
+        stats = Test_Stats.objects.get(test=sample_test)
+        assert (stats.passed, stats.not_attempted) == (n_students, 0)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestSummaryScoreBulk:
+    """Test calculating many SummaryScores for a test category at once."""
+
+    def test_calculate_tests_many(
+        self, sample_test, sample_user, sample_module, sample_status_code, user_model, django_assert_num_queries
+    ):
+        """Test that summaries are scored from two queries, count overdue tests as missing and update incrementally.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            user_model (type): The Account model.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> SummaryScore.calculate_tests_many(category, summaries)
+            >>> assert summaries[0].score == 50.0
+        """
+        # app imports
+        from .models import (
+            GradebookCalculator,
+            ModuleEnrollment,
+            SummaryScore,
+            Test,
+            Test_Score,
+            TestCategory,
+            get_calculator,
+        )
+
+        category = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw")
+        assert isinstance(get_calculator(category), GradebookCalculator)
+        Test.objects.filter(pk=sample_test.pk).update(category=category)
+        Test.objects.create(
+            name="Overdue Test",
+            test_id="overdue-test-id",
+            module=sample_module,
+            category=category,
+            passing_score=50.0,
+            score_possible=100.0,
+            release_date=tz.now() - tz.timedelta(days=10),
+            recommended_date=tz.now() - tz.timedelta(days=1),
+            grading_due=tz.now() + tz.timedelta(days=5),
+        )
+        other = user_model.objects.create(username="other", number=2, first_name="Other", last_name="User")
+        sample_module.students.add(sample_user, other)
+        score = Test_Score.objects.create(test=sample_test, user=sample_user)
+        Test_Score.objects.filter(pk=score.pk).update(score=80.0, passed=True)
+
+        summaries = []
+        for student in (sample_user, other):
+            summary = SummaryScore(
+                enrollment=ModuleEnrollment.objects.get(module=sample_module, student=student), category=category
+            )
+            summary.clean()
+            summaries.append(summary)
+
+        with django_assert_num_queries(2):
+            SummaryScore.calculate_tests_many(category, summaries)
+
+        assert summaries[0].score == 50.0
+        assert summaries[0].data["data"] == {"Not attempted": 1, "Passed\nfirst time": 1}
+        assert summaries[1].score == 0.0
+        assert summaries[1].data["data"] == {"Not attempted": 1}
+
+        single = SummaryScore(enrollment=summaries[0].enrollment, category=category)
+        single.clean()
+        single.calculate()
+        assert (single.score, single.data) == (summaries[0].score, summaries[0].data)
+
+        # Taking the overdue test updates just that entry and agrees with a full recalculation.
+        overdue = Test.objects.get(test_id="overdue-test-id")
+        (result,) = Test_Score.objects.bulk_create([Test_Score(test=overdue, user=other, score=30.0, passed=False)])
+        assert summaries[1].update_from_result(result)
+        assert summaries[1].score == 0.0
+        assert summaries[1].data["data"] == {"Not attempted": 0, "Not passed\n1 attempt": 1}
+        full = SummaryScore(enrollment=summaries[1].enrollment, category=category)
+        full.clean()
+        full.calculate()
+        assert (full.score, full.data) == (summaries[1].score, summaries[1].data)
+
+    def test_update_after_test_goes_overdue(self, sample_test, sample_user, sample_module, sample_status_code):
+        """Test that a result for a test that became overdue since the last full calculation forces a recount.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> summary.update_from_result(result)
+            False
+        """
+        # app imports
+        from .models import ModuleEnrollment, SummaryScore, Test, Test_Score, TestCategory
+
+        category = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw")
+        Test.objects.filter(pk=sample_test.pk).update(
+            category=category,
+            release_date=tz.now() - tz.timedelta(days=10),
+            recommended_date=tz.now() + tz.timedelta(days=1),
+        )
+        sample_module.students.add(sample_user)
+        summary = SummaryScore(
+            enrollment=ModuleEnrollment.objects.get(module=sample_module, student=sample_user), category=category
+        )
+        summary.clean()
+        summary.calculate()
+        assert summary.data["overdue_tests"] == []
+
+        Test.objects.filter(pk=sample_test.pk).update(recommended_date=tz.now() - tz.timedelta(days=1))
+        overdue = Test.objects.get(pk=sample_test.pk)
+        (result,) = Test_Score.objects.bulk_create([Test_Score(test=overdue, user=sample_user, score=30.0)])
+
+        assert not summary.update_from_result(result)
+        summary.calculate()
+        assert summary.score == 0.0
+        assert summary.data["data"] == {"Not attempted": 0, "Not passed\n1 attempt": 1}
+
+        # Even a stale overdue count never gives a negative number of tests not taken.
+        summary.data["overdue"] = 0
+        summary._summarise()
+        assert (summary.score, summary.data["data"]["Not attempted"]) == (0.0, 0)
+
+
 @pytest.mark.django_db
 @pytest.mark.unit
 class TestGradebookColumnChangeListForm:
@@ -399,3 +639,326 @@ class TestFeedbackApiHardening:
         from .api import FeednackViewSet
 
         assert "delete" not in FeednackViewSet.http_method_names
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScoreSnapshot:
+    """Test taking and reading back daily snapshots of category scores."""
+
+    def test_take_and_frame(self, sample_user, sample_module, sample_status_code):
+        """Test that a snapshot copies the summary scores and is replaced when taken again on the same day.
+
+        Args:
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> ScoreSnapshot.take(TestCategory.objects.all())
+            1
+        """
+        # app imports
+        from .models import ModuleEnrollment, ScoreSnapshot, SummaryScore, TestCategory
+
+        category = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw")
+        sample_module.students.add(sample_user)
+        enrollment = ModuleEnrollment.objects.get(module=sample_module, student=sample_user)
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {SummaryScore._meta.db_table} "
+                + "(module_id, student_id, enrollment_id, category_id, score, data) VALUES (%s, %s, %s, %s, %s, '{}')",
+                [sample_module.pk, sample_user.pk, enrollment.pk, category.pk, 40.0],
+            )
+        summaries = SummaryScore.objects.filter(category=category)
+
+        day = tz.now().date()
+        assert ScoreSnapshot.take(TestCategory.objects.all(), date=day - tz.timedelta(days=1)) == 1
+        summaries.update(score=60.0)
+        assert ScoreSnapshot.take(TestCategory.objects.all(), date=day) == 1
+        summaries.update(score=70.0)
+        assert ScoreSnapshot.take(TestCategory.objects.all(), date=day) == 1
+        assert ScoreSnapshot.take(TestCategory.objects.none()) == 0
+
+        frame = ScoreSnapshot.frame(category)
+        assert list(frame.columns) == [sample_user.number]
+        assert frame[sample_user.number].tolist() == [40.0, 70.0]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScoreVector:
+    """Test reading all of an account's category scores from one query."""
+
+    def test_score_vector(self, sample_user, sample_module, sample_status_code, django_assert_num_queries):
+        """Test that the category score properties share one memoised query or a prefetch.
+
+        Args:
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> account.score_vector["Homework"]
+            40.0
+        """
+        # external imports
+        from accounts.models import Account
+
+        # app imports
+        from .models import SCORE_VECTOR_PREFETCH, ModuleEnrollment, SummaryScore, TestCategory
+
+        sample_module.students.add(sample_user)
+        enrollment = ModuleEnrollment.objects.get(module=sample_module, student=sample_user)
+        homework = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw")
+        vitals = TestCategory.objects.create(module=sample_module, text="VITALs", category_id="vitals")
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            for category, score in ((homework, 40.0), (vitals, 75.0)):
+                cursor.execute(
+                    f"INSERT INTO {SummaryScore._meta.db_table} (module_id, student_id, enrollment_id, category_id, "
+                    + "score, data) VALUES (%s, %s, %s, %s, %s, '{}')",
+                    [sample_module.pk, sample_user.pk, enrollment.pk, category.pk, score],
+                )
+
+        account = Account.objects.get(pk=sample_user.pk)
+        with django_assert_num_queries(1):
+            assert account.tests_score == 40.0
+            assert account.vitals_score == 75.0
+            assert account.category_score(homework) == 40.0
+            assert np.isnan(account.labs_score)
+            assert np.isnan(account.engagement)
+
+        with django_assert_num_queries(2):
+            (account,) = Account.objects.filter(pk=sample_user.pk).prefetch_related(SCORE_VECTOR_PREFETCH)
+        with django_assert_num_queries(0):
+            assert (account.tests_score, account.vitals_score) == (40.0, 75.0)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestScorePivot:
+    """Test loading a students x tests grid of results in one query."""
+
+    def test_pivot(self, sample_test, sample_user, user_model, django_assert_num_queries):
+        """Test that results are keyed by student then test and carry the attempt count and standing annotations.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            user_model (type): The Account model.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> Test_Score.objects.pivot(students, tests)[student.pk][test.pk].standing
+            'Ok'
+        """
+        # app imports
+        from .models import Test_Attempt, Test_Score
+
+        other = user_model.objects.create(username="other", number=2, first_name="Other", last_name="User")
+        (result,) = Test_Score.objects.bulk_create([Test_Score(test=sample_test, user=sample_user, score=80.0)])
+        Test_Score.objects.filter(pk=result.pk).update(passed=True)
+        Test_Attempt.objects.bulk_create([Test_Attempt(test_entry=result, attempt_id="1", score=80.0)])
+
+        with django_assert_num_queries(1):
+            results = Test_Score.objects.pivot([sample_user.pk, other.pk], [sample_test.pk])
+            assert list(results) == [sample_user.pk]
+            cell = results[sample_user.pk][sample_test.pk]
+            assert (cell.score, cell.standing, cell.attempt_count) == (80.0, "Ok", 1)
+
+    def test_standing_memoised(self, sample_test, sample_user, django_assert_num_queries):
+        """Test that a result's standing and classes are worked out without queries and only once per request time.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> with frozen_now():
+            ...     result.bootstrap5_class
+            'bg-dark text-light'
+        """
+        # Python imports
+        from datetime import timedelta
+
+        # Django imports
+        from django.utils import timezone as tz
+
+        # external imports
+        from util.clock import frozen_now
+
+        # app imports
+        from .models import Test, Test_Score
+
+        past = tz.now() - timedelta(days=7)
+        Test.objects.filter(pk=sample_test.pk).update(release_date=past, recommended_date=past, grading_due=past)
+        Test_Score.objects.bulk_create([Test_Score(test=sample_test, user=sample_user, score=20.0)])
+        result = Test_Score.objects.select_related("test").get(test=sample_test, user=sample_user)
+
+        with frozen_now(), django_assert_num_queries(0):
+            assert result.manual_standing == "Missing"
+            assert (result.bootstrap5_class, result.icon) == ("bg-dark text-light", "bi bi-dash-square-dotted")
+            assert result.test.bootstrap5_class == "bg-dark text-light"
+        result.test.grading_due = tz.now() + timedelta(days=7)
+        assert result.manual_standing == "Missing"
+        assert result.test.manual_satus == "Overdue"
+
+    def test_vitals_tooltips(self, sample_test, sample_vital, sample_user, django_assert_num_queries):
+        """Test that a page of tooltips is built from two queries and then served from the cache.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> vitals_tooltips([result])
+            ['You passed:\n<ul>\n<li class="vital_passed">...</li>\n</ul>\n']
+        """
+        # external imports
+        from vitals.models import VITAL_Result, VITAL_Test_Map
+
+        # app imports
+        from .models import Test, Test_Score, vitals_tooltips
+
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True, condition="pass")
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
+        unmapped = Test.objects.create(name="Unmapped", module=sample_test.module, test_id="unmapped")
+        Test_Score.objects.bulk_create([Test_Score(test=sample_test, user=sample_user, score=80.0, passed=True)])
+        results = [
+            Test_Score.objects.select_related("test").get(test=sample_test, user=sample_user),
+            Test_Score(test=unmapped, user=sample_user),
+        ]
+
+        with django_assert_num_queries(2):
+            passed, unknown = vitals_tooltips(results)
+        assert passed.startswith("You passed:") and 'class="vital_passed"' in passed and sample_vital.name in passed
+        assert unknown == "Possible VITALs to be confirmed:"
+        with django_assert_num_queries(0):
+            assert results[0].vitals_text == passed
+            assert vitals_tooltips(results) == [passed, unknown]
+
+    def test_for_student_query_count(self, sample_test, sample_vital, sample_user, django_assert_max_num_queries):
+        """Test that a student's tab of results and tooltips costs the same few queries however many tests it shows.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_vital (VITAL): A test VITAL instance, passed by passing sample_test.
+            sample_user (Account): A test user instance.
+            django_assert_max_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> Test_Score.objects.for_student(student, tests)[test].standing
+            'Missing'
+        """
+        # Django imports
+        from django.utils import timezone as tz
+
+        # external imports
+        from vitals.models import VITAL_Test_Map
+
+        # app imports
+        from .models import Test, Test_Score, vitals_tooltips
+
+        VITAL_Test_Map.objects.create(vital=sample_vital, test=sample_test, sufficient=True)
+        Test_Score.objects.bulk_create([Test_Score(test=sample_test, user=sample_user, score=80.0, passed=True)])
+        now = tz.now()
+        for count in (1, 4):
+            for number in range(Test.objects.count(), count):  # Overdue, so the missing results are marked Missing
+                Test.objects.create(
+                    name=f"Extra {number}",
+                    module=sample_test.module,
+                    test_id=f"extra-{number}",
+                    release_date=now - tz.timedelta(days=14),
+                    recommended_date=now - tz.timedelta(days=7),
+                    grading_due=now + tz.timedelta(days=7),
+                )
+            tests = Test.objects.select_related("module", "category").order_by("pk")
+            with django_assert_max_num_queries(4):  # Tests, results, VITAL mappings and VITAL results
+                results = Test_Score.objects.for_student(sample_user, tests)
+                vitals_tooltips(results.values())
+                rows = [
+                    (result.pk, result.attempts_made, result.bootstrap5_class, result.icon, result.vitals_text)
+                    for result in results.values()
+                ]
+            assert all(result.test is test for test, result in results.items())
+            (pk, attempts, klass, icon, text), *missing = rows
+            assert pk is not None and attempts == 0
+            assert (klass, icon) == ("bg-success text-light", "bi bi-check")
+            assert text.startswith("You passed:") and f'href="{sample_vital.url}"' in text
+            assert missing == [
+                (None, 0, "bg-dark text-light", "bi bi-dash-square-dotted", "Possible VITALs to be confirmed:")
+            ] * (count - 1)
+
+    def test_results_rows(self, sample_test, sample_user, sample_module, sample_status_code, user_model):
+        """Test that the export rows cover every active student, in name order, across chunks.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): Status code needed for module enrolments.
+            user_model (type): The Account model.
+
+        Examples:
+            >>> next(module.test_results_rows())[:4]
+            ['SID', 'Last Name', 'First Name', 'Test Score']
+        """
+        # app imports
+        from .models import Test_Score
+
+        other = user_model.objects.create(username="other", number=2, first_name="Other", last_name="Aardvark")
+        sample_module.students.add(sample_user, other)
+        Test_Score.objects.bulk_create([Test_Score(test=sample_test, user=sample_user, score=80.0)])
+
+        header, *rows = sample_module.test_results_rows(chunk_size=1)
+        assert header == ["SID", "Last Name", "First Name"] + [
+            f"{sample_test.name} {part}" for part in ("Score", "Attempts", "Standing")
+        ]
+        assert [row[1] for row in rows] == ["Aardvark", sample_user.last_name]
+        assert rows[0][3:] == [None, 0, ""]
+        assert rows[1][3:5] == [80.0, 0]
+
+    def test_export_category_filter(self, sample_test, sample_module, user_model):
+        """Test that the export only accepts the id of one of the module's own test categories as its type.
+
+        Args:
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            user_model (type): The Account model.
+
+        Examples:
+            >>> ExportTestResultsView.as_view()(factory.get(url, {"type": "abc"}), module=module.pk).status_code
+            400
+        """
+        # Django imports
+        from django.http import Http404
+        from django.test import RequestFactory
+
+        # app imports
+        from .models import Module, TestCategory
+        from .views import ExportTestResultsView
+
+        other = Module.objects.create(
+            code="PHAS4321", exam_code=1, uuid="other-uuid", name="Other", credits=15, level=1, year=sample_module.year
+        )
+        homework = TestCategory.objects.create(module=sample_module, text="Homework", category_id="hw")
+        foreign = TestCategory.objects.create(module=other, text="Homework", category_id="hw")
+        sample_test.category = homework
+        sample_test.save()
+        admin = user_model.objects.create(username="admin", number=999999, is_staff=True, is_superuser=True)
+
+        def export(category):
+            request = RequestFactory().get("/minerva/export_test_results/", {"type": category})
+            request.user = admin
+            return ExportTestResultsView.as_view()(request, module=sample_module.pk)
+
+        assert export("abc").status_code == 400
+        with pytest.raises(Http404):
+            export(foreign.pk)
+        response = export(homework.pk)
+        assert response.status_code == 200
+        assert sample_test.name in b"".join(response.streaming_content).decode()
@@ -16,8 +16,9 @@ urlpatterns = [
     path("import_tests_stream/", views.StreamingImportTestsView.as_view()),
     path("import_history/", views.ImportTestHistoryView.as_view()),
     path("import_history_stream/", views.StreamingImportTestsHistoryView.as_view()),
-    path("test_view/", views.ShowTestResults.as_view()),
+    path("test_view/", views.ShowTestResults.as_view(), name="test_results"),
     path("test_barchart/", views.TestResultsBarChartView.as_view(), name="test-barchart"),
+    path("export_test_results/<int:module>/", views.ExportTestResultsView.as_view(), name="export_test_results"),
     path("generate_marksheet/", views.GenerateModuleMarksheetView.as_view()),
     path("complete_marksheet/", views.CompleteModuleMarksheetView.as_view()),
     path(
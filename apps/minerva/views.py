@@ -16,27 +16,27 @@ from django.core.exceptions import ObjectDoesNotExist
 from django.db.models import OuterRef, Q, Subquery
 from django.db.utils import IntegrityError
 from django.forms import ValidationError
-from django.http import HttpResponse, StreamingHttpResponse
+from django.http import HttpResponse, HttpResponseBadRequest
 from django.utils.html import format_html
-from django.views.generic import DetailView, FormView
+from django.shortcuts import get_object_or_404
+from django.views.generic import DetailView, FormView, View
 
 # external imports
 import numpy as np
 import pandas as pd
-from accounts.models import Account
+from accounts.models import DASHBOARD_BATCH, Account, DashboardSnapshot
 from accounts.views import StudentSummaryView
 from dal import autocomplete
 from django_tables2 import SingleTableMixin
 from django_tables2.columns import Column
-from django_tables2.paginators import LazyPaginator
 from htmx_views.views import HTMXProcessMixin
 from matplotlib import pyplot as plt
 from matplotlib.patches import Rectangle
 from matplotlib.style import context as plot_context
 from pytz import timezone
-from util.http import svg_data
+from util.http import SyncStreamingHttpResponse, svg_data, table_response
 from util.spreadsheet import Spreadsheet
-from util.tables import BaseTable
+from util.tables import BaseTable, KeysetPaginationMixin
 from util.views import (
     IsStaffViewMixin,
     IsStudentViewixin,
@@ -52,7 +52,16 @@ from .forms import (
     TestHistoryImportForm,
     TestImportForm,
 )
-from .models import Module, ModuleEnrollment, Test, Test_Attempt, Test_Score
+from .models import (
+    TEST_STATS_BATCH,
+    Module,
+    ModuleEnrollment,
+    Test,
+    Test_Attempt,
+    Test_Score,
+    Test_Stats,
+    TestCategory,
+)
 
 TZ = timezone(settings.TIME_ZONE)
 logger = logging.getLogger(__name__)
@@ -74,6 +83,32 @@ def _delimiter(filename):
             continue
 
 
+def _import_stream(rows, module):
+    """Yield from an import's *rows* generator, refreshing Test_Stats and dashboards once when it finishes.
+
+    The batches are only suspended while the generator runs up to its next row, never across a ``yield``, so other
+    requests served by the same thread between batches still refresh their own statistics and dashboards.
+
+    Args:
+        rows (generator):
+            The import's response generator.
+        module (Module):
+            The module whose tests the import saves results for.
+
+    Examples:
+        >>> response = SyncStreamingHttpResponse(_import_stream(self.response_generator(), module))
+    """
+    while True:
+        with TEST_STATS_BATCH.suspended(), DASHBOARD_BATCH.suspended():
+            try:
+                row = next(rows)
+            except StopIteration:
+                break
+        yield row
+    Test_Stats.refresh(Test.objects.filter(module=module))
+    DashboardSnapshot.outdate(module.students.values_list("pk", flat=True))
+
+
 def set_name(name):
     """Shorten a name to 30 characters and remove dots.
 
@@ -135,7 +170,7 @@ class StreamingImportTestsView(ImportTestsView):
         """Process the uploaded Gradebook data."""
         self.form = form
         self.module = form.cleaned_data["module"]
-        response = StreamingHttpResponse(iter(self.response_generator()))
+        response = SyncStreamingHttpResponse(_import_stream(self.response_generator(), self.module), batch_size=1)
         response["Content-Type"] = "text/plain"
         return response
 
@@ -282,7 +317,8 @@ class StreamingImportTestsHistoryView(ImportTestHistoryView):
     def form_valid(self, form):
         """Process the uploaded Gradebook data."""
         self.form = form
-        response = StreamingHttpResponse(iter(self.response_generator()))
+        module = form.cleaned_data["module"]
+        response = SyncStreamingHttpResponse(_import_stream(self.response_generator(), module), batch_size=1)
         response["Content-Type"] = "text/plain"
         return response
 
@@ -406,7 +442,7 @@ class TestResultColumn(Column):
         """Format the html for a score."""
         passed = test_score.passed
         score = test_score.score
-        attempted = test_score.attempts.count()
+        attempted = test_score.attempt_count
         for _, (attempts, colour) in settings.TESTS_ATTEMPTS_PROFILE[test_score.standing].items():
             if attempts < 0 or attempts >= attempted:
                 bg_color = colour
@@ -424,7 +460,7 @@ class TestResultColumn(Column):
     def format_attempts(self, test_score):
         """Format some html for counting attempts at passing."""
         bi_class = "bi bi-emoji-smile" if test_score.passed else "bi bi-emoji-frown"
-        attempted = test_score.attempts.count()
+        attempted = test_score.attempt_count
         for _, (attempts, colour) in settings.TESTS_ATTEMPTS_PROFILE[test_score.standing].items():
             if attempts < 0 or attempts >= attempted:
                 bg_color = colour
@@ -436,16 +472,14 @@ class TestResultColumn(Column):
         )
 
 
-class BaseShowTestResultsView(SingleTableMixin, HTMXProcessMixin, FormView):
+class BaseShowTestResultsView(KeysetPaginationMixin, SingleTableMixin, HTMXProcessMixin, FormView):
     """Most of the machinery to show a table of student test results."""
 
     form_class = ModuleSelectPlusForm
     table_class = BaseTable
-    paginator_class = LazyPaginator
     template_name = "minerva/test_results.html"
     template_name_next_batch = "minerva/parts/test_results_next_batch.html"
     context_table_name = "test_results"
-    table_pagination = {"per_page": 10}
 
     def __init__(self, *args, **kargs):
         """Construct instance variables."""
@@ -453,14 +487,14 @@ class BaseShowTestResultsView(SingleTableMixin, HTMXProcessMixin, FormView):
         self.mode = "scor3e"
         self.category = None
         self.tests = []
-        self._entries = []
+        self._entries = None
         super().__init__(*args, **kargs)
 
     @property
     def entries(self):
-        """Cache entries between metrhods."""
-        if len(self._entries) == 0:
-            self._entries = self.get_entries()
+        """Cache the current batch of students between methods."""
+        if self._entries is None:
+            self._entries = self.get_batch(self.get_entries())
         return self._entries
 
     def get_form_kwargs(self):
@@ -540,7 +574,9 @@ class BaseShowTestResultsView(SingleTableMixin, HTMXProcessMixin, FormView):
     def get_table_data(self):
         """Fill out the table with data, creating the entries for the MarkType columns to interpret."""
         tests = {set_name(test.name): test.pk for test in self.tests}
-        table = [Row_Dict(student, tests) for student in self.entries]
+        entries = list(self.entries)
+        results = Test_Score.objects.pivot([student.pk for student in entries], tests.values())
+        table = [Row_Dict(student, tests, results.get(student.pk, {})) for student in entries]
         return table
 
     def get_queryset(self):
@@ -549,23 +585,24 @@ class BaseShowTestResultsView(SingleTableMixin, HTMXProcessMixin, FormView):
 
 
 class Row_Dict:
-    """Proxy for a dictionary that delays evaluating the test results.
+    """Proxy for a dictionary that looks up a student's test results.
 
     Attributes:
         student: The student account object.
-        test_results: Prefetched test results for the student.
+        test_results (dict): The student's test results keyed by test ID.
         tests (dict): Dictionary mapping test names to test IDs.
     """
 
-    def __init__(self, student, tests):
+    def __init__(self, student, tests, test_results):
         """Initialise Row_Dict with student and test data.
 
         Args:
             student: The student account object.
             tests (dict): Dictionary mapping test names to test IDs.
+            test_results (dict): The student's test results keyed by test ID, from Test_Score.objects.pivot.
         """
         self.student = student
-        self.test_results = student.test_results.all()
+        self.test_results = test_results
         self.tests = tests
 
     def __getitem__(self, index):
@@ -589,10 +626,7 @@ class Row_Dict:
             case "status":
                 return self.student.status
             case test if test in self.tests:
-                try:
-                    return self.test_results.get(test__pk=self.tests[test])
-                except ObjectDoesNotExist:
-                    return None
+                return self.test_results.get(self.tests[test])
             case _:
                 return False
 
@@ -610,7 +644,6 @@ class ShowAllTestResultsViiew(IsSuperuserViewMixin, BaseShowTestResultsView):
             Account.objects.filter(module_enrollments__in=enroillments)
             .annotate(status=Subquery(status))
             .select_related("programme")
-            .prefetch_related("test_results__test")
             .order_by("last_name", "first_name")
         )
         return qs
@@ -627,7 +660,6 @@ class ShowTutorTestResultsViiew(IsStaffViewMixin, BaseShowTestResultsView):
             Account.objects.filter(module_enrollments__in=enroillments, tutorial_group__tutor=self.request.user)
             .annotate(status=Subquery(status))
             .select_related("programme")
-            .prefetch_related("test_results__test")
             .order_by("last_name", "first_name")
         )
         return qs
@@ -646,6 +678,25 @@ class ShowTestResults(RedirectView):
         return StudentSummaryView
 
 
+class ExportTestResultsView(IsSuperuserViewMixin, View):
+    """Stream every active student's results for a module's tests as a CSV or XLSX download.
+
+    The optional *type* query parameter restricts the export to one of the module's test categories, by pk, and
+    *format* selects csv (the default) or xlsx.
+    """
+
+    def get(self, request, module):
+        """Respond with the module's test results grid."""
+        module = get_object_or_404(Module, pk=module)
+        tests = module.tests.order_by("release_date", "name")
+        if category := request.GET.get("type"):
+            if not category.isdigit():
+                return HttpResponseBadRequest("type must be the id of a test category")
+            tests = tests.filter(category=get_object_or_404(TestCategory, pk=category, module=module))
+        fmt = "xlsx" if request.GET.get("format") == "xlsx" else "csv"
+        return table_response(module.test_results_rows(tests), f"{module.code}_test_results", fmt=fmt)
+
+
 class GenerateModuleMarksheetView(IsStaffViewMixin, FormView):
     """Handles creating a module marksheet from the database."""
 
@@ -849,11 +900,15 @@ class TestResultsBarChartView(IsStaffViewMixin, FormView):
                 vitals = Q(module=self.module)
                 if (sub_modules := self.module.sub_modules.all()).count() > 0:
                     vitals |= Q(module__in=sub_modules)
-                self.tests = VITAL.objects.filter(vitals).distinct().order_by("start_date")
+                self.tests = VITAL.objects.filter(vitals).select_related("progress").distinct().order_by("start_date")
             elif self.category.text.lower() == "tutorial":
                 self.tests = self.module.tutorial_sessions.distinct().order_by("semester", "week")
             else:
-                self.tests = self.module.tests.filter(category=self.category).order_by("release_date", "name")
+                self.tests = (
+                    self.module.tests.filter(category=self.category)
+                    .select_related("progress")
+                    .order_by("release_date", "name")
+                )
         return self.render_to_response(self.get_context_data())
 
     def get_context_data(self, **kwargs):
@@ -5,6 +5,7 @@ import logging
 from typing import Dict, List, Optional, Tuple, Union
 
 # Django imports
+from django.apps import apps
 from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import DEFAULT_DB_ALIAS, models
@@ -18,7 +19,7 @@ from django.utils.text import slugify
 import numpy as np
 from accounts.models import Account, Cohort, academic_Q, students_Q
 from constance import config
-from minerva.models import SummaryScore
+from minerva.models import SummaryCalculator, register_calculator
 from tinymce.models import HTMLField
 from util.models import colour, contrast, patch_model
 
@@ -412,54 +413,66 @@ class Meeting(models.Model):
         return slugify(self.name)
 
 
-@patch_model(SummaryScore)
-def calculate_tutorial(self):
-    """Patch a function to create a summary score object for a VITALs."""
-    data = {}
-    colours = {}
-    scores = self.student.engagement_scores()
-    for (score, label, _), col in zip(
-        settings.TUTORIAL_MARKS, ["silver", "tomato", "springgreen", "mediumseagreen", "forestgreen"]
-    ):
-        if count := scores[np.isclose(scores, score)].size:
-            data[label] = count
-            colours[label] = col
-    self.data["data"] = data
-    self.data["colours"] = colours
-    try:
-        record = (
-            np.array(
-                self.enrollment.student.tutorial_sessions.filter(session__cohort=self.student.cohort)
-                .order_by("-session__start")
-                .values_list("score")
+@register_calculator("tutorial")
+class TutorialCalculator(SummaryCalculator):
+    """Score tutorial categories from the students' tutorial engagement marks.
+
+    The score is an exponentially time-weighted mean of the marks for the student's tutorial cohort, the plot shows
+    the histogram of their most recent marks. The students' tutorial cohorts and tutorial marks are each read with
+    one query for the whole batch.
+    """
+
+    recent = 11  # Number of recent sessions in the histogram, as per Account.engagement_scores
+
+    def calculate_many(self, summaries):
+        """Calculate the tutorial summaries in place."""
+        ModuleEnrollment = apps.get_model("minerva", "ModuleEnrollment")
+        students = {summary.student_id for summary in summaries}
+        cohorts = dict(
+            ModuleEnrollment.objects.filter(student__in=students, module__code=config.TUTORIAL_MODULE).values_list(
+                "student", "module__year"
             )
-            .ravel()
-            .astype(float)
         )
-        if record.size > 0:
-            record = np.where(record < 0, np.nan, record)
-            record = np.where(record == 2, 3, record)  # Good and excellent engagement should count the same
-            weight = np.exp(-np.arange(len(record)) / config.ENGAGEMENT_TC)
-            perfect = (3 * np.ones_like(record) * weight)[~np.isnan(record)].sum()
-            actual = (record * weight)[~np.isnan(record)].sum()
-            result = np.round(100 * actual / perfect, 1)
-        else:
-            result = None
-
-        self.score = result
-    except (ValueError, ZeroDivisionError):
-        self.score = None
-    return self.score
+        records = {student_id: [] for student_id in students}
+        for student_id, cohort_id, score in (
+            Attendance.objects.filter(student__in=students, type=SessionType.TUTORIAL)
+            .order_by("-session__start")
+            .values_list("student", "session__cohort", "score")
+        ):
+            if cohort_id == cohorts.get(student_id):
+                records[student_id].append(score)
+        for summary in summaries:
+            self._calculate(summary, np.array(records[summary.student_id], dtype=float))
+
+    def _calculate(self, summary, record):
+        """Set the score and plot data from a student's tutorial marks, most recent first."""
+        data = {}
+        colours = {}
+        scores = record[: self.recent]
+        for (score, label, _), col in zip(
+            settings.TUTORIAL_MARKS, ["silver", "tomato", "springgreen", "mediumseagreen", "forestgreen"]
+        ):
+            if count := scores[np.isclose(scores, score)].size:
+                data[label] = count
+                colours[label] = col
+        summary.data["data"] = data
+        summary.data["colours"] = colours
+        if record.size == 0:
+            summary.score = None
+            return
+        record = np.where(record < 0, np.nan, record)
+        record = np.where(record == 2, 3, record)  # Good and excellent engagement should count the same
+        weight = np.exp(-np.arange(len(record)) / config.ENGAGEMENT_TC)
+        perfect = (3 * np.ones_like(record) * weight)[~np.isnan(record)].sum()
+        actual = (record * weight)[~np.isnan(record)].sum()
+        with np.errstate(invalid="ignore", divide="ignore"):
+            summary.score = np.round(100 * actual / perfect, 1)
 
 
 @patch_model(Account, prep=property)
 def engagement(self):
     """Get engagement score from Summary Score."""
-    summary = np.array(self.summary_scores.filter(category__text="Tutorial").values_list("module__credits", "score"))
-    summary = summary.astype(float)
-    if summary.size == 0:
-        return np.nan
-    return float(np.nansum(np.nanprod(summary, axis=1)) / np.nansum(summary[:, 0]))
+    return self.category_score("Tutorial")
 
 
 @patch_model(Account, prep=property)
@@ -1,6 +1,51 @@
 """Tests for tutorials app."""
 
 # Django imports
-# from django.test import TestCase
+from django.utils import timezone as tz
 
-# Create your tests here.
+# external imports
+import pytest
+from constance.test import override_config
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestTutorialCalculator:
+    """Test the tutorial engagement SummaryScore calculator."""
+
+    def test_calculate_many(self, sample_module, sample_user, sample_cohort, sample_status_code):
+        """Test that the score is a time weighted engagement mean and the plot counts the recent marks.
+
+        Args:
+            sample_module (Module): A test module instance, used as the tutorial module.
+            sample_user (Account): A test user instance.
+            sample_cohort (Cohort): A test cohort instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> get_calculator(category).calculate_many([summary])
+            >>> assert summary.score == 100.0
+        """
+        # external imports
+        from minerva.models import SummaryScore, TestCategory, get_calculator
+
+        # app imports
+        from .models import Attendance, Session, SessionType, TutorialCalculator
+
+        sample_module.students.add(sample_user)
+        today = tz.now().date()
+        for week, score in enumerate([3.0, 2.0, -1.0]):  # Oldest first
+            start = today + tz.timedelta(days=7 * week)
+            session = Session.objects.create(name=f"Week {week}", cohort=sample_cohort, start=start, end=start)
+            Attendance.objects.create(student=sample_user, session=session, type=SessionType.TUTORIAL, score=score)
+        category = TestCategory.objects.create(module=sample_module, text="Tutorial", category_id="tutorial")
+        summary = SummaryScore(enrollment=sample_user.module_enrollments.get(), category=category)
+        summary.clean()
+
+        calculator = get_calculator(category)
+        assert isinstance(calculator, TutorialCalculator)
+        with override_config(TUTORIAL_MODULE=sample_module.code):
+            calculator.calculate_many([summary])
+
+        assert summary.score == 100.0  # The allowed absence is ignored and good counts as outstanding
+        assert sum(summary.data["data"].values()) == 3
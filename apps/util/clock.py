@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""A request-scoped "now" so that every status calculated while handling one request agrees on the time.
+
+Test and VITAL statuses are worked out in Python from the current time, often several times for each cell of a
+table. :class:`RequestNowMiddleware` freezes the time at the start of each request and :func:`now` returns it,
+falling back to the real time outside of a request (e.g. in celery tasks).
+"""
+
+# Python imports
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# Django imports
+from django.utils import timezone as tz
+
+# external imports
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+_NOW = ContextVar("request_now", default=None)
+
+
+def now():
+    """Return the frozen time of the current request, or the actual time if there isn't one."""
+    if (frozen := _NOW.get()) is not None:
+        return frozen
+    return tz.now()
+
+
+@contextmanager
+def frozen_now(when=None):
+    """Freeze the value returned by :func:`now` for the duration of the with block.
+
+    Keyword Arguments:
+        when (datetime, None):
+            The time to freeze at - defaults to the current time.
+
+    Examples:
+        >>> with frozen_now():
+        ...     assert now() == now()
+    """
+    token = _NOW.set(when or tz.now())
+    try:
+        yield _NOW.get()
+    finally:
+        _NOW.reset(token)
+
+
+class RequestNowMiddleware:
+    """Freeze :func:`now` for the whole of each request, in both sync and async middleware chains.
+
+    The frozen time is held in a context variable, which is copied into the threads that sync code is run in when
+    serving over ASGI.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Record the next handler in the chain."""
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Handle the request with the time frozen at its start."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with frozen_now() as request.now:
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        """Handle the request asynchronously with the time frozen at its start."""
+        with frozen_now() as request.now:
+            return await self.get_response(request)
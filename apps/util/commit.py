@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""Defer follow-up work until the current database transaction commits, batching it across many changes.
+
+Saving a single result has to refresh some derived tables, but a pipeline may save thousands of results in one
+transaction. A :class:`CommitBatch` collects the keys of everything changed and hands them to its callback in one go
+once the transaction commits (or straight away outside a transaction).
+"""
+
+# Python imports
+from contextlib import contextmanager
+from threading import local
+
+# Django imports
+from django.db import transaction
+
+
+class CommitBatch:
+    """Collect keys during a transaction and pass them all to *callback* once it commits.
+
+    Args:
+        callback (callable):
+            Called with the set of keys added since the last commit.
+
+    Examples:
+        >>> stats = CommitBatch(lambda pks: Test_Stats.refresh(Test.objects.filter(pk__in=pks)))
+        >>> stats.add(test.pk)
+    """
+
+    def __init__(self, callback):
+        """Store the callback and start with nothing pending."""
+        self.callback = callback
+        self._local = local()
+
+    @property
+    def pending(self):
+        """The keys waiting for the current thread's transaction to commit."""
+        if not hasattr(self._local, "pending"):
+            self._local.pending = set()
+        return self._local.pending
+
+    def add(self, *keys):
+        """Queue *keys* for the callback when the current transaction commits, unless the batch is suspended."""
+        if getattr(self._local, "suspended", 0) or not keys:
+            return
+        self.pending.update(keys)
+        transaction.on_commit(self.flush)
+
+    def flush(self):
+        """Pass everything pending to the callback - later callbacks for the same transaction find nothing to do."""
+        keys, self._local.pending = self.pending, set()
+        if keys:
+            self.callback(keys)
+
+    @contextmanager
+    def suspended(self):
+        """Ignore changes within the with block, for bulk jobs that refresh everything themselves afterwards."""
+        self._local.suspended = getattr(self._local, "suspended", 0) + 1
+        try:
+            yield self
+        finally:
+            self._local.suspended -= 1
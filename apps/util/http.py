@@ -3,16 +3,21 @@
 
 # Python imports
 import base64 as b64
+import csv
 import io
+import tempfile
 from io import BytesIO
+from itertools import islice
 from mimetypes import guess_type
 
 # Django imports
-from django.http import HttpResponse
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 
 # external imports
 import magic
+from asgiref.sync import sync_to_async
 import matplotlib.pyplot as plt
+import openpyxl as opx
 
 
 class ChunkedString(io.StringIO):
@@ -106,3 +111,99 @@ class SVGResponse(HttpResponse):
 
         kwargs.setdefault("content_type", "image/svg+xml")
         super(SVGResponse, self).__init__(**kwargs)
+
+
+class SyncStreamingMixin:
+    """Make a streaming response of a synchronous iterator still stream when served over ASGI.
+
+    Django's ASGI handler reads a synchronous iterator into a list before sending any of it. Responses with this mixin
+    instead pull *batch_size* parts at a time from the iterator in the request's sync thread, so views that generate
+    their content with the ORM stream the same way under ASGI as they do under WSGI.
+
+    Keyword Arguments:
+        batch_size (int, None):
+            The number of parts pulled from the iterator per switch to the sync thread under ASGI - defaults to the
+            class's *batch_size*.
+    """
+
+    batch_size = 100
+
+    def __init__(self, *args, batch_size=None, **kwargs):
+        """Store the batch size and build the response as usual."""
+        if batch_size is not None:
+            self.batch_size = batch_size
+        super().__init__(*args, **kwargs)
+
+    async def __aiter__(self):
+        """Yield the content in an async loop, reading a synchronous iterator a batch at a time in the sync thread."""
+        if self.is_async:
+            async for part in super().__aiter__():
+                yield part
+            return
+        content = iter(self.streaming_content)
+        next_batch = sync_to_async(lambda: list(islice(content, self.batch_size)), thread_sensitive=True)
+        while batch := await next_batch():
+            for part in batch:
+                yield part
+
+
+class SyncStreamingHttpResponse(SyncStreamingMixin, StreamingHttpResponse):
+    """A StreamingHttpResponse of a synchronous iterator that streams under both WSGI and ASGI.
+
+    Examples:
+        >>> SyncStreamingHttpResponse((f"{row}\\n" for row in rows), content_type="text/plain")
+    """
+
+
+class SyncFileResponse(SyncStreamingMixin, FileResponse):
+    """A FileResponse that streams the file a few blocks at a time under both WSGI and ASGI."""
+
+    batch_size = 4
+
+
+class Echo:
+    """A pseudo-buffer whose write method just returns the value, so csv.writer can feed a streaming response."""
+
+    def write(self, value):
+        """Return the value rather than storing it."""
+        return value
+
+
+def table_response(rows, filename, fmt="csv"):
+    """Return a response that sends an iterable of rows as a CSV or Excel file without holding them all in memory.
+
+    CSV rows are streamed to the client as they are produced. An Excel file cannot be sent until it is complete,
+    so the rows are written with openpyxl's write-only mode to a temporary file which is then streamed.
+
+    Args:
+        rows (iterable of lists):
+            The header and data rows - typically a generator.
+        filename (str):
+            The download file name without the suffix.
+
+    Keyword Arguments:
+        fmt (str):
+            Either "csv" or "xlsx".
+
+    Returns:
+        (SyncStreamingHttpResponse, SyncFileResponse):
+            The response to send.
+    """
+    if fmt == "xlsx":
+        workbook = opx.Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=filename[:31])
+        for row in rows:
+            sheet.append(row)
+        output = tempfile.TemporaryFile()
+        workbook.save(output)
+        output.seek(0)
+        return SyncFileResponse(
+            output,
+            as_attachment=True,
+            filename=f"{filename}.xlsx",
+            content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    writer = csv.writer(Echo())
+    response = SyncStreamingHttpResponse((writer.writerow(row) for row in rows), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Per-request SQL query and timing statistics, checked against budgets set for named views.
+
+:class:`QueryBudgetMiddleware` records how many queries each request makes, which of them are repeats of the same
+query with different values (the usual sign of an N+1 loop), and how long was spent in the database and in rendering
+templates. The statistics are attached to the request as *request.query_stats*, sent as a Server-Timing header when
+DEBUG is on, and compared with the budget in the QUERY_BUDGETS setting for the view's URL name. Going over budget is
+logged and sends :data:`query_budget_exceeded`, which the pytest plugin in :mod:`util.testing` turns into a failed test.
+"""
+
+# Python imports
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+# Django imports
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import Signal
+
+# external imports
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+logger = logging.getLogger(__name__)
+
+# Sent with request, stats and breaches keyword arguments when a request goes over its view's budget.
+query_budget_exceeded = Signal()
+
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_NUMBERS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_VALUE_LISTS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+
+# The statistics being recorded for the current request - a context variable, so that it follows the request into the
+# threads that run its sync code when served over ASGI.
+_CURRENT_STATS = ContextVar("query_stats", default=None)
+
+
+def fingerprint(sql):
+    """Reduce *sql* to a form that is the same for every run of a query whatever values it is run with.
+
+    Args:
+        sql (str):
+            The SQL as passed to the database cursor.
+
+    Returns:
+        (str):
+            The SQL with literals and placeholders replaced by ?, lists of values collapsed to (...) and whitespace
+            normalised.
+
+    Examples:
+        >>> fingerprint('SELECT * FROM "t" WHERE "id" IN (%s, %s) AND "name" = \\'x\\'')
+        'SELECT * FROM "t" WHERE "id" IN (...) AND "name" = ?'
+    """
+    sql = _NUMBERS.sub("?", _STRINGS.sub("?", sql)).replace("%s", "?")
+    return " ".join(_VALUE_LISTS.sub("(...)", sql).split())
+
+
+def _record_query(execute, sql, params, many, context):
+    """Pass a query to the :class:`RequestStats` being recorded in the current context, if there is one."""
+    if (stats := _CURRENT_STATS.get()) is None:
+        return execute(sql, params, many, context)
+    return stats(execute, sql, params, many, context)
+
+
+def _install_recorder(connection, **kwargs):
+    """Add the query recorder to *connection*'s execute wrappers unless it is already there."""
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def stats_enabled():
+    """Whether per-request statistics are wanted, which is when DEBUG or the QUERY_STATS_ENABLED setting is on."""
+    return settings.DEBUG or getattr(settings, "QUERY_STATS_ENABLED", False)
+
+
+if stats_enabled():  # Wrapping every query has a small cost, so only when the statistics are wanted.
+    connection_created.connect(_install_recorder)
+
+
+class RequestStats:
+    """The queries and timings recorded while handling one request.
+
+    An instance is a database execute wrapper, called for every query made while :meth:`record` is active. All times
+    are in seconds.
+    """
+
+    def __init__(self):
+        """Start with nothing recorded."""
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.total_time = 0.0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        """Time and fingerprint one query as it is executed."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - start
+            self.queries += 1
+            self.fingerprints[fingerprint(sql)] += 1
+
+    @contextmanager
+    def record(self):
+        """Record every query made on any database connection, and the total time taken, within the with block.
+
+        Database connections belong to a thread, so a recorder is added to this thread's connections and, when
+        statistics are enabled, to every new connection, where it passes the queries on to the statistics held in a
+        context variable. Queries made by sync code that async code in the with block runs in
+        other threads are recorded too.
+        """
+        for connection in connections.all():
+            _install_recorder(connection)
+        token = _CURRENT_STATS.set(self)
+        start = perf_counter()
+        try:
+            yield self
+        finally:
+            self.total_time += perf_counter() - start
+            _CURRENT_STATS.reset(token)
+
+    @property
+    def duplicates(self):
+        """The number of queries that repeated an earlier query with different (or the same) values."""
+        return sum(count - 1 for count in self.fingerprints.values())
+
+    def most_repeated(self, count=3):
+        """Return the *count* most repeated query fingerprints with how many times each was run."""
+        return [(sql, runs) for sql, runs in self.fingerprints.most_common(count) if runs > 1]
+
+    def over_budget(self, budget):
+        """Return a description of each way these statistics exceed *budget*.
+
+        Args:
+            budget (dict, None):
+                The maximum *queries*, *duplicates* and *db_time* (milliseconds) allowed - missing keys, or a budget
+                of None, are not checked.
+
+        Returns:
+            (list of str):
+                One message per exceeded limit - empty if the request was within budget.
+        """
+        breaches = []
+        if not budget:
+            return breaches
+        if (limit := budget.get("queries")) is not None and self.queries > limit:
+            breaches.append(f"{self.queries} queries (budget {limit})")
+        if (limit := budget.get("duplicates")) is not None and self.duplicates > limit:
+            repeated = "; ".join(f"{runs}x {sql[:120]}" for sql, runs in self.most_repeated())
+            breaches.append(f"{self.duplicates} duplicate queries (budget {limit}): {repeated}")
+        if (limit := budget.get("db_time")) is not None and self.db_time * 1000 > limit:
+            breaches.append(f"{self.db_time * 1000:.1f}ms in the database (budget {limit}ms)")
+        return breaches
+
+    def server_timing(self):
+        """Return the statistics formatted as the value of a Server-Timing header."""
+        return ", ".join(
+            [
+                f'db;dur={self.db_time * 1000:.1f};desc="{self.queries} queries, {self.duplicates} duplicates"',
+                f"render;dur={self.render_time * 1000:.1f}",
+                f"total;dur={self.total_time * 1000:.1f}",
+            ]
+        )
+
+
+def budget_for(request):
+    """Return the QUERY_BUDGETS entry for the URL name of the view that handled *request*, or None."""
+    if (match := getattr(request, "resolver_match", None)) is None:
+        return None
+    return getattr(settings, "QUERY_BUDGETS", {}).get(match.view_name)
+
+
+class QueryBudgetMiddleware:
+    """Record :class:`RequestStats` for each request and check them against the view's query budget.
+
+    Only used when DEBUG or the QUERY_STATS_ENABLED setting is on, since wrapping every query has a small cost. It
+    works in both sync and async chains, so it doesn't make an ASGI server switch threads to call it.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Record the next handler in the chain, or drop out of the chain if statistics are not wanted."""
+        if not stats_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        """Handle the request while recording its statistics, then report on them."""
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with RequestStats().record() as request.query_stats:
+            response = self.get_response(request)
+        return self.report(request, response)
+
+    async def __acall__(self, request):
+        """Handle the request asynchronously while recording its statistics, then report on them.
+
+        Database connections are shared between a request's async code and the threads its sync code runs in, so the
+        queries made by sync views are recorded too.
+        """
+        with RequestStats().record() as request.query_stats:
+            response = await self.get_response(request)
+        return self.report(request, response)
+
+    def report(self, request, response):
+        """Check the statistics of a handled request against its view's budget and add the Server-Timing header."""
+        stats = request.query_stats
+        if breaches := stats.over_budget(budget_for(request)):
+            logger.warning("%s %s over query budget: %s", request.method, request.path, ", ".join(breaches))
+            query_budget_exceeded.send(sender=self.__class__, request=request, stats=stats, breaches=breaches)
+        if settings.DEBUG:
+            response["Server-Timing"] = stats.server_timing()
+        return response
+
+    def process_template_response(self, request, response):
+        """Time the rendering of a template response, which happens straight after this hook."""
+        start = perf_counter()
+
+        def rendered(response):
+            request.query_stats.render_time += perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
@@ -10,3 +10,10 @@ CONSTANCE_CONFIG = {
     "TASK_CLEANUP": (7, "Number of days to keep celery TaskResults", int),
     "HEARTBEAT": (tz.now(), "Last time the heartbeat was run", datetime),
 }
+
+# Record query statistics for every request even when DEBUG is off - see util.profiling
+QUERY_STATS_ENABLED = False
+
+# Per-request limits on queries, duplicate queries and database time (ms), keyed by namespaced URL name.
+# Apps add the budgets for their own views in their settings modules.
+QUERY_BUDGETS = {}
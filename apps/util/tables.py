@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 """Common django-tables classes."""
 # Django imports
+from django.core import signing
+from django.db.models import Q
 from django.utils.html import format_html
 
 # external imports
@@ -36,3 +38,74 @@ class BaseTable(Table):
     number = Column(orderable=False, attrs={"td": {"class": "SID"}})
     programme = Column(orderable=False, attrs={"td": {"class": "Prgoramme"}})
     status = Column(attrs={"th": {"class": "vertical"}, "td": {"class": "status"}}, orderable=False)
+
+
+def keyset_filter(queryset, fields, cursor):
+    """Filter *queryset* to the rows that sort after *cursor* when ordered by *fields*.
+
+    Args:
+        queryset (QuerySet):
+            The rows to filter.
+        fields (sequence of str):
+            The (ascending) ordering fields - the last should be unique.
+        cursor (sequence):
+            The values of *fields* of the last row already seen.
+
+    Returns:
+        (QuerySet):
+            The rows after *cursor*, ordered by *fields*.
+
+    Examples:
+        >>> keyset_filter(Account.objects.all(), ("last_name", "pk"), ("Smith", 42))
+    """
+    after = Q()
+    for ix, (field, value) in enumerate(zip(fields, cursor)):
+        after |= Q(**dict(zip(fields[:ix], cursor[:ix])), **{f"{field}__gt": value})
+    return queryset.filter(after).order_by(*fields)
+
+
+class KeysetPaginationMixin:
+    """Show a table of students in batches that follow on from the last student shown, rather than by page number.
+
+    Each batch is fetched with a query that seeks past the (last name, first name, pk) of the previous batch's last
+    student, so loading the end of a long table costs no more than loading the start. The view's table data should
+    come from :meth:`get_batch` and the table template should load the next batch from ``?after={{ next_cursor }}``.
+    """
+
+    keyset_fields = ("last_name", "first_name", "pk")
+    batch_size = 10
+    table_pagination = False
+
+    def __init__(self, *args, **kwargs):
+        """Start with no following batch."""
+        self.next_cursor = None
+        super().__init__(*args, **kwargs)
+
+    def get_cursor(self):
+        """Return the keyset values of the last row already shown, or None for the first batch."""
+        if not (token := self.request.GET.get("after")):
+            return None
+        try:
+            return signing.loads(token, salt="keyset")
+        except signing.BadSignature:
+            return None
+
+    def get_batch(self, queryset):
+        """Return the next batch of rows of *queryset* and record the cursor for the batch after it."""
+        if (cursor := self.get_cursor()) is not None:
+            queryset = keyset_filter(queryset, self.keyset_fields, cursor)
+        else:
+            queryset = queryset.order_by(*self.keyset_fields)
+        rows = list(queryset[: self.batch_size + 1])
+        if len(rows) > self.batch_size:
+            rows = rows[: self.batch_size]
+            last = rows[-1]
+            values = [getattr(last, field) for field in self.keyset_fields]
+            self.next_cursor = signing.dumps(values, salt="keyset")
+        return rows
+
+    def get_context_data(self, **kwargs):
+        """Add the cursor for the next batch to the context."""
+        context = super().get_context_data(**kwargs)
+        context["next_cursor"] = self.next_cursor
+        return context
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+"""A pytest plugin that fails any test in which a request goes over its view's query budget.
+
+Loaded from the project conftest.py. Requests made through the Django test client pass through
+:class:`util.profiling.QueryBudgetMiddleware`, which checks them against the QUERY_BUDGETS setting; this plugin
+collects the breaches it reports and fails the test that caused them. Tests that deliberately exceed a budget can be
+marked with ``@pytest.mark.query_budget_exempt``. The statistics for a request are available to the test as
+``response.wsgi_request.query_stats``.
+"""
+
+# external imports
+import pytest
+
+# app imports
+from .profiling import query_budget_exceeded
+
+
+def pytest_configure(config):
+    """Register the marker that turns off budget checking for a test."""
+    config.addinivalue_line("markers", "query_budget_exempt: do not fail the test when a request exceeds its budget")
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    """Run the test, then fail it if any request it made went over budget."""
+    failures = []
+
+    def record(sender, request, stats, breaches, **kwargs):
+        failures.append(f"{request.method} {request.path}: {', '.join(breaches)}")
+
+    query_budget_exceeded.connect(record, weak=False)
+    try:
+        result = yield
+    finally:
+        query_budget_exceeded.disconnect(record)
+    if failures and item.get_closest_marker("query_budget_exempt") is None:
+        pytest.fail("Query budget exceeded:\n" + "\n".join(failures), pytrace=False)
+    return result
@@ -0,0 +1,12 @@
+# -*- coding: utf-8 -*-
+"""An app-only URL configuration for view tests.
+
+The project's phas_vitals.urls needs the production settings (and so the deployment's secrets), the admin and every
+app's optional dependencies. Tests of the student and results pages set ROOT_URLCONF to this module instead, which
+mounts just those apps at the same paths.
+"""
+
+# Django imports
+from django.urls import include, path
+
+urlpatterns = [path(f"{app}/", include(f"{app}.urls")) for app in ["accounts", "htmx_views", "minerva", "vitals"]]
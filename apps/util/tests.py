@@ -7,6 +7,7 @@ import json
 
 # Django imports
 from django.db import connection
+from django.http import HttpResponse
 
 import pytest
 from rest_framework.test import APIRequestFactory
@@ -81,3 +82,379 @@ class TestAPIKeyStorage:
 
         assert user.pk == sample_user.pk
         assert getattr(user, "hmac_authenticated", False) is True
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestKeysetPagination:
+    """Test paging a table of students by seeking past the last student shown."""
+
+    def test_batches_follow_on(self, user_model):
+        """Test that following the cursors visits every student once, in name order.
+
+        Args:
+            user_model (type): The Account model.
+
+        Examples:
+            >>> view.get_batch(Account.objects.all())
+            [<Account: ...>, <Account: ...>]
+        """
+        # Django imports
+        from django.test import RequestFactory
+
+        # app imports
+        from util.tables import KeysetPaginationMixin
+
+        names = [("Smith", "Ann"), ("Jones", "Bob"), ("Smith", "Ann"), ("Adams", "Cy")]
+        for number, (last, first) in enumerate(names):
+            user_model.objects.create(username=f"user{number}", number=number + 1, last_name=last, first_name=first)
+
+        class View(KeysetPaginationMixin):
+            batch_size = 2
+
+        seen, cursor = [], None
+        while True:
+            view = View()
+            view.request = RequestFactory().get("/", {"after": cursor} if cursor else {})
+            seen.extend(student.username for student in view.get_batch(user_model.objects.all()))
+            if (cursor := view.next_cursor) is None:
+                break
+        assert seen == ["user3", "user1", "user0", "user2"]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestQueryBudget:
+    """Test recording per-request query statistics and checking them against view budgets."""
+
+    def test_fingerprint(self):
+        """Test that the same query run with different values has the same fingerprint.
+
+        Examples:
+            >>> fingerprint('SELECT 1 FROM "t" WHERE "id" = 3')
+            'SELECT ? FROM "t" WHERE "id" = ?'
+        """
+        # app imports
+        from util.profiling import fingerprint
+
+        assert fingerprint('SELECT * FROM "t" WHERE "id" IN (1, 2) AND "x" = \'it\'\'s\'') == fingerprint(
+            'SELECT  *  FROM "t" WHERE "id" IN (%s, %s, %s) AND "x" = %s'
+        )
+        assert fingerprint('SELECT "U0"."id" FROM "t" U0') == 'SELECT "U0"."id" FROM "t" U0'
+
+    @pytest.mark.query_budget_exempt
+    def test_middleware_flags_over_budget(self, user_model, settings):
+        """Test that a request making a query per row is reported as over its view's budget.
+
+        Args:
+            user_model (type): The Account model.
+            settings (SettingsWrapper): pytest-django settings fixture.
+
+        Examples:
+            >>> response.wsgi_request.query_stats.queries
+            3
+        """
+        # Django imports
+        from django.test import RequestFactory
+        from django.urls import ResolverMatch
+
+        # app imports
+        from util.profiling import QueryBudgetMiddleware, query_budget_exceeded
+
+        settings.DEBUG = True
+        settings.QUERY_BUDGETS = {"util:rows": {"queries": 2, "duplicates": 1}}
+
+        def view(request):
+            request.resolver_match = ResolverMatch(view, (), {}, url_name="rows", namespaces=["util"])
+            for number in range(3):
+                user_model.objects.filter(number=number).exists()
+            return HttpResponse()
+
+        reported = []
+
+        def record(sender, request, stats, breaches, **kwargs):
+            reported.extend(breaches)
+
+        query_budget_exceeded.connect(record, weak=False)
+        try:
+            request = RequestFactory().get("/rows/")
+            response = QueryBudgetMiddleware(view)(request)
+        finally:
+            query_budget_exceeded.disconnect(record)
+
+        assert (request.query_stats.queries, request.query_stats.duplicates) == (3, 2)
+        assert len(reported) == 2 and reported[0].startswith("3 queries")
+        assert response["Server-Timing"].startswith("db;dur=")
+
+    def test_async_middleware_chain(self, user_model):
+        """Test that the middleware records queries and freezes the time in an async chain without adapting it.
+
+        Args:
+            user_model (type): The Account model.
+
+        Examples:
+            >>> iscoroutinefunction(QueryBudgetMiddleware(async_view))
+            True
+        """
+        # Django imports
+        from django.test import RequestFactory
+
+        # external imports
+        from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+
+        # app imports
+        from util.clock import RequestNowMiddleware, now
+        from util.profiling import QueryBudgetMiddleware
+
+        seen = []
+
+        async def view(request):
+            seen.append(now())
+            await sync_to_async(user_model.objects.exists)()
+            return HttpResponse()
+
+        handler = QueryBudgetMiddleware(RequestNowMiddleware(view))
+        assert iscoroutinefunction(handler)
+        request = RequestFactory().get("/")
+        async_to_sync(handler)(request)
+        assert seen == [request.now]
+        assert request.query_stats.queries == 1
+
+
+@pytest.mark.unit
+class TestSyncStreaming:
+    """Test streaming responses of synchronous iterators."""
+
+    def test_streams_in_batches_under_asgi(self):
+        """Test that the async iterator used by ASGI reads the content a batch at a time rather than all at once.
+
+        Examples:
+            >>> [part async for part in SyncStreamingHttpResponse(iter(["a", "b"]), batch_size=1)]
+            [b'a', b'b']
+        """
+        # external imports
+        from asgiref.sync import async_to_sync
+
+        # app imports
+        from util.http import SyncStreamingHttpResponse
+
+        produced = []
+
+        def content():
+            for row in range(10):
+                produced.append(row)
+                yield f"{row}\n"
+
+        response = SyncStreamingHttpResponse(content(), batch_size=3)
+        assert list(response) == [f"{row}\n".encode() for row in range(10)]
+
+        response = SyncStreamingHttpResponse(content(), batch_size=3)
+        produced.clear()
+
+        async def first_then_rest():
+            parts = aiter(response)
+            first = await anext(parts)
+            assert len(produced) == 3
+            return [first] + [part async for part in parts]
+
+        assert async_to_sync(first_then_rest)() == [f"{row}\n".encode() for row in range(10)]
+
+
+@pytest.mark.django_db
+@pytest.mark.integration
+class TestViewQueryBudgets:
+    """Test that the busiest pages stay within their QUERY_BUDGETS - the util.testing plugin fails them otherwise."""
+
+    def _results(self, user_model, module, programme, year):
+        """Give five students on *module* a score on each of five tests and a result for each of five VITALs.
+
+        Args:
+            user_model (type): The Account model.
+            module (Module): The module to add the students, tests and VITALs to.
+            programme (Programme): The students' programme.
+            year (Year): The students' year.
+
+        Returns:
+            (TestCategory, list of Account):
+                The tests' in_dashboard category and the students.
+        """
+        # Django imports
+        from django.utils import timezone as tz
+
+        # external imports
+        from minerva.models import Test, Test_Score, TestCategory
+        from vitals.models import VITAL, VITAL_Result
+
+        category = TestCategory.objects.create(module=module, text="Homework", category_id="hw", in_dashboard=True)
+        students = [
+            user_model.objects.create(username=f"student{ix}", number=100000 + ix, programme=programme, year=year)
+            for ix in range(5)
+        ]
+        module.students.add(*students)
+        tests = [
+            Test.objects.create(
+                name=f"Test {ix}",
+                test_id=f"test-{ix}",
+                module=module,
+                passing_score=50.0,
+                score_possible=100.0,
+                release_date=tz.now(),
+                grading_due=tz.now() + tz.timedelta(days=7),
+            )
+            for ix in range(5)
+        ]
+        vitals = [VITAL.objects.create(name=f"VITAL {ix}", VITAL_ID=f"V{ix:03d}", module=module) for ix in range(5)]
+        for student in students:
+            for test in tests:
+                Test_Score.objects.create(user=student, test=test, score=75.0)
+            for vital in vitals:
+                VITAL_Result.objects.create(user=student, vital=vital, passed=True)
+        # Categorised after scoring, which sidesteps saving summary scores with the JSON encoder.
+        Test.objects.filter(module=module).update(category=category)
+        return category, students
+
+    def test_result_tables_and_summary(
+        self, settings, user_model, sample_module, sample_status_code, sample_programme, sample_year
+    ):
+        """Test the test and VITAL results tables and a student summary as a superuser.
+
+        The project URL configuration needs the production settings and the admin, and the page templates need
+        template libraries that the test settings do not install, so the views are resolved from
+        :mod:`util.testing_urls` and called through :class:`util.profiling.QueryBudgetMiddleware` directly, with every
+        table cell evaluated in place of rendering the template.
+
+        Args:
+            settings (SettingsWrapper): pytest-django settings fixture.
+            user_model (type): The Account model.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            sample_programme (Programme): A test programme instance.
+            sample_year (Year): A test year instance.
+
+        Examples:
+            >>> QueryBudgetMiddleware(handle)(request)
+            >>> request.query_stats.queries
+            5
+        """
+        # Django imports
+        from django.test import RequestFactory
+        from django.urls import resolve, reverse
+
+        # external imports
+        from django_htmx.middleware import HtmxDetails
+
+        # app imports
+        from util.profiling import QueryBudgetMiddleware
+
+        settings.ROOT_URLCONF = "util.testing_urls"
+        category, students = self._results(user_model, sample_module, sample_programme, sample_year)
+        admin = user_model.objects.create(username="admin", number=999999, is_staff=True, is_superuser=True)
+
+        def handle(request):
+            """Call the view and evaluate every cell of its table, as rendering the template would."""
+            match = request.resolver_match
+            response = match.func(request, *match.args, **match.kwargs)
+            for table in (response.context_data or {}).values():
+                for row in getattr(table, "rows", []):
+                    list(row)
+            return response
+
+        for url, data in [
+            (reverse("minerva:test_results"), {"module": sample_module.pk, "mode": "score", "type": category.pk}),
+            (reverse("vitals:vital_results"), {"module": sample_module.pk}),
+            (reverse("accounts:student_detail", kwargs={"number": students[0].number}), None),
+        ]:
+            factory = RequestFactory()
+            request = factory.post(url, data) if data else factory.get(url)
+            request.user, request.htmx, request.resolver_match = admin, HtmxDetails(request), resolve(request.path)
+            response = QueryBudgetMiddleware(handle)(request)
+            assert response.status_code == 200
+            assert request.query_stats.queries > 0
+
+    def test_student_summary_tabs(
+        self, settings, user_model, sample_module, sample_status_code, sample_programme, sample_year
+    ):
+        """Test each tab of a student's summary, rendered with an empty fragment cache, as a superuser.
+
+        The tabs' templates only need Django's own tags, so they are rendered by an engine without the project's
+        missing template libraries; the dashboard's charts use those libraries, so its template is replaced by one
+        that reads the same snapshot.
+
+        Args:
+            settings (SettingsWrapper): pytest-django settings fixture.
+            user_model (type): The Account model.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            sample_programme (Programme): A test programme instance.
+            sample_year (Year): A test year instance.
+
+        Examples:
+            >>> QueryBudgetMiddleware(handle)(request)
+            >>> request.query_stats.queries
+            6
+        """
+        # Django imports
+        from django.core.cache import cache
+        from django.test import RequestFactory
+        from django.urls import resolve, reverse
+        from django.utils import timezone as tz
+
+        # external imports
+        from accounts.models import DashboardSnapshot
+        from django_htmx.middleware import HtmxDetails
+
+        # app imports
+        from util.profiling import QueryBudgetMiddleware
+
+        settings.ROOT_URLCONF = "util.testing_urls"
+        plots = "{{ snapshot.stale }}{% for cat in plot_categories %}{{ cat.text }}{{ scores.homework }}{% endfor %}"
+        settings.TEMPLATES = [
+            {
+                "BACKEND": "django.template.backends.django.DjangoTemplates",
+                "OPTIONS": {
+                    "loaders": [
+                        ("django.template.loaders.locmem.Loader", {"accounts/parts/summary_plots.html": plots}),
+                        "django.template.loaders.app_directories.Loader",
+                    ]
+                },
+            }
+        ]
+        category, students = self._results(user_model, sample_module, sample_programme, sample_year)
+        with connection.cursor() as cursor:  # Raw insert sidesteps the JSON encoder for the data field.
+            cursor.execute(
+                f"INSERT INTO {DashboardSnapshot._meta.db_table} (student_id, updated, outdated, data) "
+                + "VALUES (%s, %s, %s, %s)",
+                [
+                    students[0].pk,
+                    tz.now(),
+                    False,
+                    json.JSONEncoder().encode(  # The module level encoder is replaced by jsondatetime
+                        {
+                            "categories": [{"tag": category.tag, "text": category.text}],
+                            "plots": {category.tag: ["", ""]},
+                            "scores": {category.tag: 75.0},
+                        }
+                    ),
+                ],
+            )
+        admin = user_model.objects.create(username="admin", number=999999, is_staff=True, is_superuser=True)
+
+        def handle(request):
+            """Call the view, which renders the tab into its fragment cache."""
+            match = request.resolver_match
+            return match.func(request, *match.args, **match.kwargs)
+
+        for tab, heading in [
+            ("dashboard", category.text),
+            ("vitals", "VITAL 0"),
+            ("required_work", "Work Requird"),
+            (category.tag, "Test 0"),
+        ]:
+            cache.clear()
+            url = reverse("accounts:student_detail_category", kwargs={"number": students[0].number, "category": tab})
+            request = RequestFactory().get(url, HTTP_HX_REQUEST="true", HTTP_HX_TARGET=tab)
+            request.user, request.htmx, request.resolver_match = admin, HtmxDetails(request), resolve(request.path)
+            response = QueryBudgetMiddleware(handle)(request)
+            assert response.status_code == 200
+            assert heading in response.content.decode()
+            assert request.query_stats.queries > 0
@@ -14,6 +14,7 @@ from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.files import File
 from django.core.files.storage import FileSystemStorage
+from django.db import transaction
 from django.http import HttpResponseRedirect
 
 # external imports
@@ -176,19 +177,20 @@ class GradebookImport(IsStaffViewMixin, SessionWizardView):
         return studentID_col, date_col, mapping
 
     def _process_rows(self, df, module, mapping, date_col):
-        """Process a single row of the spreadsheet."""
-        for sid, row in df.iterrows():
-            if np.isnan(sid):
-                continue
-            try:
-                student = module.student_enrollments.get(student__number=sid).student
-            except ObjectDoesNotExist:
-                continue
-            if date_col is None:
-                date = tz.today()
-            else:
-                date = self._parse_date(row, date_col)
-            self._process_attempts(row, student, mapping, date)
+        """Process the rows of the spreadsheet in one transaction, so each test's statistics refresh once."""
+        with transaction.atomic():
+            for sid, row in df.iterrows():
+                if np.isnan(sid):
+                    continue
+                try:
+                    student = module.student_enrollments.get(student__number=sid).student
+                except ObjectDoesNotExist:
+                    continue
+                if date_col is None:
+                    date = tz.today()
+                else:
+                    date = self._parse_date(row, date_col)
+                self._process_attempts(row, student, mapping, date)
 
     def _parse_date(self, row, date_col):
         """Parse the date for importing test results."""
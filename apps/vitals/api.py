@@ -1,2 +1,74 @@
 # -*- coding: utf-8 -*-
 """Django REST Framework Serializers and Viewsets for the vitals app."""
+
+# external imports
+from minerva.api import scoped_modules_for_user
+from minerva.models import Module
+from rest_framework import serializers, viewsets
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+
+# app imports
+from phas_vitals.api import router
+
+# app imports
+from .models import VITAL_Test_Map
+from .simulate import simulate_vitals
+
+###### Serializers define the API representation. ########
+
+
+class SimulatedMappingSerializer(serializers.Serializer):
+    """A proposed change to, or addition of, a VITAL_Test_Map."""
+
+    id = serializers.IntegerField(required=False)
+    vital = serializers.IntegerField(required=False)
+    test = serializers.IntegerField(required=False)
+    condition = serializers.ChoiceField(choices=VITAL_Test_Map.PASS_OPTIONS, required=False)
+    necessary = serializers.BooleanField(required=False, allow_null=True, default=None)
+    sufficient = serializers.BooleanField(required=False, allow_null=True, default=None)
+    required_fractrion = serializers.FloatField(required=False)
+    delete = serializers.BooleanField(required=False, default=False)
+
+
+class VITALSimulationSerializer(serializers.Serializer):
+    """The proposed pass-mark and mapping changes for a VITAL simulation."""
+
+    module = serializers.PrimaryKeyRelatedField(queryset=Module.objects.all())
+    passing_scores = serializers.DictField(child=serializers.FloatField(), required=False)
+    mappings = SimulatedMappingSerializer(many=True, required=False)
+
+
+###### Viewsets #########################################
+
+
+class VITALSimulationViewSet(viewsets.ViewSet):
+    """Read-only what-if simulation of VITAL awards.
+
+    POST a module, and optionally a mapping of test pk to proposed passing score and a list of proposed mapping
+    changes, to get the per-VITAL counts of students who would gain or lose each VITAL. Nothing is saved.
+    """
+
+    permission_classes = [IsAdminUser]
+    serializer_class = VITALSimulationSerializer
+
+    def create(self, request):
+        """Run the simulation for the posted proposal."""
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        module = serializer.validated_data["module"]
+        if not scoped_modules_for_user(request.user).filter(pk=module.pk).exists():
+            raise PermissionDenied(f"You are not responsible for {module}.")
+        try:
+            results = simulate_vitals(
+                module,
+                passing_scores=serializer.validated_data.get("passing_scores"),
+                mappings=serializer.validated_data.get("mappings"),
+            )
+        except ValueError as err:
+            raise ValidationError(str(err)) from err
+        return Response({"module": module.pk, "vitals": results})
+
+
+router.register(r"vitals_simulation", VITALSimulationViewSet, basename="vitals_simulation")
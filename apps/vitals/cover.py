@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+"""Set cover solvers used to work out the smallest set of tests that will pass a student's outstanding VITALs.
+
+The problem is held as a sparse incidence mapping of test primary key to the frozenset of VITAL primary keys that
+passing the test would cover. This is built from a single query of :class:`vitals.models.VITAL_Test_Map` rows, so
+no dense test x VITAL matrix is ever constructed.
+"""
+# Python imports
+from collections import defaultdict
+from math import ceil
+
+# Django imports
+from django.conf import settings
+from django.core.cache import cache
+
+REQUIRED_TESTS_CACHE_PREFIX = "vitals:required_tests"
+
+
+def build_incidence(pairs):
+    """Build a sparse test -> VITALs incidence mapping.
+
+    Args:
+        pairs (iterable of (int, int)):
+            (test pk, vital pk) pairs, typically from a ``values_list("test_id", "vital_id")`` query.
+
+    Returns:
+        (dict of int: frozenset):
+            Maps each test pk to the VITAL pks that it covers.
+
+    Examples:
+        >>> build_incidence([(1, 10), (1, 11), (2, 11)])
+        {1: frozenset({10, 11}), 2: frozenset({11})}
+    """
+    incidence = defaultdict(set)
+    for test_id, vital_id in pairs:
+        incidence[test_id].add(vital_id)
+    return {test_id: frozenset(vitals) for test_id, vitals in incidence.items()}
+
+
+def greedy_cover(incidence):
+    """Find a small set of tests covering every VITAL with the greedy heuristic.
+
+    At each step the test covering the most still uncovered VITALs is chosen, with ties broken on the lowest test
+    pk so that the result is deterministic.
+
+    Args:
+        incidence (dict of int: frozenset):
+            Sparse incidence mapping as returned by :func:`build_incidence`.
+
+    Returns:
+        (list of int):
+            Test pks in the order they were chosen.
+
+    Examples:
+        >>> greedy_cover({1: frozenset({10, 11}), 2: frozenset({11}), 3: frozenset({12})})
+        [1, 3]
+    """
+    uncovered = set().union(*incidence.values()) if incidence else set()
+    chosen = []
+    while uncovered:
+        best, gain = None, 0
+        for test_id in sorted(incidence):
+            if (size := len(incidence[test_id] & uncovered)) > gain:
+                best, gain = test_id, size
+        if best is None:
+            break
+        chosen.append(best)
+        uncovered -= incidence[best]
+    return chosen
+
+
+def exact_cover(incidence):
+    """Find a minimum set of tests covering every VITAL by branch and bound.
+
+    The greedy solution provides the initial upper bound. The search always branches on the uncovered VITAL with
+    the fewest covering tests and prunes when the number of tests chosen plus a simple lower bound (uncovered
+    VITALs divided by the largest remaining coverage) cannot beat the best solution found so far. The search is
+    exponential in the worst case and so should only be used for small instances.
+
+    Args:
+        incidence (dict of int: frozenset):
+            Sparse incidence mapping as returned by :func:`build_incidence`.
+
+    Returns:
+        (list of int):
+            Test pks of a minimum cover, sorted by pk.
+
+    Examples:
+        >>> incidence = {1: frozenset({1, 2, 3, 4}), 2: frozenset({1, 3, 5}), 3: frozenset({2, 4, 6})}
+        >>> greedy_cover(incidence)
+        [1, 2, 3]
+        >>> exact_cover(incidence)
+        [2, 3]
+    """
+    best = sorted(greedy_cover(incidence))
+    universe = set().union(*incidence.values()) if incidence else set()
+    covering = defaultdict(list)
+    for test_id in sorted(incidence, key=lambda t: (-len(incidence[t]), t)):
+        for vital_id in incidence[test_id]:
+            covering[vital_id].append(test_id)
+
+    def search(uncovered, chosen):
+        """Recursively extend *chosen* until *uncovered* is empty or the branch is pruned."""
+        nonlocal best
+        if not uncovered:
+            if len(chosen) < len(best):
+                best = sorted(chosen)
+            return
+        largest = max(len(incidence[test_id] & uncovered) for test_id in incidence)
+        if len(chosen) + ceil(len(uncovered) / largest) >= len(best):
+            return
+        pivot = min(uncovered, key=lambda vital_id: (len(covering[vital_id]), vital_id))
+        for test_id in covering[pivot]:
+            chosen.append(test_id)
+            search(uncovered - incidence[test_id], chosen)
+            chosen.pop()
+
+    search(universe, [])
+    return best
+
+
+def minimum_cover(incidence, exact_limit=None):
+    """Solve the set cover problem, exactly for small instances and greedily otherwise.
+
+    Args:
+        incidence (dict of int: frozenset):
+            Sparse incidence mapping as returned by :func:`build_incidence`.
+
+    Keyword Arguments:
+        exact_limit (int, None):
+            The largest number of VITALs for which an exact solution is searched for. Defaults to the
+            ``REQUIRED_TESTS_EXACT_LIMIT`` setting.
+
+    Returns:
+        (list of int):
+            Test pks covering every VITAL in the incidence mapping.
+    """
+    if exact_limit is None:
+        exact_limit = getattr(settings, "REQUIRED_TESTS_EXACT_LIMIT", 0)
+    universe = set().union(*incidence.values()) if incidence else set()
+    if len(universe) <= exact_limit:
+        return exact_cover(incidence)
+    return greedy_cover(incidence)
+
+
+def required_tests_cache_key(user_id):
+    """Return the cache key for a user's required tests, including the current mapping generation."""
+    generation = cache.get_or_set(f"{REQUIRED_TESTS_CACHE_PREFIX}:generation", 0, None)
+    return f"{REQUIRED_TESTS_CACHE_PREFIX}:{generation}:{user_id}"
+
+
+def invalidate_required_tests(*user_ids):
+    """Discard the cached required tests for the given users, or for everyone if no users are given."""
+    if not user_ids:
+        try:
+            cache.incr(f"{REQUIRED_TESTS_CACHE_PREFIX}:generation")
+        except ValueError:
+            cache.set(f"{REQUIRED_TESTS_CACHE_PREFIX}:generation", 1, None)
+        return
+    cache.delete_many([required_tests_cache_key(user_id) for user_id in user_ids])
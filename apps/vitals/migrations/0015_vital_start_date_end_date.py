@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 23:59
+
+# Django imports
+from django.db import migrations, models
+
+
+def populate_vital_dates(apps, schema_editor):
+    """Backfill the stored start and end dates of each VITAL from its mapped tests."""
+    VITAL = apps.get_model("vitals", "VITAL")
+    dates = VITAL.objects.order_by().annotate(
+        start=models.Min("tests__release_date"), end=models.Max("tests__recommended_date")
+    )
+    vitals = []
+    for vital in dates:
+        vital.start_date, vital.end_date = vital.start, vital.end
+        vitals.append(vital)
+    VITAL.objects.bulk_update(vitals, ["start_date", "end_date"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("minerva", "0040_test_locked"),
+        ("vitals", "0014_vital_result_locked_by_alter_vital_students"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vital",
+            name="end_date",
+            field=models.DateTimeField(
+                blank=True, editable=False, help_text="Latest test recommended attempt date", null=True
+            ),
+        ),
+        migrations.AddField(
+            model_name="vital",
+            name="start_date",
+            field=models.DateTimeField(blank=True, editable=False, help_text="Earliest test release date", null=True),
+        ),
+        migrations.AddIndex(
+            model_name="vital",
+            index=models.Index(fields=["module", "start_date"], name="vital_module_start_idx"),
+        ),
+        migrations.RunPython(populate_vital_dates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 00:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("vitals", "0016_vital_stats_vital_completion"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="vital_result",
+            name="modified",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -3,36 +3,118 @@
 # Python imports
 import re
 from collections import defaultdict
-from datetime import timedelta
 
 # Django imports
 from django.apps import apps
 from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import models
 from django.utils import timezone as tz
 from django.utils.html import format_html
+from django.utils.safestring import mark_safe
 
 # external imports
 import numpy as np
-import pandas as pd
-from accounts.models import Account
-from minerva.models import SummaryScore
+from accounts.models import Account, bump_summary_version
+from minerva.models import SummaryCalculator, Test, register_calculator
 
 # Create your models here.
+from util.clock import now as request_now
+from util.commit import CommitBatch
 from util.models import patch_model
 
+# app imports
+from .cover import (
+    build_incidence,
+    invalidate_required_tests,
+    minimum_cover,
+    required_tests_cache_key,
+)
 
-def test_qs_to_html(queryset):
-    """Produce an html list from a queryset."""
-    if queryset.count() == 0:
-        return ""
-    ret = "<ul>\n"
-    for test in queryset.all():
-        ret += f"""<li><a class="vital_link" href="{test.url}">
-            {test.name} ({test.module.code})</a></li>\n"""
-    ret += "</ul>\n"
-    return format_html(ret)
+VITAL_GRID_CACHE_PREFIX = "vitals:module_grid"
+
+
+# The tooltip headings for the tests that are sufficient to pass and necessary to attempt a VITAL, by result status.
+TESTS_TEXT_HEADINGS = {
+    "Ok": ("You passed", "You attempted"),
+    "Finished": ("You still need to pass", "You still need to attempt"),
+    "Started": ("You need to pass", "You need to attempt"),
+    "Not Started": ("You will need to pass", "You will need to attempt"),
+}
+
+
+def _test_list_html(tests):
+    """Produce an html list of (pk, name, module code) tests."""
+    items = [
+        format_html(
+            '<li><a class="vital_link" href="{}">\n            {} ({})</a></li>\n', Test.detail_url(pk), name, code
+        )
+        for pk, name, code in tests
+    ]
+    return mark_safe(f"<ul>\n{''.join(items)}</ul>\n")  # nosec - the items are escaped by format_html
+
+
+def tests_tooltips(vital_results):
+    """Build the tests tooltip of every result in *vital_results* from one mapping query.
+
+    Args:
+        vital_results (iterable of VITAL_Result):
+            The results - saved or not - to build tooltips for. Their VITALs should already be loaded.
+
+    Returns:
+        (list of str):
+            The tooltip html of each result, in order. The html is also stored on each result for
+            :attr:`VITAL_Result.tests_text` to return.
+
+    Examples:
+        >>> tests_tooltips(student.vital_results.select_related("vital"))[0]
+        'You passed :\n<ul>\n<li>...</li>\n</ul>\n'
+    """
+    vital_results = list(vital_results)
+    mapped, sufficient, necessary, fractions = set(), defaultdict(dict), defaultdict(dict), defaultdict(list)
+    mappings = (
+        VITAL_Test_Map.objects.filter(vital__in={result.vital_id for result in vital_results})
+        .order_by("test__release_date", "test__name")
+        .values_list(
+            "vital_id",
+            "condition",
+            "sufficient",
+            "necessary",
+            "required_fractrion",
+            "test_id",
+            "test__name",
+            "test__module__code",
+        )
+    )
+    for vital_id, condition, is_sufficient, is_necessary, fraction, *test in mappings:
+        mapped.add(vital_id)
+        if is_sufficient and condition == "pass":
+            sufficient[vital_id][test[0]] = test
+        if is_necessary and condition == "attempt":
+            necessary[vital_id][test[0]] = test
+            fractions[vital_id].append(fraction)
+
+    for result in vital_results:
+        status = result.status
+        if result.vital_id not in mapped:
+            text = "Requirements to be confirmed." if status in TESTS_TEXT_HEADINGS else ""
+        elif (headings := TESTS_TEXT_HEADINGS.get(status)) is None:
+            text = ""
+        else:
+            text = ""
+            if tests := list(sufficient[result.vital_id].values()):
+                label = "" if len(tests) == 1 else "at least one of"
+                text += f"{headings[0]} {label}:\n{_test_list_html(tests)}"
+            if tests := list(necessary[result.vital_id].values()):
+                number = sum(fractions[result.vital_id])
+                if number == len(fractions[result.vital_id]):
+                    label = "all of"
+                else:
+                    label = f"{round(number) if number else ''} of"
+                text += f"{headings[1]} {label}:\n{_test_list_html(tests)}"
+        result._tests_text = mark_safe(text)  # nosec - built from escaped fragments above
+    return [result._tests_text for result in vital_results]
 
 
 class VITAL_Test_Map(models.Model):
@@ -84,32 +166,21 @@ class VITAL_ResultManager(models.Manager):
     """Annotate results with vitals status fields."""
 
     def get_queryset(self):
-        """Annoteate the queryset with date information."""
+        """Annoteate the queryset with the VITAL's stored date and status information."""
         qs = super().get_queryset()
-        zerotime = timedelta(0)
-        qs = (
-            qs.annotate(
-                vital_release=models.Min("vital__tests__release_date"),
-                vital_start_date=models.Min("vital__tests__release_date"),
-                vital_end_date=models.Max("vital__tests__recommended_date"),
-            )
-            .annotate(
-                from_start=tz.now() - models.F("vital_start_date"), from_end=tz.now() - models.F("vital_end_date")
-            )
-            .annotate(
-                vital_status=models.Case(
-                    models.When(from_end__gte=zerotime, then=models.Value("Finished")),
-                    models.When(from_start__gte=zerotime, then=models.Value("Started")),
-                    default=models.Value("Not Started"),
-                )
-            )
-        ).order_by("vital__module", "vital_start_date")
+        now = request_now()
+        qs = qs.annotate(
+            vital_release=models.F("vital__start_date"),
+            vital_start_date=models.F("vital__start_date"),
+            vital_end_date=models.F("vital__end_date"),
+            vital_status=models.Case(
+                models.When(vital__end_date__lte=now, then=models.Value("Finished")),
+                models.When(vital__start_date__lte=now, then=models.Value("Started")),
+                default=models.Value("Not Started"),
+            ),
+        ).order_by("vital__module", "vital__start_date")
         return qs
 
-    def bulk_update(self, objs, fields, batch_size=None):
-        """Override to use a plain queryset, avoiding FieldError from ordering by aggregates."""
-        return super().get_queryset().bulk_update(objs, fields, batch_size=batch_size)
-
 
 class VITAL_Result(models.Model):
     """Provide a model for connecting a VITAL to a student."""
@@ -124,10 +195,127 @@ class VITAL_Result(models.Model):
     locked_by = models.ForeignKey(
         "accounts.Account", on_delete=models.SET_NULL, related_name="overrode_vital_results", null=True, blank=True
     )
+    modified = models.DateTimeField(auto_now=True)
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["vital", "user"], name="Singleton mapping student and vital")]
 
+    @classmethod
+    def module_grid(cls, module):
+        """Return the students x VITALs matrix of a module's results, cached until any of the results or VITALs change.
+
+        The cache key includes the number of results and the latest modified time, so any change to, addition of
+        or removal of a result makes a new grid, and the number of VITALs and the latest VITAL pk, so adding or
+        removing a VITAL does too.
+
+        Args:
+            module (minerva.models.Module):
+                The module to get the VITAL results of.
+
+        Returns:
+            (dict):
+                *students* and *vitals* map student and VITAL pks to row and column indices into *passed*, an int8
+                array which is 1 where the VITAL is passed, 0 where it is not and -1 where there is no result.
+
+        Examples:
+            >>> grid = VITAL_Result.module_grid(module)
+            >>> grid["passed"][grid["students"][student.pk], grid["vitals"][vital.pk]]
+            1
+        """
+        results = cls.objects.filter(vital__module=module).order_by()
+        version = (
+            VITAL.objects.filter(module=module)
+            .order_by()
+            .aggregate(
+                vitals=models.Count("pk", distinct=True),
+                latest=models.Max("pk"),
+                count=models.Count("student_results"),
+                modified=models.Max("student_results__modified"),
+            )
+        )
+        stamp = version["modified"].timestamp() if version["modified"] else 0
+        key = (
+            f"{VITAL_GRID_CACHE_PREFIX}:{module.pk}:{version['vitals']}:{version['latest']}:{version['count']}:{stamp}"
+        )
+        if (grid := cache.get(key)) is not None:
+            return grid
+        rows = np.array(list(results.values_list("user_id", "vital_id", "passed")), dtype=int).reshape(-1, 3)
+        students = {pk: ix for ix, pk in enumerate(np.unique(rows[:, 0]).tolist())}
+        vital_ids = VITAL.objects.filter(module=module).order_by("pk").values_list("pk", flat=True)
+        vitals = {pk: ix for ix, pk in enumerate(vital_ids)}
+        passed = np.full((len(students), len(vitals)), -1, dtype=np.int8)
+        for user_id, vital_id, result in rows.tolist():
+            passed[students[user_id], vitals[vital_id]] = result
+        grid = {"students": students, "vitals": vitals, "passed": passed}
+        cache.set(key, grid, timeout=getattr(settings, "VITAL_GRID_CACHE_TIMEOUT", 60 * 60))
+        return grid
+
+    @classmethod
+    def for_student(cls, student, modules):
+        """Return a student's results for every VITAL on *modules*, grouped by module, from two queries.
+
+        VITALs without a result get an unsaved, not passed, result and every result has its tests tooltip built.
+
+        Args:
+            student (Account):
+                The student to load results for.
+            modules (QuerySet of Module):
+                The modules whose VITALs are shown.
+
+        Returns:
+            (dict of Module: list of VITAL_Result):
+                The results of each module's VITALs in start date order.
+
+        Examples:
+            >>> VITAL_Result.for_student(student, student.modules.all())[module][0].passed
+            True
+        """
+        vitals = (
+            VITAL.objects.filter(module__in=modules)
+            .select_related("module")
+            .order_by("module", "start_date", "VITAL_ID")
+        )
+        found = {result.vital_id: result for result in cls.objects.filter(user=student, vital__module__in=modules)}
+        grouped = {}
+        for vital in vitals:
+            if (result := found.get(vital.pk)) is None:
+                result = cls(user=student, vital=vital, passed=False)
+            else:
+                result.vital = vital
+            grouped.setdefault(vital.module, []).append(result)
+        tests_tooltips(result for results in grouped.values() for result in results)
+        return grouped
+
+    @classmethod
+    def module_rows(cls, module, chunk_size=500):
+        """Yield a header and then a row of VITAL results for each of a module's active students.
+
+        The results come from :meth:`module_grid`, and the students are read *chunk_size* at a time.
+
+        Args:
+            module (minerva.models.Module):
+                The module to export.
+
+        Keyword Arguments:
+            chunk_size (int):
+                The number of students read from the database at a time.
+
+        Yields:
+            (list):
+                The header row, followed by one row per student of "P", "F" or "" for each VITAL.
+        """
+        grid = cls.module_grid(module)
+        vitals = list(VITAL.objects.filter(module=module).order_by("start_date", "VITAL_ID"))
+        columns = [grid["vitals"][vital.pk] for vital in vitals]
+        yield ["SID", "Last Name", "First Name"] + [f"{vital.VITAL_ID} {vital.name}" for vital in vitals]
+        labels = {-1: "", 0: "F", 1: "P"}
+        for chunk in module.active_student_chunks(chunk_size):
+            for pk, *student in chunk:
+                if (ix := grid["students"].get(pk)) is None:
+                    yield student + [""] * len(columns)
+                else:
+                    yield student + [labels[value] for value in grid["passed"][ix, columns].tolist()]
+
     @property
     def status(self):
         """Calculate the status of this result object."""
@@ -158,42 +346,13 @@ class VITAL_Result(models.Model):
 
     @property
     def tests_text(self):
-        """Get text for advise about tests."""
-        if self.vital.tests_mappings.count() == 0:
-            return {
-                "Ok": "Requirements to be confirmed.",  # PAssed
-                "Finished": "Requirements to be confirmed.",  # Overdue passing
-                "Started": "Requirements to be confirmed.",  # Underway, not passed yet
-                "Not Started": "Requirements to be confirmed.",  # In the future, no worries yet
-            }.get(self.status, "")
-
-        sufficient, sufficient_txt = self.vital.sufficient_pass_tests
-        necessary, necessary_txt = self.vital.neccessary_attempt_tests
-        ret = ""
-        match self.status:
-            case "Ok":  # passed
-                if sufficient.count() >= 1:
-                    ret += f"You passed {sufficient_txt}:\n{test_qs_to_html(sufficient)}"
-                if necessary.count() >= 1:
-                    ret += f"You attempted {necessary_txt}:\n{test_qs_to_html(necessary)}"
-            case "Finished":
-                if sufficient.count() >= 1:
-                    ret += f"You still need to pass {sufficient_txt}:\n{test_qs_to_html(sufficient)}"
-                if necessary.count() >= 1:
-                    ret += f"You still need to attempt {necessary_txt}:\n{test_qs_to_html(necessary)}"
-            case "Started":
-                if sufficient.count() >= 1:
-                    ret += f"You need to pass {sufficient_txt}:\n{test_qs_to_html(sufficient)}"
-                if necessary.count() >= 1:
-                    ret += f"You need to attempt {necessary_txt}:\n{test_qs_to_html(necessary)}"
-            case "Not Started":
-                if sufficient.count() >= 1:
-                    ret += f"You will need to pass {sufficient_txt}:\n{test_qs_to_html(sufficient)}"
-                if necessary.count() >= 1:
-                    ret += f"You will need to attempt {necessary_txt}:\n{test_qs_to_html(necessary)}"
-            case _:
-                pass
-        return format_html(ret)
+        """Get text for advise about tests.
+
+        Pages showing many results should build all their tooltips at once with :func:`tests_tooltips` first.
+        """
+        if (text := self.__dict__.get("_tests_text")) is None:
+            (text,) = tests_tooltips([self])
+        return text
 
 
 class VITAL_Manager(models.Manager):
@@ -208,29 +367,48 @@ class VITAL_Manager(models.Manager):
         raise ObjectDoesNotExist(f"No VITAL {name}")
 
     def get_queryset(self):
-        """Annoteate the queryset with date information."""
+        """Annoteate the queryset with status information from the stored start and end dates."""
         qs = super().get_queryset()
-        zerotime = timedelta(0)
-        qs = (
-            qs.annotate(
-                release=models.Min("tests__release_date"),
-                start_date=models.Min("tests__release_date"),
-                end_date=models.Max("tests__recommended_date"),
-            )
-            .annotate(from_start=tz.now() - models.F("start_date"), from_end=tz.now() - models.F("end_date"))
-            .annotate(
-                status=models.Case(
-                    models.When(from_end__gte=zerotime, then=models.Value("Finished")),
-                    models.When(from_start__gte=zerotime, then=models.Value("Started")),
-                    default=models.Value("Not Started"),
-                )
-            )
+        now = request_now()
+        qs = qs.annotate(
+            release=models.F("start_date"),
+            status=models.Case(
+                models.When(end_date__lte=now, then=models.Value("Finished")),
+                models.When(start_date__lte=now, then=models.Value("Started")),
+                default=models.Value("Not Started"),
+            ),
         ).order_by("module", "start_date")
         return qs
 
-    def bulk_update(self, objs, fields, batch_size=None):
-        """Override to use a plain queryset, avoiding FieldError from ordering by aggregates."""
-        return super().get_queryset().bulk_update(objs, fields, batch_size=batch_size)
+    def refresh_dates(self, vitals=None):
+        """Recalculate the stored start and end dates of VITALs from their mapped tests.
+
+        Keyword Arguments:
+            vitals (QuerySet, None):
+                The VITALs to refresh, defaults to all VITALs.
+
+        Returns:
+            (int):
+                The number of VITALs whose dates changed.
+        """
+        qs = super().get_queryset()
+        if vitals is not None:
+            qs = qs.filter(pk__in=vitals.values("pk"))
+        dates = {
+            row["pk"]: (row["start"], row["end"])
+            for row in qs.order_by()
+            .values("pk")
+            .annotate(start=models.Min("tests__release_date"), end=models.Max("tests__recommended_date"))
+        }
+        changed = []
+        for vital in qs.filter(pk__in=dates.keys()).only("pk", "start_date", "end_date"):
+            if (vital.start_date, vital.end_date) != dates[vital.pk]:
+                vital.start_date, vital.end_date = dates[vital.pk]
+                changed.append(vital)
+        qs.bulk_update(changed, ["start_date", "end_date"])
+        if changed:  # A VITAL's status follows its dates, which changes whose required tests include it
+            invalidate_required_tests()
+        return len(changed)
 
 
 class VITAL(models.Model):
@@ -250,9 +428,15 @@ class VITAL(models.Model):
     students = models.ManyToManyField(
         "accounts.Account", through=VITAL_Result, through_fields=("vital", "user"), related_name="VITALS"
     )
+    # Denormalised from the mapped tests by VITAL_Manager.refresh_dates()
+    start_date = models.DateTimeField(blank=True, null=True, editable=False, help_text="Earliest test release date")
+    end_date = models.DateTimeField(
+        blank=True, null=True, editable=False, help_text="Latest test recommended attempt date"
+    )
 
     class Meta:
         constraints = [models.UniqueConstraint(fields=["name", "module"], name="Singleton VITAL name per module")]
+        indexes = [models.Index(fields=["module", "start_date"], name="vital_module_start_idx")]
         ordering = ["module__code", "VITAL_ID"]
 
     def natural_key(self):
@@ -262,21 +446,12 @@ class VITAL(models.Model):
     @property
     def manual_satus(self):
         """Calculate the same as the annotation, but in python code."""
-        zerotime = timedelta(0)
-        data = self.tests.aggregate(
-            release=models.Min("release_date"),
-            start=models.Min("release_date"),
-            end=models.Max("recommended_date"),
-        )
-        if data["start"] is None:
+        if self.start_date is None or self.end_date is None:
             return "Not Started"
-        from_start = tz.now() - data.get("start", tz.now())
-        if data["end"] is None:
-            return "Not Started"
-        from_end = tz.now() - data["end"]
-        if from_end >= zerotime:
+        now = request_now()
+        if self.end_date <= now:
             return "Finished"
-        if from_start >= zerotime:
+        if self.start_date <= now:
             return "Started"
         return "Not Started"
 
@@ -290,23 +465,24 @@ class VITAL(models.Model):
         }
         return mapping.get(self.manual_satus, "")
 
+    @staticmethod
+    def detail_url(pk):
+        """Return the url of the detail page for the VITAL with primary key *pk*, without loading the VITAL."""
+        return f"/vitals/detail/{pk}/"
+
     @property
     def url(self):
         """Return a url for the detail page for this vital."""
-        return f"/vitals/detail/{self.pk}/"
+        return self.detail_url(self.pk)
 
     @property
     def stats(self):
-        """Return a dictionary of numbers who have attempted or not and passed or not."""
-        potential = self.module.student_enrollments.filter(student__is_active=True).distinct().count()
-        passed = self.student_results.filter(user__is_active=True, passed=True).count()
-        failed = self.student_results.filter(user__is_active=True, passed=False).count()
-        ret = {
-            "Passed": passed,
-            "Failed": failed,
-            "Not Attempted": potential - passed - failed,
-        }
-        return {k if v > 0 else "": v for k, v in ret.items()}
+        """Return a dictionary of numbers who have attempted or not and passed or not from the VITAL_Stats table."""
+        try:
+            progress = self.progress
+        except ObjectDoesNotExist:
+            [progress] = VITAL_Stats.refresh(VITAL.objects.filter(pk=self.pk))
+        return {k if v > 0 else "": v for k, v in progress.stats.items()}
 
     @property
     def stats_legend(self):
@@ -532,7 +708,16 @@ class VITAL(models.Model):
         if to_create:
             VITAL_Result.objects.bulk_create(to_create)
         if to_update:
-            VITAL_Result.objects.bulk_update(to_update, ["passed", "date_passed"])
+            for result in to_update:
+                result.modified = now
+            VITAL_Result.objects.bulk_update(to_update, ["passed", "date_passed", "modified"])
+        if changed := to_create + to_update:
+            # Bulk operations skip the post_save signal, so drop the cached required tests explicitly.
+            invalidate_required_tests(*(result.user_id for result in changed))
+            bump_summary_version(*{result.user_id for result in changed})
+            VITAL_Stats.refresh(VITAL.objects.filter(pk=self.pk))
+            if self.module_id:
+                VITAL_Completion.refresh([self.module_id], users.filter(pk__in=results_to_set.keys()))
 
         return len(to_create) + len(to_update)
 
@@ -541,41 +726,241 @@ class VITAL(models.Model):
         return f"{self.VITAL_ID}:{self.name} ({getattr(self.module, 'code', 'unassigned')}"
 
 
-@patch_model(SummaryScore)
-def calculate_vitals(self):
-    """Patch a function to create a summary score object for a VITALs."""
-    try:
-        all_vitals = VITAL.objects.filter(module__in=self.student.modules.all()).exclude(status="Not Started")
-        in_progress = all_vitals.exclude(student_results__user=self.student).exclude(status="Finished").count()
-
-        vitals = self.student.vital_results.filter(vital__module__level=self.student.year.level)
-        passed = vitals.filter(passed=True).count()
-        self.score = np.round((100.0 * passed + 50 * in_progress) / all_vitals.count())
-    except (ValueError, ZeroDivisionError):
-        self.score = np.nan
-    data = {}
-    colours = {}
-    status = []
-    for vital in all_vitals:
-        if vr := self.student.vital_results.filter(vital=vital).first():
-            status.append(vr.status)
-        else:
-            status.append(vital.status)
-    status = np.array(status)
-    for stat, (label, colour) in settings.VITALS_RESULTS_MAPPING.items():
-        if count := status[status == stat].size:
-            data[label] = count
-            colours[label] = colour
-    self.data["data"] = data
-    self.data["colours"] = colours
-    return self.score
+class VITAL_Stats(models.Model):
+    """Materialised counts of the active students' results for a VITAL, refreshed by the VITAL pipelines."""
+
+    vital = models.OneToOneField(VITAL, on_delete=models.CASCADE, primary_key=True, related_name="progress")
+    passed = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    not_attempted = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "VITAL statistics"
+        verbose_name_plural = "VITAL statistics"
+
+    def __str__(self):
+        """Summarise the counts."""
+        return f"{self.vital}: {self.passed} passed, {self.failed} failed"
+
+    @property
+    def stats(self):
+        """Return the counts in the form used by VITAL.stats."""
+        return {"Passed": self.passed, "Failed": self.failed, "Not Attempted": self.not_attempted}
+
+    @classmethod
+    def refresh(cls, vitals):
+        """Recalculate and store the statistics for a queryset of VITALs.
+
+        Args:
+            vitals (QuerySet):
+                The VITALs to refresh.
+
+        Returns:
+            (list of VITAL_Stats):
+                The refreshed rows.
+        """
+        active = models.Q(student_results__user__is_active=True)
+        rows = list(
+            VITAL.objects.filter(pk__in=vitals.values("pk"))
+            .order_by()
+            .values("pk", "module")
+            .annotate(
+                n_passed=models.Count("student_results", filter=active & models.Q(student_results__passed=True)),
+                n_failed=models.Count("student_results", filter=active & models.Q(student_results__passed=False)),
+            )
+        )
+        ModuleEnrollment = apps.get_model("minerva", "ModuleEnrollment")
+        potential = dict(
+            ModuleEnrollment.objects.filter(module__in={row["module"] for row in rows}, student__is_active=True)
+            .order_by()
+            .values_list("module")
+            .annotate(n=models.Count("student", distinct=True))
+        )
+        stats = [
+            cls(
+                vital_id=row["pk"],
+                passed=row["n_passed"],
+                failed=row["n_failed"],
+                not_attempted=max(potential.get(row["module"], 0) - row["n_passed"] - row["n_failed"], 0),
+            )
+            for row in rows
+        ]
+        return cls.objects.bulk_create(
+            stats,
+            update_conflicts=True,
+            unique_fields=["vital"],
+            update_fields=["passed", "failed", "not_attempted", "updated"],
+        )
+
+
+class VITAL_Completion(models.Model):
+    """Materialised fraction of a module's VITALs passed by each student enrolled on it."""
+
+    module = models.ForeignKey("minerva.Module", on_delete=models.CASCADE, related_name="vital_completions")
+    student = models.ForeignKey("accounts.Account", on_delete=models.CASCADE, related_name="vital_completions")
+    passed = models.PositiveIntegerField(default=0)
+    total = models.PositiveIntegerField(default=0)
+    fraction = models.FloatField(blank=True, null=True)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["module", "student"], name="Singleton VITAL completion per module student")
+        ]
+
+    def __str__(self):
+        """Show the student, module and number of VITALs passed."""
+        return f"{self.student}: {self.module.code} {self.passed}/{self.total}"
+
+    @classmethod
+    def refresh(cls, modules, students=None):
+        """Recalculate and store the VITAL completion of students on some modules.
+
+        Args:
+            modules (iterable of Module or int):
+                The modules to refresh.
+
+        Keyword Arguments:
+            students (QuerySet, None):
+                Only refresh these students. If None, all active students on the modules are refreshed and rows
+                for students no longer active on them are removed.
+
+        Returns:
+            (list of VITAL_Completion):
+                The refreshed rows.
+        """
+        ModuleEnrollment = apps.get_model("minerva", "ModuleEnrollment")
+        module_ids = {getattr(module, "pk", module) for module in modules}
+        enrollments = ModuleEnrollment.objects.filter(module__in=module_ids, student__is_active=True)
+        results = VITAL_Result.objects.filter(vital__module__in=module_ids, passed=True)
+        if students is not None:
+            enrollments = enrollments.filter(student__in=students)
+            results = results.filter(user__in=students)
+        totals = dict(
+            VITAL.objects.filter(module__in=module_ids).order_by().values_list("module").annotate(n=models.Count("pk"))
+        )
+        passed = {
+            (module_id, user_id): n
+            for module_id, user_id, n in results.order_by()
+            .values_list("vital__module", "user")
+            .annotate(n=models.Count("pk"))
+        }
+        rows = []
+        for module_id, student_id in enrollments.order_by().values_list("module", "student").distinct():
+            total = totals.get(module_id, 0)
+            count = passed.get((module_id, student_id), 0)
+            rows.append(
+                cls(
+                    module_id=module_id,
+                    student_id=student_id,
+                    passed=count,
+                    total=total,
+                    fraction=count / total if total else None,
+                )
+            )
+        if students is None:
+            cls.objects.filter(module__in=module_ids).exclude(student__in=enrollments.values("student")).delete()
+        return cls.objects.bulk_create(
+            rows,
+            update_conflicts=True,
+            unique_fields=["module", "student"],
+            update_fields=["passed", "total", "fraction", "updated"],
+        )
+
+
+def _refresh_vital_progress(pairs):
+    """Refresh the VITAL_Stats and VITAL_Completion rows for a set of (VITAL pk, student pk) pairs."""
+    vital_ids = {vital_id for vital_id, _ in pairs}
+    VITAL_Stats.refresh(VITAL.objects.filter(pk__in=vital_ids))
+    modules = set(VITAL.objects.filter(pk__in=vital_ids, module__isnull=False).values_list("module", flat=True))
+    if modules:
+        VITAL_Completion.refresh(modules, students=Account.objects.filter(pk__in={user for _, user in pairs}))
+
+
+# Refreshes the progress tables for VITAL results that were saved or deleted, once the change commits.
+VITAL_PROGRESS_BATCH = CommitBatch(_refresh_vital_progress)
+
+
+def started_vitals(module_ids, cache=None):
+    """Return the VITALs on a set of modules that have started.
+
+    Args:
+        module_ids (iterable of int):
+            Primary keys of the modules.
+
+    Keyword Arguments:
+        cache (dict, None):
+            If given, results are memoised in this dictionary keyed by the set of modules so that students with the
+            same modules in a batch share one query.
+
+    Returns:
+        (list of (int, str, int)):
+            The pk, status and module level of each VITAL.
+    """
+    key = tuple(sorted(set(module_ids)))
+    if cache is not None and key in cache:
+        return cache[key]
+    vitals = list(
+        VITAL.objects.filter(module__in=key).exclude(status="Not Started").values_list("pk", "status", "module__level")
+    )
+    if cache is not None:
+        cache[key] = vitals
+    return vitals
+
+
+@register_calculator("vitals")
+class VITALsCalculator(SummaryCalculator):
+    """Score VITALs categories from the students' results for the started VITALs on their modules.
+
+    A passed VITAL at the student's level counts fully and a started VITAL without a result half. The students'
+    modules, levels and VITAL results are each read with one query for the whole batch and the list of started
+    VITALs is shared between students on the same set of modules.
+    """
+
+    def calculate_many(self, summaries):
+        """Calculate the VITALs summaries in place."""
+        ModuleEnrollment = apps.get_model("minerva", "ModuleEnrollment")
+        students = {summary.student_id for summary in summaries}
+        modules = defaultdict(list)
+        for student_id, module_id in ModuleEnrollment.objects.filter(student__in=students).values_list(
+            "student", "module"
+        ):
+            modules[student_id].append(module_id)
+        levels = dict(Account.objects.filter(pk__in=students).values_list("pk", "year__level"))
+        batch = {}
+        all_vitals = [started_vitals(modules[summary.student_id], batch) for summary in summaries]
+        results = defaultdict(dict)
+        for user_id, vital_id, passed in VITAL_Result.objects.filter(
+            user__in=students, vital__in={pk for vitals in batch.values() for pk, _, _ in vitals}
+        ).values_list("user", "vital", "passed"):
+            results[user_id][vital_id] = passed
+        for summary, vitals in zip(summaries, all_vitals):
+            self._calculate(summary, vitals, results[summary.student_id], levels.get(summary.student_id))
+
+    @staticmethod
+    def _calculate(summary, all_vitals, results, level):
+        """Set the score and plot data for one student from their started VITALs and VITAL results."""
+        passed = sum(1 for pk, _, vital_level in all_vitals if results.get(pk) and vital_level == level)
+        in_progress = sum(1 for pk, status, _ in all_vitals if pk not in results and status == "Started")
+        summary.score = np.round((100.0 * passed + 50 * in_progress) / len(all_vitals)) if all_vitals else np.nan
+
+        status = np.array(["Ok" if results.get(pk) else vital_status for pk, vital_status, _ in all_vitals])
+        counts = dict(zip(*np.unique(status, return_counts=True)))
+        data = {}
+        colours = {}
+        for stat, (label, colour) in settings.VITALS_RESULTS_MAPPING.items():
+            if count := int(counts.get(stat, 0)):
+                data[label] = count
+                colours[label] = colour
+        summary.data["data"] = data
+        summary.data["colours"] = colours
 
 
 @patch_model(Account, prep=property)
 def vitals_score(self):
     """Get VITALs score from Summary Score."""
-    summary = np.array(self.summary_scores.filter(category__text="VITALs").values_list("module__credits", "score"))
-    return float(summary.prod(axis=1).sum() / summary[:, 0].sum())
+    return self.category_score("VITALs")
 
 
 @patch_model(Account, prep=property)
@@ -610,29 +995,22 @@ def forthcoming_vitals(self):
 
 @patch_model(Account, prep=property)
 def required_tests(self):
-    """Calculate the minimum required tests to pass all failed VITALs."""
-    data = []
-
-    for vital in self.applicable_vitals.exclude(pk__in=[x.pk for x in self.passed_vitals.all()]):
-        row = {"VITAL": vital.VITAL_ID}
-        for test in vital.tests.all():
-            row[test.pk] = 1
-        data.append(row)
-    if not len(data):
-        Test = apps.get_model("minerva", "Test")
+    """Calculate the minimum required tests to pass all failed VITALs.
+
+    The (test, VITAL) incidence for the VITALs not yet passed is read in a single query and the set cover solved
+    with :func:`vitals.cover.minimum_cover`. The chosen test pks are cached per user until their VITAL results (or
+    any VITAL to test mapping) change.
+    """
+    Test = apps.get_model("minerva", "Test")
+    key = required_tests_cache_key(self.pk)
+    if (tests := cache.get(key)) is None:
+        pairs = (
+            VITAL_Test_Map.objects.filter(vital__module__in=self.modules.all())
+            .exclude(vital__in=self.passed_vitals.values("pk"))
+            .values_list("test_id", "vital_id")
+        )
+        tests = minimum_cover(build_incidence(pairs))
+        cache.set(key, tests, getattr(settings, "REQUIRED_TESTS_CACHE_TIMEOUT", None))
+    if not tests:
         return Test.objects.none()
-    data = pd.DataFrame(data).transpose().fillna(0.0)
-    data.columns = data.loc["VITAL"]
-    data = data.drop("VITAL")
-    tests = []
-    while True and data.sum(axis=1).size > 0:
-        best_test = data.index[data.sum(axis=1).argmax()]
-        if data.loc[best_test].sum() == 0:
-            break
-
-        tests.append(best_test)
-        data.loc[:, data.loc[best_test] == 1.0] = 0.0
-
-    tests = vital.tests.model.objects.filter(pk__in=tests).distinct().order_by("category__text", "release_date")
-
-    return tests
+    return Test.objects.filter(pk__in=tests).distinct().order_by("category__text", "release_date")
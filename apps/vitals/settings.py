@@ -10,3 +10,14 @@ VITALS_RESULTS_MAPPING = {
     "Started": ("In Progress", "blue"),
     "Finished": ("Not Passed", "red"),
 }
+
+# Largest number of outstanding VITALs for which Account.required_tests searches for an exact minimum set of tests.
+REQUIRED_TESTS_EXACT_LIMIT = 20
+# How long, in seconds, to keep a student's required tests cached - None to keep them until their results change.
+REQUIRED_TESTS_CACHE_TIMEOUT = 24 * 60 * 60
+# How long, in seconds, to keep a module's grid of VITAL results cached - a changed result makes a new grid anyway.
+VITAL_GRID_CACHE_TIMEOUT = 60 * 60
+
+# Query budgets (see util.profiling) for the VITAL results tables - a batch of rows must not cost queries per student.
+# Measured at 6 queries and no duplicates, whatever the number of rows.
+QUERY_BUDGETS = {"vitals:vital_results": {"queries": 8, "duplicates": 2}}
@@ -1,2 +1,48 @@
 # -*- coding: utf-8 -*-
 """Signal functions for the VITALs app."""
+# Django imports
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+# app imports
+from .cover import invalidate_required_tests
+from .models import VITAL, VITAL_PROGRESS_BATCH, VITAL_Result, VITAL_Test_Map
+
+
+@receiver([post_save, post_delete], sender=VITAL_Result)
+def vital_result_changed(sender, instance, **kwargs):
+    """Drop the cached required tests and refresh the VITAL's progress counts when a student's result changes."""
+    invalidate_required_tests(instance.user_id)
+    VITAL_PROGRESS_BATCH.add((instance.vital_id, instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=VITAL)
+def vital_changed(sender, instance, **kwargs):
+    """Drop every cached set of required tests when a VITAL is added, removed or edited."""
+    invalidate_required_tests()
+
+
+@receiver([post_save, post_delete], sender="minerva.ModuleEnrollment")
+def enrollment_changed(sender, instance, **kwargs):
+    """Drop the cached required tests for a student whose modules have changed."""
+    invalidate_required_tests(instance.student_id)
+
+
+@receiver(m2m_changed, sender="minerva.ModuleEnrollment")
+def enrollments_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop the cached required tests for students added to or removed from a module through Module.students."""
+    if not action.startswith("post_"):
+        return
+    if reverse:  # Changed from the student's side
+        invalidate_required_tests(instance.pk)
+    elif pk_set is None:  # The module was cleared of all its students
+        invalidate_required_tests()
+    elif pk_set:
+        invalidate_required_tests(*pk_set)
+
+
+@receiver([post_save, post_delete], sender=VITAL_Test_Map)
+def vital_mapping_changed(sender, instance, **kwargs):
+    """Refresh the VITAL's stored dates and drop every cached set of required tests when its tests change."""
+    VITAL.objects.refresh_dates(VITAL.objects.filter(pk=instance.vital_id))
+    invalidate_required_tests()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""Read-only "what-if" simulation of VITAL awards under proposed pass-mark and mapping changes.
+
+The current test scores of a module's students are loaded once into dense students x tests NumPy arrays and the
+VITAL award rules from :meth:`vitals.models.VITAL.check_vital_for_queryset` are evaluated for every student and
+VITAL at once with boolean matrix products. Nothing is written back to the database.
+"""
+
+# Django imports
+from django.apps import apps
+
+# external imports
+import numpy as np
+
+# app imports
+from .models import VITAL, VITAL_Result, VITAL_Test_Map
+
+TOLERANCE = 0.001
+MAPPING_FIELDS = ("vital_id", "test_id", "condition", "necessary", "sufficient", "required_fractrion")
+
+
+def evaluate_vitals(passed, attempted, mappings, n_vitals):
+    """Apply the VITAL award rules to whole score matrices at once.
+
+    Args:
+        passed (2D bool array):
+            students x tests array of whether each student has passed each test.
+        attempted (2D bool array):
+            students x tests array of whether each student has a result for each test.
+        mappings (dict of arrays):
+            Column arrays describing the VITAL to test mappings, with keys *vital* and *test* (integer indices
+            into the VITAL and test axes), *condition_pass*, *sufficient* and *necessary* (bool) and *fraction*.
+        n_vitals (int):
+            The number of VITALs, i.e. the width of the output.
+
+    Returns:
+        (2D bool array):
+            students x VITALs array of whether each VITAL would be awarded.
+    """
+    test = mappings["test"]
+    met = np.where(mappings["condition_pass"], passed[:, test], attempted[:, test])
+    incidence = np.zeros((test.size, n_vitals))
+    incidence[np.arange(test.size), mappings["vital"]] = 1.0
+
+    any_sufficient = (met & mappings["sufficient"]).astype(float) @ incidence > 0
+    any_attempted = attempted[:, test].astype(float) @ incidence > 0
+    necessary_missed = (~met & mappings["necessary"]).astype(float) @ incidence > 0
+    met_sum = (met * mappings["fraction"]) @ incidence
+    return any_sufficient | (any_attempted & ~necessary_missed & (met_sum >= 1.0 - TOLERANCE))
+
+
+def _apply_mapping_changes(current, changes, vital_ids, test_ids):
+    """Return the list of mapping dictionaries after applying the proposed *changes* to *current*.
+
+    *vital_ids* and *test_ids* are the VITALs and tests of the module, which any VITAL or test a change names must
+    be one of.
+    """
+    proposed = {row["id"]: dict(row) for row in current}
+    for number, change in enumerate(changes or []):
+        change = {key.removesuffix("_id"): value for key, value in change.items() if value is not None}
+        if "id" in change:
+            if change["id"] not in proposed:
+                raise ValueError(f"Mapping {change['id']} is not a mapping for a VITAL on this module.")
+            if change.get("delete", False):
+                del proposed[change["id"]]
+                continue
+            row = proposed[change["id"]]
+        else:
+            if "vital" not in change or "test" not in change:
+                raise ValueError("A new mapping needs both a vital and a test.")
+            row = proposed[f"new-{number}"] = {
+                "id": None,
+                "condition": "pass",
+                "necessary": False,
+                "sufficient": True,
+                "required_fractrion": 1.0,
+            }
+        for field in MAPPING_FIELDS:
+            if (key := field.removesuffix("_id")) in change:
+                row[field] = change[key]
+        if row["vital_id"] not in vital_ids:
+            raise ValueError(f"VITAL {row['vital_id']} is not a VITAL on this module.")
+        if "test" in change and row["test_id"] not in test_ids:
+            raise ValueError(f"Test {row['test_id']} is not a test on this module.")
+    return list(proposed.values())
+
+
+def _mapping_arrays(mappings, vital_index, test_index):
+    """Convert a list of mapping dictionaries into the column arrays used by :func:`evaluate_vitals`."""
+    return {
+        "vital": np.array([vital_index[row["vital_id"]] for row in mappings], dtype=int),
+        "test": np.array([test_index[row["test_id"]] for row in mappings], dtype=int),
+        "condition_pass": np.array([row["condition"] == "pass" for row in mappings], dtype=bool),
+        "sufficient": np.array([row["sufficient"] for row in mappings], dtype=bool),
+        "necessary": np.array([row["necessary"] for row in mappings], dtype=bool),
+        "fraction": np.array([row["required_fractrion"] for row in mappings], dtype=float),
+    }
+
+
+def simulate_vitals(module, passing_scores=None, mappings=None):
+    """Work out how many students' VITAL results would change under proposed pass marks and mappings.
+
+    Args:
+        module (minerva.models.Module):
+            The module whose VITALs are to be simulated. All students actively enrolled on the module are included.
+
+    Keyword Arguments:
+        passing_scores (dict of int: float, None):
+            Proposed new passing scores keyed by test pk.
+        mappings (list of dict, None):
+            Proposed mapping changes. A dictionary with an *id* alters that existing VITAL_Test_Map (or removes it
+            if *delete* is True), otherwise a new mapping is added and *vital* and *test* must be given. Other keys
+            are VITAL_Test_Map field names.
+
+    Returns:
+        (list of dict):
+            One entry per VITAL with the number of students passing now and under the proposal, and how many
+            students would gain or lose the VITAL. Students whose results are locked or who have
+            ``override_vitals`` set keep the VITALs they pass now, as check_vital would not remove them.
+
+    Raises:
+        ValueError:
+            If a passing score or mapping change refers to a test, mapping or VITAL that is not on *module*.
+
+    Examples:
+        >>> simulate_vitals(module, passing_scores={test.pk: 60.0})
+        [{'vital': 1, 'VITAL_ID': 'V001', 'name': '...', 'passed_now': 120, 'passed_proposed': 113, ...}]
+    """
+    Test = apps.get_model("minerva", "Test")
+    Test_Score = apps.get_model("minerva", "Test_Score")
+    ModuleEnrollment = apps.get_model("minerva", "ModuleEnrollment")
+
+    passing_scores = {int(pk): float(score) for pk, score in (passing_scores or {}).items()}
+    module_tests = set(Test.objects.filter(module=module).values_list("pk", flat=True))
+    if unknown := set(passing_scores) - module_tests:
+        raise ValueError(f"Tests {sorted(unknown)} in passing scores are not tests on this module.")
+    vitals = list(VITAL.objects.filter(module=module).order_by("pk").values_list("pk", "VITAL_ID", "name"))
+    vital_index = {pk: ix for ix, (pk, _, _) in enumerate(vitals)}
+    current = list(VITAL_Test_Map.objects.filter(vital__module=module).values("id", *MAPPING_FIELDS))
+    proposed = _apply_mapping_changes(current, mappings, vital_index, module_tests)
+
+    students = np.array(
+        sorted(
+            ModuleEnrollment.objects.filter(module=module, active=True).values_list("student_id", flat=True).distinct()
+        ),
+        dtype=int,
+    )
+    test_ids = sorted({row["test_id"] for row in current + proposed})
+    test_index = {pk: ix for ix, pk in enumerate(test_ids)}
+
+    # Load the score matrix in one query.
+    shape = (students.size, len(test_ids))
+    attempted = np.zeros(shape, dtype=bool)
+    passed_now = np.zeros(shape, dtype=bool)
+    graded = np.zeros(shape, dtype=bool)
+    scores = np.full(shape, np.nan)
+    rows = Test_Score.objects.filter(test_id__in=test_ids, user_id__in=students.tolist()).values_list(
+        "user_id", "test_id", "score", "status", "passed"
+    )
+    if rows := list(rows):
+        user_id, test_id, score, status, passed = zip(*rows)
+        ix = (np.searchsorted(students, user_id), np.array([test_index[pk] for pk in test_id], dtype=int))
+        attempted[ix] = True
+        passed_now[ix] = passed
+        graded[ix] = np.array(status) == "Graded"
+        scores[ix] = np.array(score, dtype=float)
+
+    # Re-mark the tests with proposed new passing scores.
+    passed_proposed = passed_now.copy()
+    for test_id, mark in passing_scores.items():
+        if (column := test_index.get(test_id)) is None:
+            continue
+        with np.errstate(invalid="ignore"):
+            passed_proposed[:, column] = graded[:, column] & (
+                (scores[:, column] >= mark) | np.isclose(scores[:, column], mark)
+            )
+    n_vitals = len(vitals)
+    now = evaluate_vitals(passed_now, attempted, _mapping_arrays(current, vital_index, test_index), n_vitals)
+    then = evaluate_vitals(passed_proposed, attempted, _mapping_arrays(proposed, vital_index, test_index), n_vitals)
+
+    # Locked results and overridden students never lose a VITAL.
+    protected = np.zeros((students.size, n_vitals), dtype=bool)
+    Account = apps.get_model("accounts", "Account")
+    overridden = Account.objects.filter(pk__in=students.tolist(), override_vitals=True).values_list("pk", flat=True)
+    protected[np.searchsorted(students, list(overridden)), :] = True
+    locked = VITAL_Result.objects.filter(vital__module=module, user_id__in=students.tolist(), locked=True)
+    for user_id, vital_id in locked.values_list("user_id", "vital_id"):
+        protected[np.searchsorted(students, user_id), vital_index[vital_id]] = True
+
+    then |= now & protected
+
+    gained = (then & ~now).sum(axis=0)
+    lost = (now & ~then).sum(axis=0)
+    return [
+        {
+            "vital": pk,
+            "VITAL_ID": vital_id,
+            "name": name,
+            "passed_now": int(now[:, ix].sum()),
+            "passed_proposed": int(then[:, ix].sum()),
+            "gained": int(gained[ix]),
+            "lost": int(lost[ix]),
+        }
+        for ix, (pk, vital_id, name) in enumerate(vitals)
+    ]
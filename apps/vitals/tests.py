@@ -8,7 +8,16 @@ from django.utils import timezone as tz
 import pytest
 
 # app imports
-from .models import VITAL, VITAL_Result, VITAL_Test_Map
+from .cover import build_incidence, exact_cover, greedy_cover, minimum_cover, required_tests_cache_key
+from .models import (
+    VITAL,
+    VITAL_Completion,
+    VITAL_Result,
+    VITAL_Stats,
+    VITAL_Test_Map,
+    started_vitals,
+)
+from .simulate import simulate_vitals
 
 
 @pytest.mark.django_db
@@ -148,6 +157,104 @@ class TestVITAL_Result:
         result = VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
         assert "check" in result.icon
 
+    def test_module_grid(self, sample_vital, sample_user, sample_module, django_assert_num_queries):
+        """Test that the module grid is cached until a result changes or a VITAL is added.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            django_assert_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> grid = VITAL_Result.module_grid(module)
+            >>> grid["passed"][grid["students"][user.pk], grid["vitals"][vital.pk]]
+            0
+        """
+        other = VITAL.objects.create(name="Other VITAL", module=sample_module, VITAL_ID="V002")
+        result = VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=False)
+
+        grid = VITAL_Result.module_grid(sample_module)
+        row = grid["passed"][grid["students"][sample_user.pk]]
+        assert row[grid["vitals"][sample_vital.pk]] == 0
+        assert row[grid["vitals"][other.pk]] == -1
+        with django_assert_num_queries(1):
+            assert VITAL_Result.module_grid(sample_module) is not None
+
+        result.passed = True
+        result.save()
+        grid = VITAL_Result.module_grid(sample_module)
+        assert grid["passed"][grid["students"][sample_user.pk], grid["vitals"][sample_vital.pk]] == 1
+
+        added = VITAL.objects.create(name="Added VITAL", module=sample_module, VITAL_ID="V003")
+        grid = VITAL_Result.module_grid(sample_module)
+        assert grid["passed"][grid["students"][sample_user.pk], grid["vitals"][added.pk]] == -1
+
+    def test_for_student_query_count(
+        self, sample_vital, sample_test, sample_user, sample_module, django_assert_max_num_queries
+    ):
+        """Test that a student's VITALs tab costs the same few queries however many VITALs it shows.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_test (Test): A test Test instance, which passes sample_vital.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            django_assert_max_num_queries (callable): pytest-django query counter.
+
+        Examples:
+            >>> VITAL_Result.for_student(student, student.modules.all())[module][0].passed
+            True
+        """
+        # external imports
+        from minerva.models import Module
+
+        VITAL_Test_Map.objects.create(vital=sample_vital, test=sample_test, sufficient=True)
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
+        modules = Module.objects.filter(pk=sample_module.pk)
+        for count in (1, 4):
+            for number in range(VITAL.objects.count(), count):
+                VITAL.objects.create(name=f"Extra {number}", module=sample_module, VITAL_ID=f"X{number}")
+            with django_assert_max_num_queries(3):
+                results = VITAL_Result.for_student(sample_user, modules)[sample_module]
+                rows = {  # Keyed by str(vital), which includes the VITAL's module code
+                    str(result.vital): (
+                        result.pk is not None,
+                        result.passed,
+                        result.bootstrap5_class,
+                        result.icon,
+                        result.tests_text,
+                    )
+                    for result in results
+                }
+            saved, passed, klass, icon, text = rows.pop(str(sample_vital))
+            assert (saved, passed, klass, icon) == (True, True, "bg-success text-light", "bi bi-check")
+            assert text.startswith("You passed :") and f'href="{sample_test.url}"' in text
+            missing = (False, False, "text-dark", "", "Requirements to be confirmed.")
+            assert list(rows.values()) == [missing] * (count - 1)
+
+    def test_module_rows(self, sample_vital, sample_user, sample_module, sample_status_code):
+        """Test that the VITAL export marks passes, fails and missing results for each active student.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): Status code needed for module enrolments.
+
+        Examples:
+            >>> list(VITAL_Result.module_rows(module))[1][3:]
+            ['P', '']
+        """
+        other = VITAL.objects.create(name="Other VITAL", module=sample_module, VITAL_ID="V002")
+        sample_module.students.add(sample_user)
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True)
+
+        header, row = VITAL_Result.module_rows(sample_module)
+        columns = {name: ix for ix, name in enumerate(header)}
+        assert row[columns[f"{sample_vital.VITAL_ID} {sample_vital.name}"]] == "P"
+        assert row[columns[f"{other.VITAL_ID} {other.name}"]] == ""
+
 
 @pytest.mark.django_db
 @pytest.mark.unit
@@ -975,3 +1082,522 @@ class TestVITALCheckForQueryset:
 
         assert count == 1
         assert VITAL_Result.objects.filter(vital=sample_vital, user=sample_user, passed=True).exists()
+
+
+@pytest.mark.unit
+class TestSetCover:
+    """Test the set cover solvers used by Account.required_tests."""
+
+    def test_build_incidence(self):
+        """Test that (test, vital) pairs are grouped into a sparse incidence mapping.
+
+        Examples:
+            >>> build_incidence([(1, 10), (1, 11), (2, 11)])
+            {1: frozenset({10, 11}), 2: frozenset({11})}
+        """
+        assert build_incidence([(1, 10), (1, 11), (2, 11), (1, 10)]) == {
+            1: frozenset({10, 11}),
+            2: frozenset({11}),
+        }
+
+    def test_greedy_cover_covers_everything(self):
+        """Test that the greedy solver picks the largest test first and covers every VITAL.
+
+        Examples:
+            >>> greedy_cover({1: frozenset({10, 11}), 2: frozenset({11}), 3: frozenset({12})})
+            [1, 3]
+        """
+        incidence = {1: frozenset({10, 11}), 2: frozenset({11}), 3: frozenset({12})}
+        assert greedy_cover(incidence) == [1, 3]
+        assert greedy_cover({}) == []
+
+    def test_exact_cover_beats_greedy(self):
+        """Test that branch and bound finds a smaller cover where the greedy heuristic is sub-optimal.
+
+        Examples:
+            >>> incidence = {1: frozenset({1, 2, 3, 4}), 2: frozenset({1, 3, 5}), 3: frozenset({2, 4, 6})}
+            >>> assert exact_cover(incidence) == [2, 3]
+        """
+        incidence = {1: frozenset({1, 2, 3, 4}), 2: frozenset({1, 3, 5}), 3: frozenset({2, 4, 6})}
+        assert greedy_cover(incidence) == [1, 2, 3]
+        assert exact_cover(incidence) == [2, 3]
+        assert minimum_cover(incidence, exact_limit=6) == [2, 3]
+        assert minimum_cover(incidence, exact_limit=5) == [1, 2, 3]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestRequiredTests:
+    """Test the Account.required_tests property."""
+
+    def test_required_tests_covers_unpassed_vitals(
+        self, sample_vital, sample_user, sample_test, sample_module, sample_status_code
+    ):
+        """Test that required_tests returns the tests mapped to VITALs the student has not passed.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+
+        Examples:
+            >>> VITAL_Test_Map.objects.create(test=test, vital=vital)
+            >>> assert list(user.required_tests) == [test]
+        """
+        sample_module.students.add(sample_user)
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True, condition="pass")
+
+        assert list(sample_user.required_tests) == [sample_test]
+
+    def test_required_tests_cache_invalidated_by_result(
+        self, sample_vital, sample_user, sample_test, sample_module, sample_status_code
+    ):
+        """Test that the cached required tests are dropped when the student's VITAL results change.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+
+        Examples:
+            >>> vital.passed(user)
+            >>> assert not user.required_tests.exists()
+        """
+        # Django imports
+        from django.core.cache import cache
+
+        sample_module.students.add(sample_user)
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True, condition="pass")
+        assert list(sample_user.required_tests) == [sample_test]
+        assert cache.get(required_tests_cache_key(sample_user.pk)) == [sample_test.pk]
+
+        sample_vital.passed(sample_user)
+
+        assert cache.get(required_tests_cache_key(sample_user.pk)) is None
+        assert not sample_user.required_tests.exists()
+
+    def test_required_tests_cache_invalidated_by_enrolment_and_dates(
+        self, sample_vital, sample_user, sample_test, sample_module, sample_status_code
+    ):
+        """Test that the cached required tests are dropped when the student's modules or a VITAL's dates change.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+
+        Examples:
+            >>> module.students.add(user)
+            >>> assert list(user.required_tests) == [test]
+        """
+        # Django imports
+        from django.core.cache import cache
+        from django.utils import timezone as tz
+
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True, condition="pass")
+        assert not sample_user.required_tests.exists()
+
+        sample_module.students.add(sample_user)
+        assert list(sample_user.required_tests) == [sample_test]
+
+        type(sample_test).objects.filter(pk=sample_test.pk).update(release_date=tz.now() + tz.timedelta(days=1))
+        assert VITAL.objects.refresh_dates(VITAL.objects.filter(pk=sample_vital.pk)) == 1
+        assert cache.get(required_tests_cache_key(sample_user.pk)) is None
+
+        assert list(sample_user.required_tests) == [sample_test]
+        sample_user.module_enrollments.get().delete()
+        assert not sample_user.required_tests.exists()
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestVITALDates:
+    """Test the start and end dates stored on VITAL from its mapped tests."""
+
+    def test_mapping_sets_vital_dates(self, sample_vital, sample_test):
+        """Test that mapping a test onto a VITAL copies the test's dates and updates the status.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_test (Test): A test Test instance.
+
+        Examples:
+            >>> VITAL_Test_Map.objects.create(test=test, vital=vital)
+            >>> assert VITAL.objects.get(pk=vital.pk).start_date == test.release_date
+        """
+        assert VITAL.objects.get(pk=sample_vital.pk).status == "Not Started"
+
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital)
+
+        vital = VITAL.objects.get(pk=sample_vital.pk)
+        assert vital.start_date == sample_test.release_date
+        assert vital.end_date == sample_test.recommended_date
+        assert vital.status == "Started"
+        assert vital.manual_satus == "Started"
+
+    def test_test_date_change_refreshes_vital(self, sample_vital, sample_test, sample_user):
+        """Test that moving a mapped test's dates updates the VITAL and its results' status annotation.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_test (Test): A test Test instance.
+            sample_user (Account): A test user instance.
+
+        Examples:
+            >>> test.recommended_date = tz.now() - tz.timedelta(days=1)
+            >>> test.save()
+            >>> assert VITAL.objects.get(pk=vital.pk).status == "Finished"
+        """
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital)
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=False)
+
+        sample_test.release_date = tz.now() - tz.timedelta(days=10)
+        sample_test.recommended_date = tz.now() - tz.timedelta(days=1)
+        sample_test.save()
+
+        vital = VITAL.objects.get(pk=sample_vital.pk)
+        assert vital.end_date == sample_test.recommended_date
+        assert vital.status == "Finished"
+        assert VITAL_Result.objects.get(vital=sample_vital, user=sample_user).vital_status == "Finished"
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestVITALSimulation:
+    """Test the read-only VITAL what-if simulator."""
+
+    @pytest.fixture
+    def graded_student(self, sample_vital, sample_user, sample_test, sample_module, sample_status_code):
+        """Enrol the sample user with a graded score of 55 on a test that is sufficient for the sample VITAL.
+
+        Returns:
+            (VITAL_Test_Map): The mapping between the sample test and VITAL.
+        """
+        # external imports
+        from minerva.models import Test_Score
+
+        sample_module.students.add(sample_user)
+        mapping = VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True)
+        score = Test_Score.objects.create(test=sample_test, user=sample_user)
+        Test_Score.objects.filter(pk=score.pk).update(score=55.0, status="Graded", passed=True)
+        return mapping
+
+    def test_raising_pass_mark_loses_vital(self, graded_student, sample_module, sample_test, sample_vital):
+        """Test that raising the pass mark above the student's score is reported as a lost VITAL.
+
+        Args:
+            graded_student (VITAL_Test_Map): The mapping for a student who passes the sample VITAL.
+            sample_module (Module): A test module instance.
+            sample_test (Test): A test Test instance.
+            sample_vital (VITAL): A test VITAL instance.
+
+        Examples:
+            >>> [result] = simulate_vitals(module, passing_scores={test.pk: 60.0})
+            >>> assert result["lost"] == 1
+        """
+        [result] = simulate_vitals(sample_module, passing_scores={sample_test.pk: 60.0})
+
+        assert result["vital"] == sample_vital.pk
+        assert result["passed_now"] == 1
+        assert result["passed_proposed"] == 0
+        assert result["lost"] == 1
+        assert result["gained"] == 0
+        assert not VITAL_Result.objects.exists()
+
+    def test_mapping_change_and_locked_results(self, graded_student, sample_module, sample_user, sample_vital):
+        """Test that mapping changes are simulated and locked results are never lost.
+
+        Args:
+            graded_student (VITAL_Test_Map): The mapping for a student who passes the sample VITAL.
+            sample_module (Module): A test module instance.
+            sample_user (Account): A test user instance.
+            sample_vital (VITAL): A test VITAL instance.
+
+        Examples:
+            >>> [result] = simulate_vitals(module, mappings=[{"id": mapping.pk, "delete": True}])
+            >>> assert result["lost"] == 1
+        """
+        [result] = simulate_vitals(sample_module, mappings=[{"id": graded_student.pk, "delete": True}])
+        assert result["lost"] == 1
+
+        VITAL_Result.objects.create(vital=sample_vital, user=sample_user, passed=True, locked=True)
+        [result] = simulate_vitals(sample_module, mappings=[{"id": graded_student.pk, "delete": True}])
+        assert result["lost"] == 0
+
+        with pytest.raises(ValueError):
+            simulate_vitals(sample_module, mappings=[{"id": graded_student.pk + 1000, "sufficient": False}])
+
+    def test_simulation_api(self, graded_student, sample_module, sample_test, user_model):
+        """Test that the simulation endpoint returns per-VITAL counts for a superuser.
+
+        Args:
+            graded_student (VITAL_Test_Map): The mapping for a student who passes the sample VITAL.
+            sample_module (Module): A test module instance.
+            sample_test (Test): A test Test instance.
+            user_model (type): The Account model.
+
+        Examples:
+            >>> response = client.post("/api/vitals_simulation/", {"module": module.pk, ...}, format="json")
+            >>> assert response.data["vitals"][0]["lost"] == 1
+        """
+        # external imports
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        # app imports
+        from .api import VITALSimulationViewSet
+
+        admin = user_model.objects.create(username="admin", number=1, is_staff=True, is_superuser=True)
+        request = APIRequestFactory().post(
+            "/api/vitals_simulation/",
+            {"module": sample_module.pk, "passing_scores": {str(sample_test.pk): 60.0}},
+            format="json",
+        )
+        force_authenticate(request, user=admin)
+
+        response = VITALSimulationViewSet.as_view({"post": "create"})(request)
+
+        assert response.status_code == 200
+        assert response.data["vitals"][0]["lost"] == 1
+
+    def test_simulation_api_rejects_foreign_tests(self, graded_student, sample_module, sample_vital, user_model):
+        """Test that a proposed mapping or pass mark for a test that is not on the module is a bad request.
+
+        Args:
+            graded_student (VITAL_Test_Map): The mapping for a student who passes the sample VITAL.
+            sample_module (Module): A test module instance.
+            sample_vital (VITAL): A test VITAL instance.
+            user_model (type): The Account model.
+
+        Examples:
+            >>> response = client.post(url, {"module": module.pk, "mappings": ...}, format="json")
+            >>> assert response.status_code == 400
+        """
+        # external imports
+        from minerva.models import Module, Test
+        from rest_framework.test import APIRequestFactory, force_authenticate
+
+        # app imports
+        from .api import VITALSimulationViewSet
+
+        other = Module.objects.create(
+            code="PHAS4321", exam_code=1, uuid="other-uuid", name="Other", credits=15, level=1, year=sample_module.year
+        )
+        foreign = Test.objects.create(module=other, name="Other Test", test_id="other-test")
+        admin = user_model.objects.create(username="admin", number=1, is_staff=True, is_superuser=True)
+
+        def simulate(proposal):
+            request = APIRequestFactory().post(
+                "/api/vitals_simulation/", {"module": sample_module.pk, **proposal}, format="json"
+            )
+            force_authenticate(request, user=admin)
+            return VITALSimulationViewSet.as_view({"post": "create"})(request)
+
+        for proposal in (
+            {"mappings": [{"vital": sample_vital.pk, "test": foreign.pk}]},
+            {"mappings": [{"vital": sample_vital.pk, "test": foreign.pk + 1000}]},
+            {"mappings": [{"id": graded_student.pk, "test": foreign.pk}]},
+            {"passing_scores": {str(foreign.pk): 60.0}},
+        ):
+            response = simulate(proposal)
+            assert response.status_code == 400
+            assert "on this module" in str(response.data)
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestCalculateVITALs:
+    """Test the VITALs SummaryScore calculation."""
+
+    def test_calculate_vitals_histogram(
+        self, sample_vital, sample_user, sample_test, sample_module, sample_status_code
+    ):
+        """Test that a passed, started VITAL gives a full score and a single Passed histogram entry.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> summary = SummaryScore(enrollment=enrollment, category=category)
+            >>> summary.clean()
+            >>> summary.calculate()
+            >>> assert summary.data["data"] == {"Passed": 1}
+        """
+        # external imports
+        from minerva.models import SummaryScore, TestCategory
+
+        sample_module.students.add(sample_user)
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital)
+        sample_vital.passed(sample_user)
+        category = TestCategory.objects.create(module=sample_module, text="VITALs", category_id="vitals")
+
+        summary = SummaryScore(enrollment=sample_user.module_enrollments.get(), category=category)
+        summary.clean()
+        summary.calculate()
+
+        assert summary.score == 100.0
+        assert summary.data["data"] == {"Passed": 1}
+        assert summary.data["colours"] == {"Passed": "forestgreen"}
+
+    def test_calculate_many_batches_queries(
+        self,
+        sample_vital,
+        sample_user,
+        sample_test,
+        sample_module,
+        sample_status_code,
+        user_model,
+        django_assert_num_queries,
+    ):
+        """Test that the registered VITALs calculator scores several students with a fixed number of queries.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            user_model (type): The Account model.
+            django_assert_num_queries: pytest-django query counting fixture.
+
+        Examples:
+            >>> get_calculator(category).calculate_many(summaries)
+            >>> assert [summary.score for summary in summaries] == [100.0, 50.0]
+        """
+        # external imports
+        from minerva.models import SummaryScore, TestCategory, get_calculator
+
+        # app imports
+        from .models import VITALsCalculator
+
+        other = user_model.objects.create(username="other", number=999999, year=sample_user.year)
+        sample_module.students.add(sample_user, other)
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital)
+        sample_vital.passed(sample_user)
+        category = TestCategory.objects.create(module=sample_module, text="VITALs", category_id="vitals")
+        summaries = []
+        for enrollment in sample_module.student_enrollments.order_by("student__number"):
+            summary = SummaryScore(enrollment=enrollment, category=category)
+            summary.clean()
+            summaries.append(summary)
+
+        calculator = get_calculator(category)
+        assert isinstance(calculator, VITALsCalculator)
+        with django_assert_num_queries(4):
+            calculator.calculate_many(summaries)
+
+        assert [summary.score for summary in summaries] == [100.0, 50.0]
+        assert summaries[1].data["data"] == {"In Progress": 1}
+
+    def test_started_vitals_shared_cache(self, sample_vital, sample_test, sample_module, django_assert_num_queries):
+        """Test that started VITALs are looked up once per set of modules when a batch cache is given.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            django_assert_num_queries: pytest-django query counting fixture.
+
+        Examples:
+            >>> batch = {}
+            >>> assert started_vitals([module.pk], batch) is started_vitals([module.pk], batch)
+        """
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital)
+        batch = {}
+        with django_assert_num_queries(1):
+            first = started_vitals([sample_module.pk], batch)
+            second = started_vitals([sample_module.pk, sample_module.pk], batch)
+
+        assert first is second
+        assert first == [(sample_vital.pk, "Started", sample_module.level)]
+
+
+@pytest.mark.django_db
+@pytest.mark.unit
+class TestVITALProgress:
+    """Test the materialised VITAL_Stats and VITAL_Completion tables."""
+
+    def test_stats_and_completion_refreshed_by_check(
+        self, sample_vital, sample_user, sample_test, sample_module, sample_status_code
+    ):
+        """Test that check_vital_for_queryset refreshes the VITAL's stats and the students' completion.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_test (Test): A test Test instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+
+        Examples:
+            >>> vital.check_vital_for_queryset(module.students.all())
+            >>> assert VITAL_Completion.objects.get(module=module, student=user).fraction == 1.0
+        """
+        # external imports
+        from minerva.models import Test_Score
+
+        sample_module.students.add(sample_user)
+        VITAL_Test_Map.objects.create(test=sample_test, vital=sample_vital, sufficient=True, condition="pass")
+        score = Test_Score.objects.create(test=sample_test, user=sample_user)
+        Test_Score.objects.filter(pk=score.pk).update(score=80.0, passed=True)
+
+        sample_vital.check_vital_for_queryset(sample_module.students.all())
+
+        assert VITAL_Stats.objects.get(vital=sample_vital).passed == 1
+        assert VITAL.objects.get(pk=sample_vital.pk).stats == {"Passed": 1, "": 0}
+        completion = VITAL_Completion.objects.get(module=sample_module, student=sample_user)
+        assert (completion.passed, completion.total, completion.fraction) == (1, 1, 1.0)
+
+    def test_stats_and_completion_refreshed_by_award(
+        self, sample_vital, sample_user, sample_module, sample_status_code, django_capture_on_commit_callbacks
+    ):
+        """Test that awarding a single VITAL refreshes its stats and the student's completion once it commits.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+            sample_status_code (StatusCode): The registered status code.
+            django_capture_on_commit_callbacks (callable): pytest-django on_commit capture.
+
+        Examples:
+            >>> vital.passed(user)
+            >>> assert VITAL_Stats.objects.get(vital=vital).passed == 1
+        """
+        sample_module.students.add(sample_user)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_vital.passed(sample_user)
+
+        assert VITAL_Stats.objects.get(vital=sample_vital).passed == 1
+        completion = VITAL_Completion.objects.get(module=sample_module, student=sample_user)
+        assert (completion.passed, completion.fraction) == (1, 1.0)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            sample_vital.passed(sample_user, passed=False)
+
+        assert VITAL_Stats.objects.get(vital=sample_vital).failed == 1
+        assert VITAL_Completion.objects.get(module=sample_module, student=sample_user).passed == 0
+
+    def test_completion_full_refresh_drops_unenrolled(self, sample_vital, sample_user, sample_module):
+        """Test that a full module refresh removes completion rows for students no longer enrolled.
+
+        Args:
+            sample_vital (VITAL): A test VITAL instance.
+            sample_user (Account): A test user instance.
+            sample_module (Module): A test module instance.
+
+        Examples:
+            >>> VITAL_Completion.refresh([module])
+            >>> assert not VITAL_Completion.objects.filter(module=module).exists()
+        """
+        VITAL_Completion.objects.create(module=sample_module, student=sample_user, passed=1, total=1, fraction=1.0)
+
+        assert VITAL_Completion.refresh([sample_module]) == []
+        assert not VITAL_Completion.objects.filter(module=sample_module).exists()
@@ -13,7 +13,8 @@ from . import views
 app_name = basename(dirname(__file__))
 
 urlpatterns = [
-    path("vitals_view/", views.ShowVitralResultsView.as_view()),
+    path("vitals_view/", views.ShowVitralResultsView.as_view(), name="vital_results"),
+    path("export_vital_results/<int:module>/", views.ExportVitalResultsView.as_view(), name="export_vital_results"),
     path("detail/<pk>/", views.VitalDetailView.as_view()),
     path("VITALlookup/", views.VITALAutocomplete.as_view(), name="VITAL_lookup"),
     path("module_cdf/", views.VITALsCDFPlotView.as_view(), name="module_cdf"),
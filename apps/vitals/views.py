@@ -6,8 +6,9 @@ from collections import namedtuple
 # Django imports
 # Create your views here.
 from django.db.models import OuterRef, Q, Subquery
+from django.shortcuts import get_object_or_404
 from django.utils.html import format_html
-from django.views.generic import DetailView, FormView
+from django.views.generic import DetailView, FormView, View
 
 # external imports
 import numpy as np
@@ -16,16 +17,15 @@ from accounts.views import StudentSummaryView
 from dal import autocomplete
 from django_tables2 import SingleTableMixin
 from django_tables2.columns import Column
-from django_tables2.paginators import LazyPaginator
 from htmx_views.views import HTMXProcessMixin
 from matplotlib import pyplot as plt
 from minerva.forms import (
     AssessmentModuleSelectForm,
     VITALsModuleSelectForm as ModuleSelectForm,
 )
-from minerva.models import ModuleEnrollment, SummaryScore
-from util.http import svg_data
-from util.tables import BaseTable
+from minerva.models import Module, ModuleEnrollment
+from util.http import svg_data, table_response
+from util.tables import BaseTable, KeysetPaginationMixin
 from util.views import (
     IsStaffViewMixin,
     IsStudentViewixin,
@@ -34,7 +34,7 @@ from util.views import (
 )
 
 # app imports
-from .models import VITAL, VITAL_Result
+from .models import VITAL, VITAL_Completion, VITAL_Result
 
 ImageData = namedtuple("ImageData", ["data", "alt"], defaults=["", ""])
 
@@ -91,29 +91,27 @@ class VITALResultColumn(Column):
         return format_html(ret)
 
 
-class BaseShowvitalResults(SingleTableMixin, HTMXProcessMixin, FormView):
+class BaseShowvitalResults(KeysetPaginationMixin, SingleTableMixin, HTMXProcessMixin, FormView):
     """View to show vital results for a module in a table."""
 
     form_class = ModuleSelectForm
-    paginator_class = LazyPaginator
     table_class = BaseTable
     template_name = "vitals/vital_results.html"
     template_name_next_batch = "vitals/parts/vital_results_next_batch.html"
-    table_pagination = {"per_page": 10}
     context_table_name = "vital_results"
 
     def __init__(self, *args, **kargs):
         """Construct instance variables."""
         self.module = None
         self.vitals = []
-        self._entries = []
+        self._entries = None
         super().__init__(*args, **kargs)
 
     @property
     def entries(self):
-        """Cache entries between metrhods."""
-        if len(self._entries) == 0:
-            self._entries = self.get_entries()
+        """Cache the current batch of students between methods."""
+        if self._entries is None:
+            self._entries = self.get_batch(self.get_entries())
         return self._entries
 
     def form_valid(self, form):
@@ -162,7 +160,8 @@ class BaseShowvitalResults(SingleTableMixin, HTMXProcessMixin, FormView):
     def get_table_data(self):
         """Fill out the table with data, creating the entries for the MarkType columns to interpret."""
         vitals = {vital.name: vital.pk for vital in self.vitals}
-        table = [Row_Dict(student, vitals, self.module) for student in self.entries]
+        grid = VITAL_Result.module_grid(self.module) if self.module is not None else None
+        table = [Row_Dict(student, vitals, grid) for student in self.entries]
         return table
 
     def get_queryset(self):
@@ -171,29 +170,30 @@ class BaseShowvitalResults(SingleTableMixin, HTMXProcessMixin, FormView):
 
 
 class Row_Dict:
-    """Proxy for a dictionary that delays evaluating the VITAL results.
+    """Proxy for a dictionary that looks up a student's VITAL results in the module's cached results grid.
 
     Attributes:
         student: The student account object.
-        vital_results: Filtered VITAL results for the student.
+        row (array): The student's row of the grid - 1 for passed, 0 for not passed and -1 for no result.
+        columns (dict): Dictionary mapping VITAL IDs to columns of the row.
         vitals (dict): Dictionary mapping VITAL names to VITAL IDs.
     """
 
-    def __init__(self, student, vitals, module):
-        """Initialise Row_Dict with student, VITALs and module data.
+    def __init__(self, student, vitals, grid):
+        """Initialise Row_Dict with student, VITALs and results grid.
 
         Args:
             student: The student account object.
             vitals (dict): Dictionary mapping VITAL names to VITAL IDs.
-            module: The module object to filter results by.
+            grid (dict): The module's results from VITAL_Result.module_grid.
         """
         self.student = student
-        # Convert to list to avoid multiple database hits
-        self.vital_results = list(student.vital_results.filter(vital__module=module))
-        # Build a dict for faster lookup
-        self.vital_results_dict = {vr.vital.pk: vr for vr in self.vital_results}
         self.vitals = vitals
-        dd = self.__dict__
+        self.columns = grid["vitals"] if grid else {}
+        if grid and (ix := grid["students"].get(student.pk)) is not None:
+            self.row = grid["passed"][ix]
+        else:
+            self.row = np.full(len(self.columns), -1, dtype=np.int8)
 
     def __getitem__(self, index):
         """Get item from Row_Dict by index key.
@@ -216,13 +216,13 @@ class Row_Dict:
             case "status":
                 return self.student.status
             case "Overall":
-                if len(self.vital_results) != len(self.vitals):
+                if (self.row < 0).any():
                     return {"passed": None}
-                if any(not vr.passed for vr in self.vital_results):
-                    return {"passed": False}
-                return {"passed": True}
+                return {"passed": bool(self.row.all())}
             case vital if vital in self.vitals:
-                return self.vital_results_dict.get(self.vitals[vital])
+                if (column := self.columns.get(self.vitals[vital])) is None or self.row[column] < 0:
+                    return None
+                return {"passed": bool(self.row[column])}
             case _:
                 return False
 
@@ -240,7 +240,6 @@ class ShowAllVitalResultsView(IsSuperuserViewMixin, BaseShowvitalResults):
             Account.objects.filter(module_enrollments__in=enroillments)
             .annotate(status=Subquery(status))
             .select_related("programme")
-            .prefetch_related("vital_results__vital")
             .order_by("last_name", "first_name")
         )
         return qs
@@ -259,7 +258,6 @@ class ShowTutorVitalResultsView(IsStaffViewMixin, BaseShowvitalResults):
             Account.objects.filter(module_enrollments__in=enroillments, tutorial_group__tutor=self.request.user)
             .annotate(status=Subquery(status))
             .select_related("programme")
-            .prefetch_related("vital_results__vital")
             .order_by("last_name", "first_name")
         )
         return qs
@@ -278,6 +276,19 @@ class ShowVitralResultsView(RedirectView):
         return StudentSummaryView
 
 
+class ExportVitalResultsView(IsSuperuserViewMixin, View):
+    """Stream every active student's VITAL results for a module as a CSV or XLSX download.
+
+    The *format* query parameter selects csv (the default) or xlsx.
+    """
+
+    def get(self, request, module):
+        """Respond with the module's VITAL results grid."""
+        module = get_object_or_404(Module, pk=module)
+        fmt = "xlsx" if request.GET.get("format") == "xlsx" else "csv"
+        return table_response(VITAL_Result.module_rows(module), f"{module.code}_vital_results", fmt=fmt)
+
+
 class VitalDetailView(IsStudentViewixin, DetailView):
     """Provide a detail view for a single test."""
 
@@ -338,9 +349,12 @@ class VITALsCDFPlotView(IsStaffViewMixin, FormView):
         self.module = form.cleaned_data["module"]
         if self.module is not None:
             self.category = self.module.categories.filter(text="VITALs").first()
-            self.scores = SummaryScore.objects.filter(category=self.category, student__is_active=True).values_list(
-                "score", flat=True
-            )
+            completions = VITAL_Completion.objects.filter(module=self.module, student__is_active=True)
+            if not completions.exists():
+                VITAL_Completion.refresh([self.module])
+            self.scores = [
+                100.0 * fraction for fraction in completions.exclude(fraction=None).values_list("fraction", flat=True)
+            ]
         else:
             self.scores = None
         return self.render_to_response(self.get_context_data())
@@ -381,4 +395,6 @@ class VITALsCDFPlotView(IsStaffViewMixin, FormView):
         ax.set_xlabel("Student VITAL completion %")
         ax.set_ylabel("% students getting this mark or better")
         ax.set_title("VILTALs Completion  Cumulative Distribution")
-        return ImageData(svg_data(figure, base64=True), alt=f"Summary pass/fail for all {self.category.text}")
+        return ImageData(
+            svg_data(figure, base64=True), alt=f"Summary pass/fail for all {getattr(self.category, 'text', 'VITALs')}"
+        )
@@ -22,6 +22,8 @@ from django.contrib.auth import get_user_model
 # external imports
 import pytest
 
+pytest_plugins = ["util.testing"]
+
 
 @pytest.fixture
 def user_model():
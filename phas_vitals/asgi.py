@@ -0,0 +1,33 @@
+"""
+ASGI config for phas_vitals project.
+
+It exposes the ASGI callable as a module-level variable named ``application``, for serving the site with an ASGI
+server (e.g. ``gunicorn -k uvicorn.workers.UvicornWorker phas_vitals.asgi:application``).
+
+Under ASGI the middleware runs on the event loop and each request's synchronous code - which includes all of the
+views - runs in a thread of its own, so a slow view still holds that thread until it returns. Streaming responses
+must use :class:`util.http.SyncStreamingHttpResponse` or :class:`util.http.SyncFileResponse`, which read their
+content from the request's thread a batch at a time; Django reads the whole of a plain ``StreamingHttpResponse`` of a
+synchronous iterator into memory before sending any of it.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/stable/howto/deployment/asgi/
+"""
+
+# Python imports
+import logging
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "phas_vitals.settings.production")
+
+# Django imports
+from django.core.asgi import get_asgi_application
+
+logger = logging.getLogger(__name__)
+
+try:
+    application = get_asgi_application()
+    logger.info("ASGI application loaded")
+except Exception:
+    logger.exception("Failed to load the ASGI application")
+    raise
@@ -132,12 +132,14 @@ DEFAULT_APPS = (
 # Middlewares
 MIDDLEWARE = [
     "django.middleware.security.SecurityMiddleware",
+    "util.profiling.QueryBudgetMiddleware",
     "django_htmx.middleware.HtmxMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "util.clock.RequestNowMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django.contrib.flatpages.middleware.FlatpageFallbackMiddleware",
@@ -250,6 +252,7 @@ AUTH_ADFS = {
 
 # the default WSGI application
 WSGI_APPLICATION = f"{SITE_NAME}.wsgi.application"
+ASGI_APPLICATION = f"{SITE_NAME}.asgi.application"
 
 # the root URL configuration
 ROOT_URLCONF = f"{SITE_NAME}.urls"
@@ -20,6 +20,9 @@ DATABASES = {
 DEBUG = True
 TESTING = True
 
+# Record per-request query statistics so that util.testing can fail tests that go over a view's QUERY_BUDGETS
+QUERY_STATS_ENABLED = True
+
 # allow all hosts during testing
 ALLOWED_HOSTS = ["*", "testserver"]
 